@@ -0,0 +1,9 @@
+from modules.helper import Stage
+
+
+def summary(stage: Stage) -> str:
+    """Runtime and peak RSS of a benchmarked stage, with its growth over the start of the stage."""
+    return (
+        f"{stage.name} :: {stage.wall:.3f}s, peak RSS {stage.peak / 2**20:.0f} MiB "
+        f"(+{(stage.peak - stage.rss) / 2**20:.0f} MiB)"
+    )
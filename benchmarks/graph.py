@@ -0,0 +1,116 @@
+"""Benchmark of the crawl graph backend.
+
+Compares loading a synthetic network structure and computing the degrees
+and PageRank with the former networkx DiGraph and with the CSR Graph,
+reporting the runtime and the peak RSS recorded by the Profiler of the run
+reports. As the RSS isn't given back to the system, the growth over the
+start of each stage is the figure to compare. With `--binary`, also times
+the binary network structure and with `--plots`, rendering every
+Visualization plot.
+
+Usage:
+    python -m benchmarks.graph --nodes 100000 --links 10
+    python -m benchmarks.graph --nodes 1000000 --links 2 --plots --skip-baseline
+    python -m benchmarks.graph --nodes 1000000 --links 2 --binary --skip-baseline --profile graph.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+
+import networkx as nx
+
+from benchmarks import summary
+from modules.graph import Graph
+from modules.helper import Profiler, setup_custom_logger
+from modules.network import json_to_binary
+from modules.visualization import Visualization
+
+
+def network(nodes: int, links: int, seed: int = 0) -> dict:
+    """Synthetic network structure with preferential attachment like link targets."""
+    rand = random.Random(seed)
+    urls = [f"http://{i:x}.onion/page/{i}" for i in range(nodes)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(nodes)))
+    return {url: rand.choices(urls, cum_weights=cum_weights, k=rand.randint(0, 2 * links)) for url in urls}
+
+
+def baseline(path: str) -> None:
+    """Former networkx loading and metrics, kept for comparison."""
+    with open(path, "r", encoding="UTF-8") as f:
+        data = json.load(f)
+    G = nx.DiGraph()
+    G.add_nodes_from(data.keys())
+    for key, value in data.items():
+        G.add_edges_from([key, val] for val in value)
+    dict(G.in_degree())
+    dict(G.out_degree())
+    nx.pagerank(G)
+
+
+def csr(path: str, load=Graph.from_json) -> None:
+    """CSR loading and metrics."""
+    graph = load(path)
+    graph.in_degree()
+    graph.out_degree()
+    graph.pagerank()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl graph backend benchmark")
+    parser.add_argument("--nodes", type=int, default=100000, help="Number of crawled pages. (Default: 100000)")
+    parser.add_argument("--links", type=int, default=10, help="Mean number of links per page. (Default: 10)")
+    parser.add_argument("--skip-baseline", action="store_true", help="Only run the current implementation")
+    parser.add_argument("--binary", action="store_true", help="Also time opening the binary network structure")
+    parser.add_argument("--plots", action="store_true", help="Also time rendering every plot")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of plot rendering processes. (Default: cpus)")
+    parser.add_argument("--profile", type=str, default=None, help="File path of the JSON run report")
+    args = parser.parse_args()
+    profiler = Profiler(name="graph")
+
+    data = network(args.nodes, args.links)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "network_structure.json")
+        with open(path, "w", encoding="UTF-8") as f:
+            json.dump(data, f)
+        print(f"{len(data)} pages, {sum(map(len, data.values()))} links")
+        del data
+
+        with profiler.stage("csr") as stage:
+            csr(path)
+        print(summary(stage))
+
+        if args.binary:
+            binary_path = json_to_binary(path)
+            with profiler.stage("binary open") as stage:
+                Graph.from_binary(binary_path)
+            print(summary(stage))
+            with profiler.stage("binary csr") as stage:
+                csr(binary_path, Graph.from_binary)
+            print(summary(stage))
+
+        if not args.skip_baseline:
+            with profiler.stage("networkx baseline") as stage:
+                baseline(path)
+            print(summary(stage))
+
+        if args.plots:
+            logger = setup_custom_logger(name="benchlog", filename=None, verbose_=False, filelog=False, argv=None)
+            visualization = Visualization(json_file=path, out_path=tmp, logger=logger)
+            with profiler.stage("plot metrics") as stage:
+                for name in ("in_degree", "out_degree", "pagerank", "eigenvector_centrality"):
+                    visualization.metric(name)
+            print(summary(stage))
+            with profiler.stage("plot rendering") as stage:
+                visualization.plot_all(n_jobs=args.jobs)
+            print(summary(stage))
+
+    if args.profile:
+        print(f"Run report created :: {profiler.save(args.profile)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark of the classifier text preprocessing.
+
+Compares the former single process `Series.apply` implementation with the
+batched, multi-process one on a synthetic corpus.
+
+Usage:
+    python -m benchmarks.preprocess --documents 100000 --words 500
+"""
+
+import argparse
+import random
+import re
+import tempfile
+import time
+
+import contractions
+import pandas as pd
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+from nltk.tokenize import word_tokenize
+
+from modules.classifier import Classifier
+from modules.helper import setup_custom_logger
+
+VOCABULARY = [
+    "market", "vendor", "listing", "bitcoin", "escrow", "forum", "thread", "reply", "moderator", "news",
+    "report", "headline", "wallet", "shipping", "review", "they're", "don't", "running", "services", "hosted",
+    "the", "and", "of", "is", "with", "for", "every", "members", "pages", "links",
+]  # fmt: skip
+
+
+def corpus(documents: int, words: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic documents mixing words, urls, tags and punctuation."""
+    rand = random.Random(seed)
+    noise = ["http://example.onion/page", "www.example.com", "<b>", "</p>", "42,", "!!"]
+    rows = []
+    for i in range(documents):
+        tokens = [rand.choice(VOCABULARY) if rand.random() > 0.1 else rand.choice(noise) for _ in range(words)]
+        rows.append((f"http://site{i}.onion", " ".join(tokens)))
+    return pd.DataFrame(rows, columns=["URL", "scrape_data"])
+
+
+def baseline(chunk: pd.DataFrame) -> pd.Series:
+    """Former preprocessing, kept for comparison."""
+    stop_words = set(stopwords.words("english"))
+    lemmatizer = WordNetLemmatizer()
+
+    def preprocess_text(text):
+        text = re.sub(r"https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/\w]*", "", text)
+        text = re.sub(r"www\.[^\s]+", "", text)
+        text = re.sub(r"<[^>]*>", "", text)
+        text = re.sub(r"[^a-zA-Z\s]", "", text.lower())
+        text = contractions.fix(text)
+        words = word_tokenize(text)
+        filtered_words = [word for word in words if word not in stop_words]
+        lemmatized_words = [lemmatizer.lemmatize(word) for word in filtered_words]
+        lemmatized_words = [word for word in lemmatized_words if word.isalpha()]
+        return " ".join(lemmatized_words[:100])
+
+    return chunk["scrape_data"].astype(str).apply(preprocess_text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifier preprocessing benchmark")
+    parser.add_argument("--documents", type=int, default=100000, help="Number of documents. (Default: 100000)")
+    parser.add_argument("--words", type=int, default=500, help="Words per document. (Default: 500)")
+    parser.add_argument("--jobs", type=int, default=None, help="Preprocessing processes. (Default: all cpus)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Documents per chunk. (Default: 10000)")
+    parser.add_argument("--skip-baseline", action="store_true", help="Only run the current implementation")
+    args = parser.parse_args()
+
+    data = corpus(args.documents, args.words)
+    chunks = [data.iloc[i : i + args.chunk_size] for i in range(0, len(data), args.chunk_size)]
+    logger = setup_custom_logger(name="benchlog", filename=None, verbose_=False, filelog=False, argv=None)
+    print(f"{len(data)} documents of {args.words} words")
+
+    with tempfile.TemporaryDirectory() as out_path:
+        classifier = Classifier(input_path="", out_path=out_path, logger=logger, n_jobs=args.jobs)
+        start = time.perf_counter()
+        try:
+            result = pd.concat([classifier.preprocess(chunk)["preprocessed"] for chunk in chunks], ignore_index=True)
+        finally:
+            classifier.close()
+    current = time.perf_counter() - start
+    print(f"batched ({classifier.n_jobs} processes) :: {current:.2f}s")
+
+    if not args.skip_baseline:
+        start = time.perf_counter()
+        expected = pd.concat([baseline(chunk) for chunk in chunks], ignore_index=True)
+        previous = time.perf_counter() - start
+        print(f"baseline (1 process) :: {previous:.2f}s, speedup x{previous / current:.1f}")
+        print(f"identical output :: {(expected == result).mean():.2%}")
+
+
+if __name__ == "__main__":
+    main()
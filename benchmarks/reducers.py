@@ -0,0 +1,86 @@
+"""Benchmark of the classifier dimensionality reduction backends.
+
+Clusters a synthetic corpus of known topics with each reducer and reports the
+runtime of the encode, reduce and cluster stages along with the cluster quality.
+
+Usage:
+    python -m benchmarks.reducers --documents 5000 --topics 5
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+
+from modules.classifier import REDUCERS, Classifier
+from modules.helper import setup_custom_logger
+
+
+def corpus(documents: int, topics: int, words: int = 100, seed: int = 0):
+    """Synthetic preprocessed documents, each drawn mostly from the vocabulary of its topic."""
+    rand = random.Random(seed)
+    shared = [f"common{i}" for i in range(500)]
+    vocabularies = [[f"topic{t}word{i}" for i in range(200)] for t in range(topics)]
+    text, truth = [], []
+    for i in range(documents):
+        topic = i % topics
+        text.append(
+            " ".join(
+                rand.choice(vocabularies[topic]) if rand.random() < 0.6 else rand.choice(shared) for _ in range(words)
+            )
+        )
+        truth.append(topic)
+    return pd.Series(text), np.array(truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifier reducers benchmark")
+    parser.add_argument("--documents", type=int, default=5000, help="Number of documents. (Default: 5000)")
+    parser.add_argument("--topics", type=int, default=5, help="Number of topics. (Default: 5)")
+    parser.add_argument("--reducers", nargs="+", default=list(REDUCERS), choices=REDUCERS, help="Reducers to run")
+    args = parser.parse_args()
+
+    text, truth = corpus(args.documents, args.topics)
+    logger = setup_custom_logger(name="benchlog", filename=None, verbose_=False, filelog=False, argv=None)
+    print(f"{len(text)} documents of {args.topics} topics")
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_path:
+        for reducer in args.reducers:
+            classifier = Classifier(input_path="", out_path=out_path, logger=logger, reducer=reducer)
+            _, X_scaled, _ = classifier.vectorize(text)
+
+            start = time.perf_counter()
+            X_encoded = classifier.encode(X_scaled)
+            encoded = time.perf_counter() - start
+            X_reduced = classifier.reduce(X_encoded)
+            labels = classifier.cluster(X_reduced)
+            elapsed = time.perf_counter() - start
+
+            clustered = labels != -1
+            silhouette = (
+                silhouette_score(X_reduced[clustered], labels[clustered], sample_size=5000, random_state=0)
+                if len(set(labels[clustered])) > 1
+                else float("nan")
+            )
+            results.append(
+                {
+                    "reducer": reducer,
+                    "encode (s)": round(encoded, 2),
+                    "total (s)": round(elapsed, 2),
+                    "clusters": len(set(labels[clustered])),
+                    "noise ratio": round(1 - clustered.mean(), 3),
+                    "silhouette": round(silhouette, 3),
+                    "ARI": round(adjusted_rand_score(truth, labels), 3),
+                }
+            )
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark of the classifier vectorization.
+
+Compares the former dense CountVectorizer + TfidfVectorizer implementation with
+the sparse one, reporting the runtime and the peak RSS recorded by the Profiler
+of the run reports. As the RSS isn't given back to the system, the growth over
+the start of each stage is the figure to compare.
+
+Usage:
+    python -m benchmarks.vectorize --documents 20000
+    python -m benchmarks.vectorize --documents 20000 --profile vectorize.json
+"""
+
+import argparse
+import random
+import tempfile
+
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+from benchmarks import summary
+from modules.classifier import Classifier
+from modules.helper import Profiler, setup_custom_logger
+
+
+def corpus(documents: int, vocabulary: int, words: int = 100, seed: int = 0) -> pd.Series:
+    """Synthetic preprocessed documents with a zipfian vocabulary."""
+    rand = random.Random(seed)
+    names = [f"w{i}" for i in range(vocabulary)]
+    weights = [1 / (i + 1) for i in range(vocabulary)]
+    return pd.Series([" ".join(rand.choices(names, weights, k=words)) for _ in range(documents)])
+
+
+def baseline(text: pd.Series) -> pd.DataFrame:
+    """Former vectorization, kept for comparison."""
+    count_vectorizer = CountVectorizer()
+    tfidf_vectorizer = TfidfVectorizer()
+    count_matrix = count_vectorizer.fit_transform(text)
+    tfidf_matrix = tfidf_vectorizer.fit_transform(text)
+    count_feature_names = count_vectorizer.get_feature_names_out()
+    tfidf_feature_names = tfidf_vectorizer.get_feature_names_out()
+    count_df = pd.DataFrame(count_matrix.toarray(), columns=count_feature_names)
+    tfidf_df = pd.DataFrame(tfidf_matrix.toarray(), columns=tfidf_feature_names)
+    tfidf_df = tfidf_df.round(3) * 1000
+    tfidf_df = tfidf_df.astype(int)
+    top3_count = count_df.apply(lambda x: x.nlargest(3).index.tolist(), axis=1)
+    tfidf_df["Top Unigram 1"] = [t[0] for t in top3_count]
+    tfidf_df["Top Unigram 2"] = [t[1] if len(t) > 1 else "" for t in top3_count]
+    tfidf_df["Top Unigram 3"] = [t[2] if len(t) > 2 else "" for t in top3_count]
+    return tfidf_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifier vectorization benchmark")
+    parser.add_argument("--documents", type=int, default=20000, help="Number of documents. (Default: 20000)")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="Number of distinct words. (Default: 20000)")
+    parser.add_argument("--skip-baseline", action="store_true", help="Only run the current implementation")
+    parser.add_argument("--profile", type=str, default=None, help="File path of the JSON run report")
+    args = parser.parse_args()
+
+    text = corpus(args.documents, args.vocabulary)
+    logger = setup_custom_logger(name="benchlog", filename=None, verbose_=False, filelog=False, argv=None)
+    print(f"{len(text)} documents, {args.vocabulary} words vocabulary")
+
+    profiler = Profiler(name="vectorize")
+    stages = []
+    with tempfile.TemporaryDirectory() as out_path:
+        classifier = Classifier(input_path="", out_path=out_path, logger=logger, profiler=profiler)
+        with profiler.stage("sparse", items=len(text)) as stage:
+            classifier.vectorize(text)
+        stages.append(stage)
+
+    if not args.skip_baseline:
+        with profiler.stage("dense baseline", items=len(text)) as stage:
+            baseline(text)
+        stages.append(stage)
+
+    for stage in stages:
+        print(summary(stage))
+    if args.profile:
+        print(f"Run report created :: {profiler.save(args.profile)}")
+
+
+if __name__ == "__main__":
+    main()
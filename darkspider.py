@@ -42,9 +42,12 @@ import requests
 # DarkSpider Modules
 from modules import Crawler
 from modules.checker import check_ip, check_tor, extract_domain, folder, url_canon
+from modules.export import FORMATS
 from modules.extractor import Extractor
-from modules.helper import HEADER, Colors, get_tor_proxies, gradient_print, setup_custom_logger
-from modules.visualization import Visualization
+from modules.helper import HEADER, Colors, Profiler, get_tor_proxies, gradient_print, setup_custom_logger
+from modules.network import NETWORK_FORMATS
+from modules.stats import GraphStats
+from modules.visualization import Visualization, plot_stats
 
 warnings.filterwarnings("ignore", category=UserWarning, module=r"bs4|gooey")
 logging.getLogger("urllib3").setLevel(logging.ERROR)
@@ -95,7 +98,24 @@ def main(gooey_available, baseParser):
         type=int,
         default=None,
         help="Check for keywords and only scrape documents that contain a "
-        "match. 0 search whole html object. 1 search only the text. (Default: None)",
+        "match. 0 search whole html object. 1 search only the text. 2 search both. The matched rules are logged "
+        "and written next to each scraped page as a .yara.json file. (Default: None)",
+    )
+    extract_group.add_argument(
+        "--rules",
+        metavar="Yara rules",
+        type=str,
+        nargs="+",
+        default=None,
+        help="Yara rule file(s) or folder(s) of .yar/.yara files used with -y/--yara. (Default: res/keywords.yar)",
+    )
+    extract_group.add_argument(
+        "-b",
+        "--boilerplate",
+        dest="Boilerplate",
+        action="store_true",
+        help="Remove navigation, header, footer and form boilerplate from the text searched with -y 1/2 "
+        "and classified with -k. Pass it to both so that -k reuses the text cache of the crawl",
     )
 
     # Crawler
@@ -139,6 +159,47 @@ def main(gooey_available, baseParser):
         help="Exclude external links while crawling a webpage (Default: include all links)",
     )
 
+    crawler_group.add_argument(
+        "--near-dup",
+        metavar="Distance",
+        type=int,
+        default=None,
+        help="Detect near duplicate pages whose SimHash fingerprints differ in at most Distance bits (0-63). "
+        "The crawler doesn't follow their links, they are recorded in the network structure without links, "
+        "and the extractor skips them. (Default: None)",
+    )
+    crawler_group.add_argument(
+        "--network-format",
+        metavar="Format",
+        type=str,
+        choices=NETWORK_FORMATS,
+        default="json",
+        help="Format of the network structure, json or a memory mappable binary network_structure.bin. "
+        "Convert between them with 'python -m modules.network'. (Default: json)",
+    )
+    crawler_group.add_argument(
+        "--stats-interval",
+        metavar="Seconds",
+        type=float,
+        default=60.0,
+        help="Seconds between two snapshots of the degree counters and top urls of the crawl graph, "
+        "which are also saved after every depth and drawn by --plot-stats. (Default: 60)",
+    )
+    crawler_group.add_argument(
+        "--near-dup-tag",
+        dest="Near dup tag",
+        action="store_true",
+        help="With --near-dup, crawl and extract near duplicate pages and only tag them in the log instead of "
+        "skipping them",
+    )
+
+    crawler_group.add_argument(
+        "--pipeline",
+        dest="Pipeline",
+        action="store_true",
+        help="With -c and -e, extract every page as soon as it is crawled instead of after the crawl",
+    )
+
     # Visualize
     visualize_group = parser.add_argument_group("Visualize Options", "Arguments for the Visualize module")
     visualize_group.add_argument(
@@ -148,6 +209,116 @@ def main(gooey_available, baseParser):
         action="store_true",
         help="Visualize the graphs and insights from the crawled data",
     )
+    visualize_group.add_argument(
+        "--hosts",
+        dest="Hosts",
+        action="store_true",
+        help="With -s, visualize the host graph, weighted by the number of page links between hosts, instead of the page graph",
+    )
+    visualize_group.add_argument(
+        "--export",
+        metavar="Format",
+        type=str,
+        choices=FORMATS,
+        default=None,
+        help="With -s, export the graph with its layout and metrics as graphml or parquet files "
+        "and draw an overview image of the whole graph. (Default: None)",
+    )
+    visualize_group.add_argument(
+        "--export-sample",
+        metavar="Nodes",
+        type=int,
+        default=None,
+        help="With --export, only export the nodes of highest PageRank. (Default: every node)",
+    )
+    visualize_group.add_argument(
+        "--structure",
+        dest="Structure",
+        action="store_true",
+        help="With -s, write the strongly/weakly connected components, bow-tie and seed reachability report "
+        "of the graph",
+    )
+    visualize_group.add_argument(
+        "--communities",
+        dest="Communities",
+        action="store_true",
+        help="With -s, write the link structure community of every url and of its host to communities.csv, "
+        "to join with the text clusters of clusterized.csv",
+    )
+    visualize_group.add_argument(
+        "--plot-stats",
+        metavar="Crawl folder",
+        type=str,
+        default=None,
+        help="Draw the degree plots of the last graph stats snapshot of a crawl output folder, e.g. of a crawl "
+        "still running, and log its urls of largest in and out degree",
+    )
+
+    # Classify
+    classify_group = parser.add_argument_group("Classify Options", "Arguments for the Classifier module")
+    classify_group.add_argument(
+        "-k",
+        "--classify",
+        metavar="Corpus",
+        type=str,
+        default=None,
+        help="Cluster and label documents of an extracted folder/archive or a CSV/Parquet corpus "
+        "with url and scrape_data columns. The urls of an extracted folder are read from its urls.csv index "
+        "(Default output on /clusterized.csv, on /predicted.csv when labelled with the saved models)",
+    )
+    classify_group.add_argument(
+        "--chunk-size",
+        metavar="Chunk size",
+        type=int,
+        default=10000,
+        help="Number of documents the classifier reads at a time. (Default: 10000)",
+    )
+    classify_group.add_argument(
+        "--jobs",
+        metavar="Jobs",
+        type=int,
+        default=None,
+        help="Number of processes preprocessing and assigning the documents, and of UMAP and HDBSCAN threads. "
+        "UMAP is only reproducible with 1 job. (Default: number of cpus)",
+    )
+    classify_group.add_argument(
+        "--reducer",
+        metavar="Reducer",
+        type=str,
+        choices=["autoencoder", "svd"],
+        default="autoencoder",
+        help="Dimensionality reduction of the documents: autoencoder (needs keras) or svd (cpu only). "
+        "(Default: autoencoder)",
+    )
+    classify_group.add_argument(
+        "--sample-size",
+        metavar="Sample size",
+        type=int,
+        default=None,
+        help="Fit UMAP and HDBSCAN on a sample of this many documents stratified by host and assign the others "
+        "to the clusters. (Default: every document)",
+    )
+    classify_group.add_argument(
+        "--model-dir",
+        metavar="Model dir",
+        type=str,
+        default=None,
+        help="Dir path of the fitted classifier models, reused to label new documents. (Default: <output>/model)",
+    )
+    classify_group.add_argument(
+        "--refit",
+        action="store_true",
+        help="Fit the classifier models again on the corpus and overwrite the saved ones, even if they were "
+        "saved with another --reducer",
+    )
+    classify_group.add_argument(
+        "--feature-cache",
+        metavar="Cache dir",
+        type=str,
+        default=None,
+        help="Dir path of the preprocessed tokens and word counts cache, so that reruns only process new or "
+        "changed documents. (Default: disabled)",
+    )
 
     # General
     general_group = parser.add_argument_group("General Options", "Configuration options for the crawler")
@@ -224,14 +395,32 @@ def main(gooey_available, baseParser):
     args = parser.parse_args()
 
     print(args.pause)
-    if args.url is None and args.input is None:
-        parser.error("either argument -u/--url or -i/--input is required to proceed.")
+    if args.url is None and args.input is None and args.classify is None and args.plot_stats is None:
+        parser.error("either argument -u/--url, -i/--input, -k/--classify or --plot-stats is required to proceed.")
+
+    if args.chunk_size < 1:
+        parser.error("argument --chunk-size: expected argument greater than 1.")
+
+    if args.sample_size is not None and args.sample_size < 1:
+        parser.error("argument --sample-size: expected argument greater than 1.")
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("argument --jobs: expected argument greater than 1.")
 
     if args.port < 1 or 65535 < args.port:
         parser.error("argument -n/--port: expected argument in between 1 to 65535.")
 
-    if args.yara and args.yara not in [0, 1]:
-        parser.error("argument -y/--yara: expected argument 0 or 1.")
+    if args.yara and args.yara not in [0, 1, 2]:
+        parser.error("argument -y/--yara: expected argument 0, 1 or 2.")
+
+    if args.near_dup is not None and not 0 <= args.near_dup < 64:
+        parser.error("argument --near-dup: expected argument in between 0 to 63.")
+
+    if args.Pipeline and not (args.Crawl and args.Extract):
+        parser.error("argument --pipeline: expected arguments -c/--crawl and -e/--extract to be set.")
+
+    if args.rules and args.yara is None:
+        parser.error("argument --rules: expected argument -y/--yara to be set.")
 
     if args.depth < 1:
         parser.error("argument -d/--depth: expected argument greater than 1.")
@@ -263,6 +452,53 @@ def main(gooey_available, baseParser):
         filelog=getattr(args, "Log files"),
         argv=sys.argv,
     )
+    # Time and memory of every stage, written to the run report
+    profiler = Profiler()
+    profile_file = os.path.join(out_path, "profile.json")
+
+    if args.plot_stats:
+        with profiler.stage("plot stats"):
+            paths = plot_stats(args.plot_stats, args.plot_stats)
+        crawlog.info("Graph stats plots created :: %s", ", ".join(paths))
+        summary, _ = GraphStats.load(args.plot_stats)
+        for name, top in summary.get("top", {}).items():
+            for rank, node in enumerate(top, 1):
+                crawlog.info("Top %s %d :: %s (%d)", name, rank, node["url"], node["degree"])
+        crawlog.info("Run report created :: %s", profiler.save(profile_file))
+        return
+
+    if args.classify:
+        # Imported here as the classifier depends on the heavy machine learning packages
+        from modules.classifier import Classifier
+
+        corpus_text = Classifier.text_cache_dir(args.classify)
+        classifier = Classifier(
+            input_path=args.classify,
+            out_path=out_path,
+            logger=crawlog,
+            chunksize=args.chunk_size,
+            n_jobs=args.jobs,
+            model_dir=args.model_dir,
+            reducer=args.reducer,
+            sample_size=args.sample_size,
+            feature_cache=args.feature_cache,
+            profiler=profiler,
+            text_cache=corpus_text if os.path.isdir(corpus_text) else None,
+            boilerplate=args.Boilerplate,
+        )
+        saved = classifier.saved_reducer()
+        if not args.refit and saved not in (None, args.reducer):
+            parser.error(
+                f"argument --reducer: the saved models of {classifier.model_dir} use reducer {saved}, "
+                f"pass --reducer {saved} to label with them or --refit to overwrite them."
+            )
+        if args.refit or saved is None:
+            classifier.classify()
+        else:
+            crawlog.info("Labelling with the saved models :: %s", classifier.model_dir)
+            classifier.predict()
+        crawlog.info("Run report created :: %s", profiler.save(profile_file))
+        return
 
     # Connect to TOR
     if not getattr(args, "Without TOR"):
@@ -272,12 +508,38 @@ def main(gooey_available, baseParser):
     if args.Verbose:
         check_ip(proxies=proxies, url=args.url, logger=crawlog, without_tor=getattr(args, "Without TOR"))
 
+    # Extracted text is cached for rescans and the classifier
+    text_cache = os.path.join(out_path, "text") if args.yara in (1, 2) else None
+
     if canon:
         crawlog.debug("URL fixed :: %s", website)
     if out_path:
         crawlog.debug("Folder created :: %s", out_path)
 
     if args.Crawl and website:
+        extractor = None
+        if args.Extract:
+            input_file = os.path.join(out_path, "links.txt")
+            extractor = Extractor(
+                website=website,
+                proxies=proxies,
+                crawl=args.Crawl,
+                output_file=args.output,
+                input_file=input_file,
+                out_path=out_path,
+                thread=args.thread,
+                yara=args.yara,
+                logger=crawlog,
+                rules=args.rules,
+                boilerplate=args.Boilerplate,
+                text_cache=text_cache,
+                near_dup=args.near_dup,
+                near_dup_skip=not getattr(args, "Near dup tag"),
+                profiler=profiler,
+            )
+            if args.Pipeline:
+                extractor.start_pipeline()
+
         crawler = Crawler(
             website=website,
             proxies=proxies,
@@ -288,6 +550,15 @@ def main(gooey_available, baseParser):
             exclusion=args.exclusion,
             thread=args.thread,
             logger=crawlog,
+            near_dup=args.near_dup,
+            near_dup_skip=not getattr(args, "Near dup tag"),
+            # The pipelined extractor reuses the fingerprints and the extracted text of the crawler
+            fingerprints=extractor.fingerprints if extractor and args.Pipeline else None,
+            text_extractor=extractor.text_extractor if extractor and args.Pipeline else None,
+            on_response=extractor.feed if extractor and args.Pipeline else None,
+            profiler=profiler,
+            stats_interval=args.stats_interval,
+            network_format=args.network_format,
         )
         json_data = crawler.crawl()
         crawlog.info(
@@ -296,32 +567,26 @@ def main(gooey_available, baseParser):
         )
 
         if args.Visualize:
-            obj = Visualization(
-                json_file=os.path.join(out_path, crawler.network_file),
-                out_path=out_path,
-                logger=crawlog,
-            )
-            obj.indegree_plot()
-            obj.indegree_bar()
-            obj.outdegree_plot()
-            obj.outdegree_bar()
-            obj.eigenvector_centrality_bar()
-            obj.pagerank_bar()
-            # obj.visualize()
-
-        if args.Extract:
-            input_file = os.path.join(out_path, "links.txt")
-            extractor = Extractor(
-                website=website,
-                proxies=proxies,
-                crawl=args.Crawl,
-                output_file=args.output,
-                input_file=input_file,
-                out_path=out_path,
-                thread=args.thread,
-                yara=args.yara,
-                logger=crawlog,
-            )
+            with profiler.stage("visualize"):
+                obj = Visualization(
+                    json_file=os.path.join(out_path, crawler.network_file),
+                    out_path=out_path,
+                    logger=crawlog,
+                    hosts=args.Hosts,
+                )
+                obj.plot_all()
+                # obj.visualize()
+                if args.export:
+                    obj.export(args.export, args.export_sample)
+                if args.Structure:
+                    obj.structure()
+                if args.Communities:
+                    obj.communities()
+
+        if extractor and args.Pipeline:
+            # Extract the links of the last depth which were never fetched by the crawler
+            extract = extractor.finish_pipeline()
+        elif extractor:
             extract = extractor.extract()
     elif args.input or website:
         extractor = Extractor(
@@ -334,72 +599,82 @@ def main(gooey_available, baseParser):
             thread=args.thread,
             yara=args.yara,
             logger=crawlog,
+            rules=args.rules,
+            boilerplate=args.Boilerplate,
+            text_cache=text_cache,
+            near_dup=args.near_dup,
+            near_dup_skip=not getattr(args, "Near dup tag"),
+            profiler=profiler,
         )
         extract = extractor.extract()
 
-
-GOOEY_AVAILABLE = False
-PARSER = argparse.ArgumentParser
-
-if not sys.stdout.isatty() or "-g" in sys.argv or "--gui" in sys.argv:
-    # If we are not attached to a terminal or CLI includes -g/--gui, use Gooey
-    try:
-        from gooey import Gooey, GooeyParser
-
-        GOOEY_AVAILABLE = True
-        PARSER = GooeyParser
-        gradient_print(HEADER, start_color=(252, 70, 107), end_color=(63, 94, 251), disable=True)
-
-        main = Gooey(
-            program_name="DarkSpider",
-            image_dir="assets",
-            monospace_display=True,
-            tabbed_groups=False,
-            menu=[
-                {
-                    "name": "File",
-                    "items": [
-                        {
-                            "type": "AboutDialog",
-                            "menuTitle": "About",
-                            "name": "DarkSpider",
-                            "description": "Multithreaded Crawler and Extractor for Dark Web",
-                            "version": "2.1.0",
-                            "copyright": "2023",
-                            "website": "https://proxzima.dev/DarkSpider/",
-                            "developer": "https://github.com/PROxZIMA, https://github.com/knightster0804, https://github.com/r0nl, https://github.com/ytatiya3",
-                            "license": "GNU General Public License v3.0",
-                        },
-                        {
-                            "type": "MessageDialog",
-                            "menuTitle": "Information",
-                            "caption": "Basic Idea about crawlers",
-                            "message": "Crawling is not illegal, but violating copyright is. It's always best to double check a website's T&C before crawling them. Some websites set up what's called robots.txt to tell crawlers not to visit those pages. This crawler will allow you to go around this, but we always recommend respecting robots.txt.\n\nExtracting and crawling through TOR network take some time. That's normal behaviour; you can find more information here (https://support.torproject.org/relay-operators/why-is-my-relay-slow/).",
-                        },
-                    ],
-                },
-                {
-                    "name": "Help",
-                    "items": [{"type": "Link", "menuTitle": "Documentation", "url": "https://proxzima.dev/DarkSpider"}],
-                },
-            ],
-        )(main)
-    except ModuleNotFoundError:
-        print(f"[ {Colors.RED}ERROR{Colors.RESET} ] Gooey is not available!")
-        print(
-            f"[ {Colors.BLUE}INFO {Colors.RESET} ] Install Gooey with 'pip install Gooey' or remove '-g/--gui' argument"
-        )
-        sys.exit(2)
-else:
-    os.system("cls" if os.name == "nt" else "clear")
-
-    gradient_print(
-        HEADER,
-        start_color=(252, 70, 107),
-        end_color=(63, 94, 251),
-    )
+    crawlog.info("Run report created :: %s", profiler.save(profile_file))
 
 
-# Stub to call main method.
+# Only when run as a script, so that the spawned worker processes which
+# re-import this module as `__mp_main__` don't clear the terminal or start Gooey.
 if __name__ == "__main__":
+    GOOEY_AVAILABLE = False
+    PARSER = argparse.ArgumentParser
+
+    if not sys.stdout.isatty() or "-g" in sys.argv or "--gui" in sys.argv:
+        # If we are not attached to a terminal or CLI includes -g/--gui, use Gooey
+        try:
+            from gooey import Gooey, GooeyParser
+
+            GOOEY_AVAILABLE = True
+            PARSER = GooeyParser
+            gradient_print(HEADER, start_color=(252, 70, 107), end_color=(63, 94, 251), disable=True)
+
+            main = Gooey(
+                program_name="DarkSpider",
+                image_dir="assets",
+                monospace_display=True,
+                tabbed_groups=False,
+                menu=[
+                    {
+                        "name": "File",
+                        "items": [
+                            {
+                                "type": "AboutDialog",
+                                "menuTitle": "About",
+                                "name": "DarkSpider",
+                                "description": "Multithreaded Crawler and Extractor for Dark Web",
+                                "version": "2.1.0",
+                                "copyright": "2023",
+                                "website": "https://proxzima.dev/DarkSpider/",
+                                "developer": "https://github.com/PROxZIMA, https://github.com/knightster0804, https://github.com/r0nl, https://github.com/ytatiya3",
+                                "license": "GNU General Public License v3.0",
+                            },
+                            {
+                                "type": "MessageDialog",
+                                "menuTitle": "Information",
+                                "caption": "Basic Idea about crawlers",
+                                "message": "Crawling is not illegal, but violating copyright is. It's always best to double check a website's T&C before crawling them. Some websites set up what's called robots.txt to tell crawlers not to visit those pages. This crawler will allow you to go around this, but we always recommend respecting robots.txt.\n\nExtracting and crawling through TOR network take some time. That's normal behaviour; you can find more information here (https://support.torproject.org/relay-operators/why-is-my-relay-slow/).",
+                            },
+                        ],
+                    },
+                    {
+                        "name": "Help",
+                        "items": [
+                            {"type": "Link", "menuTitle": "Documentation", "url": "https://proxzima.dev/DarkSpider"}
+                        ],
+                    },
+                ],
+            )(main)
+        except ModuleNotFoundError:
+            print(f"[ {Colors.RED}ERROR{Colors.RESET} ] Gooey is not available!")
+            print(
+                f"[ {Colors.BLUE}INFO {Colors.RESET} ] Install Gooey with 'pip install Gooey' or remove '-g/--gui' argument"
+            )
+            sys.exit(2)
+    else:
+        os.system("cls" if os.name == "nt" else "clear")
+
+        gradient_print(
+            HEADER,
+            start_color=(252, 70, 107),
+            end_color=(63, 94, 251),
+        )
+
     main(gooey_available=GOOEY_AVAILABLE, baseParser=PARSER)
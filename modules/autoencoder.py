@@ -0,0 +1,148 @@
+from typing import List
+
+import numpy as np
+from keras.callbacks import EarlyStopping
+from keras.layers import Dense, Input
+from keras.models import Model, load_model
+from keras.utils import Sequence
+from scipy import sparse
+
+
+def get_autoencoder(dims: List[int], act: str = "relu") -> Model:
+    """Stacked dense autoencoder.
+
+    Args:
+        dims: Width of the input followed by the width of each encoder layer.
+        act: Activation of the hidden layers.
+
+    Returns:
+        Autoencoder model whose bottleneck layer is `encoder_{len(dims) - 2}`.
+    """
+    n_stacks = len(dims) - 1
+    x = Input(shape=(dims[0],), name="input")
+
+    h = x
+    for i in range(n_stacks - 1):
+        h = Dense(dims[i + 1], activation=act, name="encoder_%d" % i)(h)
+
+    h = Dense(dims[-1], name="encoder_%d" % (n_stacks - 1))(h)
+    for i in range(n_stacks - 1, 0, -1):
+        h = Dense(dims[i], activation=act, name="decoder_%d" % i)(h)
+
+    h = Dense(dims[0], name="decoder_0")(h)
+
+    model = Model(inputs=x, outputs=h)
+    model.summary()
+    return model
+
+
+class SparseBatches(Sequence):
+    """Dense mini-batches of the rows of a sparse matrix.
+
+    Only one batch is densified at a time, so the memory used for the input
+    grows with `batch_size`, not with the size of the corpus.
+
+    Attributes:
+        matrix: Sparse documents.
+        batch_size: Number of rows per batch.
+        shuffle: Reshuffle the rows at the end of every epoch if True.
+        target: Yield each batch as both the input and the target, as an autoencoder is trained.
+    """
+
+    def __init__(
+        self,
+        matrix: sparse.csr_matrix,
+        batch_size: int = 64,
+        shuffle: bool = False,
+        target: bool = True,
+        seed: int = 0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.target = target
+
+        self.__random = np.random.default_rng(seed)
+        self.__order = np.arange(self.matrix.shape[0])
+        if shuffle:
+            self.__random.shuffle(self.__order)
+
+    def __len__(self) -> int:
+        return -(-self.matrix.shape[0] // self.batch_size)
+
+    def __getitem__(self, index: int):
+        rows = self.__order[index * self.batch_size : (index + 1) * self.batch_size]
+        batch = self.matrix[rows].toarray()
+        return (batch, batch) if self.target else (batch,)
+
+    def on_epoch_end(self) -> None:
+        if self.shuffle:
+            self.__random.shuffle(self.__order)
+
+
+def fit_encoder(
+    X_scaled: sparse.csr_matrix, encoded_dimensions: int = 10, epochs: int = 20, batch_size: int = 64
+) -> Model:
+    """Trains the autoencoder on the whole corpus.
+
+    Mini-batches are densified on the fly from the sparse matrix. A tenth of
+    the documents is held out to stop the training once the validation loss
+    stops improving.
+
+    Args:
+        X_scaled: Sparse scaled TF-IDF matrix.
+        encoded_dimensions: Width of the bottleneck.
+        epochs: Maximum number of training epochs.
+        batch_size: Number of documents densified per training batch.
+
+    Returns:
+        Encoder part of the trained autoencoder.
+    """
+    shape = [X_scaled.shape[1], 512, 1024, 2048, encoded_dimensions]
+    autoencoder = get_autoencoder(shape)
+
+    encoded_layer = f"encoder_{(len(shape) - 2)}"
+    hidden_encoder_layer = autoencoder.get_layer(name=encoded_layer).output
+    encoder = Model(inputs=autoencoder.input, outputs=hidden_encoder_layer)
+
+    order = np.random.default_rng(0).permutation(X_scaled.shape[0])
+    n_validation = X_scaled.shape[0] // 10
+    train = SparseBatches(X_scaled[order[n_validation:]], batch_size, shuffle=True)
+    validation = SparseBatches(X_scaled[order[:n_validation]], 1024) if n_validation else None
+
+    autoencoder.compile(loss="mse", optimizer="adam")
+    autoencoder.fit(
+        train,
+        validation_data=validation,
+        epochs=epochs,
+        callbacks=[EarlyStopping(monitor="val_loss" if validation else "loss", patience=2, restore_best_weights=True)],
+        verbose=1,
+    )
+    return encoder
+
+
+def encode(encoder: Model, X_scaled: sparse.csr_matrix) -> np.ndarray:
+    """Encodes the documents one densified batch at a time.
+
+    Args:
+        encoder: Trained encoder.
+        X_scaled: Sparse scaled TF-IDF matrix.
+
+    Returns:
+        Encoded documents.
+    """
+    return encoder.predict(SparseBatches(X_scaled, 1024, target=False), verbose=0)
+
+
+def load_encoder(path: str) -> Model:
+    """Loads an encoder saved with `Model.save`.
+
+    Args:
+        path: Path of the `.keras` file.
+
+    Returns:
+        Trained encoder.
+    """
+    return load_model(path, compile=False)
@@ -1,234 +1,910 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import tarfile
 import time
-
-tstart = time.time()
 import warnings
-warnings.filterwarnings('ignore')
-import pandas as pd
-import numpy as np
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from keras.layers import Input, Dense
-from keras.models import Model
-import re
-import contractions
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from logging import Logger
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import umap
-import hdbscan
+warnings.filterwarnings("ignore")
 
-stop_words = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
-
-def preprocess_text(text):
-    # Remove url from the scraped data
-    text = re.sub(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/\w]*', '', text)
-    text = re.sub(r'www\.[^\s]+', '', text)
-    # Removing tags from the scraped data
-    text = re.sub(r'<[^>]*>', '', text)    
-    # Remove non-alphabetic characters and convert to lowercase
-    text = re.sub(r'[^a-zA-Z\s]', '', text.lower())
-    # Expand contractions
-    text = contractions.fix(text)
-    # Remove stop words
-    words = word_tokenize(text)
-    filtered_words = [word for word in words if word not in stop_words]
-    # Perform lemmatization
-    lemmatized_words = [lemmatizer.lemmatize(word) for word in filtered_words]
-    # Remove punctuation
-    lemmatized_words = [word for word in lemmatized_words if word.isalpha()]
-    # Return a long string
-    return ' '.join(lemmatized_words[:100])
-
-def vectorize_unigram(text):
-    # Initialize CountVectorizer and TfidfVectorizer objects
-    count_vectorizer = CountVectorizer()
-    tfidf_vectorizer = TfidfVectorizer()
-    # Create count matrix and TF-IDF matrix
-    count_matrix = count_vectorizer.fit_transform(text)
-    tfidf_matrix = tfidf_vectorizer.fit_transform(text)
-    # Get feature names (unigrams) from CountVectorizer and TfidfVectorizer
-    count_feature_names = count_vectorizer.get_feature_names_out()
-    tfidf_feature_names = tfidf_vectorizer.get_feature_names_out()
-    # Convert count matrix and TF-IDF matrix to DataFrames
-    count_df = pd.DataFrame(count_matrix.toarray(), columns=count_feature_names)
-    tfidf_df = pd.DataFrame(tfidf_matrix.toarray(), columns=tfidf_feature_names)
-    tfidf_df = tfidf_df.round(3) * 1000
-    tfidf_df = tfidf_df.astype(int)
-    # Get top 3 most frequent unigrams from CountVectorizer
-    top3_count = count_df.apply(lambda x: x.nlargest(3).index.tolist(), axis=1)
-    # Create new columns in the TF-IDF DataFrame for the top 3 unigrams from CountVectorizer
-    tfidf_df['Top Unigram 1'] = [t[0] for t in top3_count]
-    tfidf_df['Top Unigram 2'] = [t[1] if len(t) > 1 else '' for t in top3_count]
-    tfidf_df['Top Unigram 3'] = [t[2] if len(t) > 2 else '' for t in top3_count]
-
-    return tfidf_df
-
-def get_autoencoder (dims, act='relu'): 
-    n_stacks = len (dims) - 1 
-    x = Input(shape=(dims[0],), name='input')
-    
-    h = x
-    for i in range(n_stacks - 1):
-        h = Dense(dims[i+1], activation=act, name='encoder_%d' %i)(h)
-        
-    h = Dense(dims [-1], name='encoder_%d' %(n_stacks - 1)) (h) 
-    for i in range(n_stacks-1, 0, -1):
-        h = Dense(dims[i], activation=act, name='decoder_%d' %i) (h)
-    
-    h = Dense(dims[0], name='decoder_0')(h)
-
-    model = Model(inputs=x, outputs=h)
-    model.summary()
-    return model
-
-def learn_manifold(x_data, umap_min_dist=0.00, umap_metric='euclidean', umap_dim=10, umap_neighbors=40):
+import hdbscan
+import joblib
+import numpy as np
+import pandas as pd
+import umap
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+
+from modules.checker import extract_domain, folder
+from modules.features import FeatureCache
+from modules.helper import Profiler
+from modules.preprocess import load_corpora, preprocess_batch
+from modules.text import TextExtractor
+
+# Suffix of the files written by the Extractor and index of their urls
+EXTRACTED_SUFFIX = "_.html"
+EXTRACTED_INDEX = "urls.csv"
+TOP_COLUMNS = ["Top Unigram 1", "Top Unigram 2", "Top Unigram 3"]
+LABEL_COLUMNS = ["label_1", "label_2", "label_3"]
+NOISE_LABEL = "micellaneous"
+# Fitted artefacts saved in the model directory
+MODEL_FILES = {
+    "vectorizer": "vectorizer.joblib",
+    "manifold": "manifold.joblib",
+    "clusterer": "clusterer.joblib",
+    "labels": "labels.json",
+}
+# Saved encoder of each dimensionality reduction backend
+REDUCER_FILES = {"autoencoder": "encoder.keras", "svd": "svd.joblib"}
+REDUCERS = tuple(REDUCER_FILES)
+
+
+def get_manifold(
+    umap_min_dist: float = 0.00,
+    umap_metric: str = "euclidean",
+    umap_dim: int = 10,
+    umap_neighbors: int = 40,
+    n_jobs: int = 1,
+) -> umap.UMAP:
+    """UMAP model, fitted later on the encoded documents.
+
+    UMAP is only reproducible on a single thread, so the model is seeded
+    for `n_jobs=1` and runs unseeded on `n_jobs` threads otherwise.
+
+    Args:
+        umap_min_dist: Minimum distance of the embedded points.
+        umap_metric: Distance metric.
+        umap_dim: Dimensions of the embedding.
+        umap_neighbors: Size of the local neighborhood.
+        n_jobs: Number of threads.
+
+    Returns:
+        Unfitted UMAP model.
+    """
     md = float(umap_min_dist)
-    return umap.UMAP(random_state=0,
-                 metric = umap_metric,
-                 n_components = umap_dim, 
-                 n_neighbors = umap_neighbors, 
-                 min_dist = md).fit_transform(x_data)
-
-
-def vectorize_unigram_text(text):
-    count_vectorizer = CountVectorizer()
-    count_matrix = count_vectorizer.fit_transform([text])
-
-    count_feature_names = count_vectorizer.get_feature_names_out()
-    count_df = pd.DataFrame(count_matrix.toarray(), columns=count_feature_names)
-
-    top3_count = count_df.apply(lambda x: x.nlargest(3).index.tolist(), axis=1)
-    count_df['Top Unigram 1'] = [t[0] for t in top3_count]
-    count_df['Top Unigram 2'] = [t[1] if len(t) > 1 else '' for t in top3_count]
-    count_df['Top Unigram 3'] = [t[2] if len(t) > 2 else '' for t in top3_count]
-    count_df.drop(columns=count_feature_names, inplace=True)
-
-    return count_df['Top Unigram 1'], count_df['Top Unigram 2'], count_df['Top Unigram 3']
-
-
-
-# Process whole documents
-start = time.time()
-data_read = pd.read_csv("dataset_3.csv") # --TODO: Add path to your dataset here
-data_read.rename(columns={'url': 'URL'}, inplace=True)
-end = time.time()
-print("Data loaded", end - start)
-
-start = time.time()
-data_read.dropna(inplace=True, axis=0)
-data_read.drop_duplicates(inplace=True)
-data_read.reset_index(drop=True, inplace=True)
-end = time.time()
-print("Data cleaned", end - start)
-
-start = time.time()
-data_read['preprocessed'] = data_read['scrape_data'].apply(preprocess_text)
-end = time.time()
-print("Data preprocessed", end - start)
-
-start = time.time()
-data_vect = vectorize_unigram(data_read['preprocessed'])
-data_vect.insert(0, 'URL', data_read['URL'])
-# data2.to_csv('vectorized.csv', index=False)
-end = time.time()
-print("Data vectorized", end - start)
-
-## Clusterizing
-
-# autoencoding
-start = time.time()
-X = data_vect.copy()
-X_scaled = X.iloc[:,1:-3]
-X_scaled = X_scaled.values
-end = time.time()
-print('Data ready for encoding', end - start)
-
-start = time.time()
-encoded_dimensions = 10
-shape = [len(X_scaled[0]), 512,1024, 2048, encoded_dimensions]
-autoencoder = get_autoencoder(shape) 
-
-encoded_layer = f'encoder_{(len(shape) - 2)}'
-hidden_encoder_layer = autoencoder.get_layer(name=encoded_layer).output
-encoder = Model(inputs=autoencoder.input, outputs=hidden_encoder_layer)
-
-autoencoder.compile(loss='mse', optimizer='adam')
-end = time.time()
-print('Encoder ready for training', end - start)
-
-start = time.time()
-if X_scaled.shape[0] > 5000:
-    autoencoder.fit(
-        X_scaled[:5000].astype('float32'),
-        X_scaled[:5000],
-        batch_size=64,
-        epochs=5,
-        verbose=1,
-    )
-else:
-    autoencoder.fit(
-        X_scaled.astype('float32'),
-        X_scaled,
-        batch_size=64,
-        epochs=5,
-        verbose=1,
+    return umap.UMAP(
+        random_state=0 if n_jobs == 1 else None,
+        n_jobs=n_jobs,
+        metric=umap_metric,
+        n_components=umap_dim,
+        n_neighbors=umap_neighbors,
+        min_dist=md,
     )
 
-batch_size = 1024
-X_encoded = []
-num_samples = X_scaled.shape[0]
-
-for i in range(0, num_samples, batch_size):
-    batch = X_scaled[i:i+batch_size]
-    encoded_batch = encoder.predict(batch)
-    X_encoded.append(encoded_batch)
-
-X_encoded = np.concatenate(X_encoded, axis=0)
-end = time.time()
-print('Data encoded', end - start)
-
-# Manifold learning
-start = time.time()
-X_reduced = learn_manifold(X_encoded, umap_neighbors=30, umap_dim=int(encoded_dimensions/2))
-end = time.time()
-print('Data ready for clustering', end - start)
-
-# Hierarchical Density Based Spartial Clustering of Applications with Noise 
-start = time.time()
-labels = hdbscan.HDBSCAN(
-    min_samples=100,
-    min_cluster_size=25
-).fit_predict(X_reduced)
-end = time.time()
-print('Data clustered', end - start)
-
-# Labelling
-start = time.time()
-data_clust = pd.DataFrame(columns=['URL', 'Cluster'], data=np.column_stack((X['URL'], labels)))
-
-data_top = data_vect[['URL', 'Top Unigram 1', 'Top Unigram 2', 'Top Unigram 3']]
-data_clust = pd.merge(data_clust, data_top, on='URL', how='left')
-data_clust = pd.merge(data_clust, data_read, on='URL', how='left')
-
-data_clust['label_1'] = 'micellaneous'
-data_clust['label_2'] = 'micellaneous'
-data_clust['label_3'] = 'micellaneous'
-
-for i in data_clust.Cluster.unique():
-    text = ' '.join(data_clust[data_clust['Cluster']==i]['preprocessed'].values)
-    
-    if i != -1:
-        a, b, c = vectorize_unigram_text(text)
-        data_clust.loc[data_clust['Cluster']==i, 'label_1'] = a.iloc[0]
-        data_clust.loc[data_clust['Cluster']==i, 'label_2'] = b.iloc[0]
-        data_clust.loc[data_clust['Cluster']==i, 'label_3'] = c.iloc[0]
-
-data_clust.drop(columns=['Cluster','preprocessed'], axis=1, inplace=True)
-data_clust.to_csv('clusterized.csv', index=False)
-end = time.time()
-print('Data labeled', end - start)
-
-tend = time.time()
-print("\n\nTOTAL TIME: ", tend - tstart)
+
+def learn_manifold(
+    x_data: np.ndarray,
+    umap_min_dist: float = 0.00,
+    umap_metric: str = "euclidean",
+    umap_dim: int = 10,
+    umap_neighbors: int = 40,
+) -> np.ndarray:
+    """Reduces the encoded documents with UMAP.
+
+    Args:
+        x_data: Encoded documents.
+        umap_min_dist: Minimum distance of the embedded points.
+        umap_metric: Distance metric.
+        umap_dim: Dimensions of the embedding.
+        umap_neighbors: Size of the local neighborhood.
+
+    Returns:
+        Embedded documents.
+    """
+    return get_manifold(umap_min_dist, umap_metric, umap_dim, umap_neighbors).fit_transform(x_data)
+
+
+def top_k(matrix: sparse.csr_matrix, names: np.ndarray, k: int = 3) -> np.ndarray:
+    """Names of the `k` largest entries of each row of a sparse matrix.
+
+    The stored entries of all rows are sorted at once, ties keep the column order.
+
+    Args:
+        matrix: Sparse matrix, e.g. word counts of each document.
+        names: Name of each column.
+        k: Number of names per row.
+
+    Returns:
+        Array of shape (rows, k), padded with empty strings for rows with less than `k` entries.
+    """
+    matrix = sparse.csr_matrix(matrix)
+    matrix.eliminate_zeros()
+    lengths = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(matrix.shape[0]), lengths)
+
+    order = np.lexsort((matrix.indices, -matrix.data, rows))
+    rank = np.arange(order.size) - np.repeat(matrix.indptr[:-1], lengths)
+    keep = rank < k
+
+    top = np.full((matrix.shape[0], k), "", dtype=object)
+    top[rows[keep], rank[keep]] = np.asarray(names, dtype=object)[matrix.indices[order[keep]]]
+    return top
+
+
+def cluster_top_k(counts: sparse.csr_matrix, labels: np.ndarray, names: np.ndarray, k: int = 3) -> Dict[int, List[str]]:
+    """Names of the `k` most frequent terms of each cluster.
+
+    The counts of the documents are summed per cluster with a single product
+    by the sparse cluster indicator matrix.
+
+    Args:
+        counts: Term counts of each document.
+        labels: Cluster label of each document, -1 for noise.
+        names: Name of each term.
+        k: Number of names per cluster.
+
+    Returns:
+        Names of each cluster, noise excluded.
+    """
+    labels = np.asarray(labels)
+    documents = np.flatnonzero(labels != -1)
+    clusters, rows = np.unique(labels[documents], return_inverse=True)
+    indicator = sparse.csr_matrix(
+        (np.ones(documents.size, dtype=counts.dtype), (rows, documents)), shape=(clusters.size, labels.size)
+    )
+    top = top_k(indicator @ counts, names, k)
+    return {int(cluster): list(terms) for cluster, terms in zip(clusters, top)}
+
+
+def stratified_sample(groups: np.ndarray, size: int, seed: int = 0) -> np.ndarray:
+    """Random sample keeping the share of every group, each group getting at least one item while possible.
+
+    Args:
+        groups: Group of each item, e.g. the host of each document.
+        size: Number of items to sample.
+        seed: Seed of the random generator.
+
+    Returns:
+        Sorted indexes of about `size` sampled items.
+    """
+    _, codes, counts = np.unique(np.asarray(groups), return_inverse=True, return_counts=True)
+    random = np.random.default_rng(seed)
+    exact = counts * size / codes.size
+    quota = np.floor(exact).astype(np.int64)
+    if counts.size <= size:
+        quota = np.maximum(quota, 1)
+
+    # Largest remainders get the items left
+    left = size - quota.sum()
+    if left > 0:
+        remainder = np.where(quota < counts, exact - np.floor(exact), -1)
+        quota[np.lexsort((random.random(counts.size), -remainder))[:left]] += 1
+    quota = np.minimum(quota, counts)
+
+    # Shuffle the items of every group, then keep the first `quota` of each
+    keys = random.random(codes.size)
+    order = np.lexsort((keys, codes))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(order.size) - starts[codes[order]]
+    return np.sort(order[rank < quota[codes[order]]])
+
+
+_ASSIGN_MODELS: Optional[Tuple[umap.UMAP, hdbscan.HDBSCAN]] = None
+
+
+def set_assign_models(manifold: umap.UMAP, clusterer: hdbscan.HDBSCAN) -> None:
+    """Keeps the fitted models of an assignment process.
+
+    Args:
+        manifold: Fitted UMAP.
+        clusterer: Fitted HDBSCAN with prediction data.
+    """
+    global _ASSIGN_MODELS
+    _ASSIGN_MODELS = manifold, clusterer
+
+
+def assign_batch(X_encoded: np.ndarray, models: Optional[Tuple[umap.UMAP, hdbscan.HDBSCAN]] = None) -> np.ndarray:
+    """Embeds a batch of documents and assigns them to the fitted clusters.
+
+    Args:
+        X_encoded: Encoded documents.
+        models: Fitted UMAP and HDBSCAN, the ones set by `set_assign_models` if None.
+
+    Returns:
+        Cluster label of each document, -1 for noise.
+    """
+    manifold, clusterer = models or _ASSIGN_MODELS
+    return hdbscan.approximate_predict(clusterer, manifold.transform(X_encoded))[0]
+
+
+class Classifier:
+    """Clusters the scraped documents by their text and labels each cluster with its most frequent unigrams.
+
+    The corpus is streamed in chunks and only the preprocessed text (first
+    100 useful words) of every document is kept in memory. The fitted models
+    are saved in `model_dir`, so that new documents are labelled by `predict`
+    without refitting. With a `feature_cache`, reruns only preprocess and
+    count the words of new or changed documents.
+
+    Attributes:
+        input_path: Extractor output folder/archive or a CSV/Parquet corpus with `url` and `scrape_data` columns.
+        out_path: Dir path for output files.
+        logger: A logger object to log the output.
+        chunksize: Number of documents read at a time.
+        text_cache: Dir path of the Extractor's text cache, used for folder/archive input.
+        boilerplate: Remove navigation, header, footer and other page chrome from the text, as the
+            Extractor did for `text_cache` to be hit.
+        model_dir: Dir path of the fitted models, `out_path/model` if None.
+        reducer: Dimensionality reduction backend of the TF-IDF, `autoencoder` (needs keras) or `svd`.
+        encoded_dimensions: Width of the autoencoder bottleneck.
+        svd_components: Number of components of the truncated SVD.
+        epochs: Maximum number of training epochs of the autoencoder, stopped early once the validation loss stalls.
+        fit_batch_size: Number of documents densified per training batch.
+        sample_size: Fit UMAP and HDBSCAN on a sample of this many documents, stratified by host, and
+            assign the others to the clusters. Every document is used for the fit if None.
+        n_jobs: Number of preprocessing and assignment processes, and of UMAP and HDBSCAN threads, all the cpus
+            if None. UMAP is only seeded, and reproducible, with a single job.
+        batch_size: Number of documents preprocessed by a process at a time.
+        assign_batch_size: Number of documents assigned by a process at a time.
+        feature_cache: Dir path of the preprocessed tokens and word counts cache, keyed by text hash. Disabled if None.
+        profiler: Records the time and memory of each stage, a new one if None.
+    """
+
+    output_file = "clusterized.csv"
+    # Labels of the documents of later runs, so that they don't overwrite those of the fitted corpus
+    predict_file = "predicted.csv"
+    cache_report_file = "feature_cache_report.json"
+
+    def __init__(
+        self,
+        input_path: str,
+        out_path: str,
+        logger: Logger,
+        chunksize: int = 10000,
+        text_cache: Optional[str] = None,
+        boilerplate: bool = False,
+        model_dir: Optional[str] = None,
+        reducer: str = "autoencoder",
+        encoded_dimensions: int = 10,
+        svd_components: int = 100,
+        epochs: int = 20,
+        fit_batch_size: int = 64,
+        sample_size: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        batch_size: int = 500,
+        assign_batch_size: int = 10000,
+        feature_cache: Optional[str] = None,
+        profiler: Optional[Profiler] = None,
+    ):
+        self.input_path = input_path
+        self.out_path = folder(out_path)
+        self.logger = logger
+        self.chunksize = chunksize
+        self.model_dir = model_dir or os.path.join(self.out_path, "model")
+        if reducer not in REDUCERS:
+            raise ValueError(f"reducer must be one of {', '.join(REDUCERS)}")
+        self.reducer = reducer
+        self.encoded_dimensions = encoded_dimensions
+        self.svd_components = svd_components
+        self.epochs = epochs
+        self.fit_batch_size = fit_batch_size
+        self.sample_size = sample_size
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.assign_batch_size = assign_batch_size
+        self.feature_cache = FeatureCache(feature_cache) if feature_cache else None
+        self.profiler = profiler or Profiler(name="classifier")
+
+        self.text_extractor = TextExtractor(boilerplate=boilerplate, cache_dir=text_cache)
+        self.__pool: Optional[ProcessPoolExecutor] = None
+        self.__cache_stats = {"hits": 0, "misses": 0, "seconds": 0.0}
+
+        # Fitted models
+        self.vectorizer: Optional[CountVectorizer] = None
+        self.transformer: Optional[TfidfTransformer] = None
+        # Keras encoder or TruncatedSVD depending on the reducer
+        self.encoder = None
+        self.manifold: Optional[umap.UMAP] = None
+        self.clusterer: Optional[hdbscan.HDBSCAN] = None
+        self.cluster_labels: Dict[int, List[str]] = {}
+
+    def classify(self) -> pd.DataFrame:
+        """Fits every stage, saves the models and writes the labelled documents to `out_path/clusterized.csv`.
+
+        Returns:
+            Cluster labels of each document.
+
+            URL | Top Unigram 1 | Top Unigram 2 | Top Unigram 3 | label_1 | label_2 | label_3
+        """
+        data_clust = self.__run(fit=True)
+        self.logger.info("Models saved :: %s", self.save_models())
+        return data_clust
+
+    def predict(self) -> pd.DataFrame:
+        """Labels the documents with the saved models and writes them to `out_path/predicted.csv`.
+
+        Returns:
+            Cluster labels of each document.
+
+            URL | Top Unigram 1 | Top Unigram 2 | Top Unigram 3 | label_1 | label_2 | label_3
+        """
+        self.load_models()
+        return self.__run(fit=False)
+
+    def __run(self, fit: bool) -> pd.DataFrame:
+        with self.profiler.stage("classifier") as run:
+            seen = set()
+            columns = ["URL", "preprocessed" if self.feature_cache is None else "row"]
+            with self.profiler.stage("preprocess") as stage:
+                try:
+                    chunks = [self.preprocess(self.clean(chunk, seen))[columns] for chunk in self.load()]
+                finally:
+                    self.close()
+                data_read = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+                stage.items = run.items = len(data_read)
+            self.logger.info("Data preprocessed :: %d document(s) in %.2fs", stage.items, stage.wall)
+            if self.feature_cache is not None:
+                self.feature_cache.flush()
+                self.logger.info("Feature cache report :: %s", self.cache_report())
+
+            with self.profiler.stage("vectorize", items=len(data_read)) as stage:
+                if self.feature_cache is None:
+                    X_counts, X_scaled, data_vect = self.vectorize(data_read["preprocessed"], fit=fit)
+                else:
+                    X_counts = self.count_cached(data_read["row"].to_numpy(dtype=np.int64), fit=fit)
+                    X_scaled, data_vect = self.weigh(X_counts, fit=fit)
+                data_vect.insert(0, "URL", data_read["URL"])
+            self.logger.info("Data vectorized :: %d unigram(s) in %.2fs", X_scaled.shape[1], stage.wall)
+
+            with self.profiler.stage("encode", items=len(data_read)) as stage:
+                X_encoded = self.encode(X_scaled, fit=fit)
+            self.logger.info("Data encoded :: %.2fs", stage.wall)
+
+            if fit:
+                sample = self.sample(data_read["URL"])
+                X_sample = X_encoded if sample is None else X_encoded[sample]
+
+                with self.profiler.stage("reduce", items=len(X_sample)) as stage:
+                    X_reduced = self.reduce(X_sample)
+                self.logger.info("Data ready for clustering :: %d document(s) in %.2fs", stage.items, stage.wall)
+
+                with self.profiler.stage("cluster", items=len(X_sample)) as stage:
+                    labels = self.cluster(X_reduced)
+                self.logger.info("Data clustered :: %d cluster(s) in %.2fs", len(set(labels) - {-1}), stage.wall)
+
+                if sample is not None:
+                    with self.profiler.stage("assign", items=len(X_encoded) - len(sample)) as stage:
+                        rest = np.ones(len(X_encoded), dtype=bool)
+                        rest[sample] = False
+                        labels, sample_labels = np.empty(len(X_encoded), dtype=labels.dtype), labels
+                        labels[sample] = sample_labels
+                        labels[rest] = self.assign(X_encoded[rest])
+                    self.logger.info("Data assigned :: %d document(s) in %.2fs", stage.items, stage.wall)
+            else:
+                with self.profiler.stage("assign", items=len(X_encoded)) as stage:
+                    labels = self.assign(X_encoded)
+                self.logger.info("Data assigned :: %d document(s) in %.2fs", stage.items, stage.wall)
+
+            with self.profiler.stage("label", items=len(data_read)) as stage:
+                data_clust = self.label(data_vect, X_counts, labels, fit=fit)
+                output_file = self.save(data_clust, self.output_file if fit else self.predict_file)
+            self.logger.info("Data labeled :: %s in %.2fs", output_file, stage.wall)
+
+        self.logger.info("Classifier completed :: %.2fs", run.wall)
+        return data_clust
+
+    def fitted(self) -> bool:
+        """Checks whether the models of `reducer` are saved in `model_dir`.
+
+        Returns:
+            True if every model file exists and the saved encoder is the one of `reducer`.
+        """
+        return self.saved_reducer() == self.reducer
+
+    def saved_reducer(self) -> Optional[str]:
+        """Reducer of the models saved in `model_dir`.
+
+        Returns:
+            Reducer of the saved encoder, the latest one if several were saved, None if the models were never saved.
+        """
+        if not all(os.path.exists(os.path.join(self.model_dir, name)) for name in MODEL_FILES.values()):
+            return None
+        paths = {reducer: os.path.join(self.model_dir, name) for reducer, name in REDUCER_FILES.items()}
+        saved = [reducer for reducer, path in paths.items() if os.path.exists(path)]
+        return max(saved, key=lambda reducer: os.path.getmtime(paths[reducer])) if saved else None
+
+    def save_models(self) -> str:
+        """Saves the fitted models in `model_dir`.
+
+        Returns:
+            Path of the model directory.
+        """
+        path = folder(self.model_dir)
+        joblib.dump(
+            {"vectorizer": self.vectorizer, "transformer": self.transformer},
+            os.path.join(path, MODEL_FILES["vectorizer"]),
+        )
+        if self.reducer == "autoencoder":
+            self.encoder.save(os.path.join(path, REDUCER_FILES["autoencoder"]))
+        else:
+            joblib.dump(self.encoder, os.path.join(path, REDUCER_FILES[self.reducer]))
+        # The encoder of another reducer doesn't match the refitted models
+        for reducer, name in REDUCER_FILES.items():
+            if reducer != self.reducer and os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        joblib.dump(self.manifold, os.path.join(path, MODEL_FILES["manifold"]))
+        joblib.dump(self.clusterer, os.path.join(path, MODEL_FILES["clusterer"]))
+        with open(os.path.join(path, MODEL_FILES["labels"]), "w", encoding="UTF-8") as file:
+            json.dump({str(cluster): labels for cluster, labels in self.cluster_labels.items()}, file, indent=2)
+        return path
+
+    def load_models(self) -> None:
+        """Loads the models saved in `model_dir`.
+
+        Raises:
+            FileNotFoundError: If the models were never saved.
+            ValueError: If the models were saved with another reducer.
+        """
+        saved = self.saved_reducer()
+        if saved is None:
+            raise FileNotFoundError(f"No fitted {self.reducer} models in {self.model_dir}")
+        if saved != self.reducer:
+            raise ValueError(f"The saved models of {self.model_dir} use reducer {saved}, not {self.reducer}")
+
+        path = self.model_dir
+        vectorizer = joblib.load(os.path.join(path, MODEL_FILES["vectorizer"]))
+        self.vectorizer, self.transformer = vectorizer["vectorizer"], vectorizer["transformer"]
+        if self.reducer == "autoencoder":
+            from modules.autoencoder import load_encoder
+
+            self.encoder = load_encoder(os.path.join(path, REDUCER_FILES["autoencoder"]))
+        else:
+            self.encoder = joblib.load(os.path.join(path, REDUCER_FILES[self.reducer]))
+        self.manifold = joblib.load(os.path.join(path, MODEL_FILES["manifold"]))
+        self.clusterer = joblib.load(os.path.join(path, MODEL_FILES["clusterer"]))
+        with open(os.path.join(path, MODEL_FILES["labels"]), "r", encoding="UTF-8") as file:
+            self.cluster_labels = {int(cluster): labels for cluster, labels in json.load(file).items()}
+
+    def load(self) -> Iterator[pd.DataFrame]:
+        """Streams the corpus in chunks.
+
+        Yields:
+            DataFrame of at most `chunksize` documents with `URL` and `scrape_data` columns.
+        """
+        path = self.input_path
+        if os.path.isdir(path):
+            chunks = self.__chunk(self.__read_folder(path))
+        elif zipfile.is_zipfile(path) or tarfile.is_tarfile(path):
+            chunks = self.__chunk(self.__read_archive(path))
+        elif path.lower().endswith((".parquet", ".pq")):
+            chunks = self.__read_parquet(path)
+        else:
+            chunks = pd.read_csv(path, chunksize=self.chunksize)
+
+        for chunk in chunks:
+            yield chunk.rename(columns={"url": "URL"})
+
+    def __read_parquet(self, path: str) -> Iterator[pd.DataFrame]:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunksize):
+            yield batch.to_pandas()
+
+    def __chunk(self, documents: Iterator[Tuple[str, str]]) -> Iterator[pd.DataFrame]:
+        rows = []
+        for document in documents:
+            rows.append(document)
+            if len(rows) == self.chunksize:
+                yield pd.DataFrame(rows, columns=["URL", "scrape_data"])
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=["URL", "scrape_data"])
+
+    @staticmethod
+    def text_cache_dir(input_path: str) -> str:
+        """Dir path of the text cache written by the Extractor next to an extracted folder/archive.
+
+        Args:
+            input_path: Extracted folder/archive, e.g. `output/a.com/extracted/`.
+
+        Returns:
+            Text cache dir path, e.g. `output/a.com/text`.
+        """
+        return os.path.join(os.path.dirname(os.path.abspath(input_path.rstrip("/" + os.sep))), "text")
+
+    @staticmethod
+    def extracted_url(name: str) -> str:
+        """Url of a file written by the Extractor, for the folders without index.
+        The scheme and the query strings can't be recovered.
+
+        Args:
+            name: Path relative to the extracted folder, e.g. `a.com/b/c.html_.html`.
+
+        Returns:
+            Url of the page, e.g. `http://a.com/b/c.html`.
+        """
+        name = name.replace(os.sep, "/")[: -len(EXTRACTED_SUFFIX)]
+        return f"http://{name.rstrip('/')}"
+
+    @staticmethod
+    def read_index(lines: Iterator[str]) -> Dict[str, str]:
+        """Original url of each file of the Extractor's index, the last one when a file was rewritten.
+
+        Args:
+            lines: Lines of the `urls.csv` index.
+
+        Returns:
+            Url of each file path relative to the extracted folder.
+        """
+        return {row["File"]: row["URL"] for row in csv.DictReader(lines)}
+
+    def __read_folder(self, path: str) -> Iterator[Tuple[str, str]]:
+        index = {}
+        if os.path.isfile(os.path.join(path, EXTRACTED_INDEX)):
+            with open(os.path.join(path, EXTRACTED_INDEX), "r", encoding="UTF-8", newline="") as file:
+                index = self.read_index(file)
+        for root, _, names in os.walk(path):
+            for name in sorted(names):
+                if name.endswith(EXTRACTED_SUFFIX):
+                    file = os.path.join(root, name)
+                    with open(file, "rb") as f:
+                        content = f.read()
+                    name = os.path.relpath(file, path).replace(os.sep, "/")
+                    yield index.get(name) or self.extracted_url(name), self.text_extractor.text(content)
+
+    def __read_archive(self, path: str) -> Iterator[Tuple[str, str]]:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                names = archive.namelist()
+                index = self.__archive_index(names, archive.read)
+                for name in names:
+                    if name.endswith(EXTRACTED_SUFFIX):
+                        yield self.__archive_document(name, archive.read(name), index)
+        else:
+            with tarfile.open(path) as archive:
+                members = {member.name: member for member in archive.getmembers() if member.isfile()}
+                index = self.__archive_index(members, lambda name: archive.extractfile(members[name]).read())
+                for name, member in members.items():
+                    if name.endswith(EXTRACTED_SUFFIX):
+                        yield self.__archive_document(name, archive.extractfile(member).read(), index)
+
+    @staticmethod
+    def __archive_name(name: str) -> str:
+        # Archives of the extracted folder may keep the folder itself as the first component
+        parts = name.split("/")
+        if len(parts) > 2 and parts[0] in ("extracted", "."):
+            parts = parts[1:]
+        return "/".join(parts)
+
+    def __archive_index(self, names: Iterable[str], read: Callable[[str], bytes]) -> Dict[str, str]:
+        # The index is at the root of the extracted folder
+        for name in names:
+            if name in (EXTRACTED_INDEX, f"extracted/{EXTRACTED_INDEX}", f"./{EXTRACTED_INDEX}"):
+                return self.read_index(io.StringIO(read(name).decode("UTF-8"), newline=""))
+        return {}
+
+    def __archive_document(self, name: str, content: bytes, index: Dict[str, str]) -> Tuple[str, str]:
+        name = self.__archive_name(name)
+        return index.get(name) or self.extracted_url(name), self.text_extractor.text(content)
+
+    def clean(self, chunk: pd.DataFrame, seen: Optional[set] = None) -> pd.DataFrame:
+        """Drops empty and duplicate documents.
+
+        Args:
+            chunk: Documents.
+            seen: Urls of the previous chunks, updated in place.
+
+        Returns:
+            Documents with unique urls.
+        """
+        chunk = chunk.dropna(axis=0).drop_duplicates(subset="URL")
+        if seen is not None:
+            chunk = chunk[~chunk["URL"].isin(seen)]
+            seen.update(chunk["URL"])
+        return chunk.reset_index(drop=True)
+
+    def preprocess(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Adds the `preprocessed` text column, or the `row` column of the feature cache when enabled.
+
+        The chunk is split in batches of `batch_size` documents preprocessed by `n_jobs` processes.
+        The processes are spawned, not forked, as forking once numba or tensorflow started their
+        threads may deadlock. With a feature cache, only the documents whose text is not cached
+        are preprocessed.
+
+        Args:
+            chunk: Documents with a `scrape_data` column.
+
+        Returns:
+            Documents with a `preprocessed` or a `row` column.
+        """
+        chunk = chunk.copy()
+        texts = chunk["scrape_data"].astype(str).tolist()
+        if self.feature_cache is None:
+            chunk["preprocessed"] = self.__preprocess(texts)
+            return chunk
+
+        keys = [self.feature_cache.digest(text) for text in texts]
+        rows = self.feature_cache.lookup(keys)
+        missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            start = time.perf_counter()
+            preprocessed = self.__preprocess([texts[i] for i in missing])
+            seconds = time.perf_counter() - start
+            rows[missing] = self.feature_cache.add([keys[i] for i in missing], preprocessed, seconds)
+            self.__cache_stats["seconds"] += seconds
+        self.__cache_stats["hits"] += len(rows) - len(missing)
+        self.__cache_stats["misses"] += len(missing)
+
+        chunk["row"] = rows
+        return chunk
+
+    def __preprocess(self, texts: List[str]) -> List[str]:
+        batches = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        if self.n_jobs > 1 and len(batches) > 1:
+            if self.__pool is None:
+                self.__pool = ProcessPoolExecutor(
+                    max_workers=self.n_jobs, mp_context=multiprocessing.get_context("spawn"), initializer=load_corpora
+                )
+            results = self.__pool.map(preprocess_batch, batches)
+        else:
+            results = map(preprocess_batch, batches)
+        return list(chain.from_iterable(results))
+
+    def cache_report(self) -> Dict[str, float]:
+        """Work saved by the feature cache since the classifier was created, also written to `cache_report_file`.
+
+        The saved time is estimated from the mean preprocessing time of the cached documents.
+
+        Returns:
+            Number of cache hits and misses, hit ratio, preprocessing time and estimated saved time in seconds.
+        """
+        hits, misses, seconds = self.__cache_stats["hits"], self.__cache_stats["misses"], self.__cache_stats["seconds"]
+        per_document = self.feature_cache.seconds_per_document if self.feature_cache is not None else None
+        report = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "preprocess_seconds": round(seconds, 3),
+            "saved_seconds": round(per_document * hits, 3) if per_document is not None else None,
+            "cached_documents": len(self.feature_cache) if self.feature_cache is not None else 0,
+        }
+        with open(os.path.join(self.out_path, self.cache_report_file), "w", encoding="UTF-8") as file:
+            json.dump(report, file, indent=2)
+        return report
+
+    def close(self) -> None:
+        """Shuts down the preprocessing processes."""
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+
+    def vectorize(self, text: pd.Series, fit: bool = True) -> Tuple[sparse.csr_matrix, sparse.csr_matrix, pd.DataFrame]:
+        """Word counts and TF-IDF of each document along with its top 3 most frequent unigrams.
+
+        The corpus is tokenized once, the TF-IDF is derived from the word counts
+        and both stay sparse.
+
+        Args:
+            text: Preprocessed documents.
+            fit: Fit the vocabulary and the idf if True, reuse the fitted ones otherwise.
+
+        Returns:
+            Sparse word counts, sparse TF-IDF matrix scaled to int and the `Top Unigram 1/2/3` columns.
+        """
+        if fit:
+            self.vectorizer = CountVectorizer(dtype=np.int32)
+            count_matrix = self.vectorizer.fit_transform(text)
+        else:
+            count_matrix = self.vectorizer.transform(text)
+
+        tfidf_matrix, top3 = self.weigh(count_matrix, fit=fit)
+        return count_matrix, tfidf_matrix, top3
+
+    def count_cached(self, rows: np.ndarray, fit: bool = True) -> sparse.csr_matrix:
+        """Word counts of documents read from the feature cache, same as `vectorize` counts.
+
+        Args:
+            rows: Feature cache rows of the documents.
+            fit: Fit the vocabulary on the cached terms of the documents if True, reuse the fitted one otherwise.
+
+        Returns:
+            Sparse word counts with a column per vocabulary term.
+        """
+        counts = self.feature_cache.counts(rows)
+        terms = self.feature_cache.terms
+
+        if fit:
+            # Sorted like a fitted CountVectorizer vocabulary
+            present = np.unique(counts.indices)
+            present = present[np.argsort(terms[present].astype(str), kind="stable")]
+            self.vectorizer = CountVectorizer(dtype=np.int32, vocabulary=terms[present].tolist()).fit([])
+            columns = np.full(len(terms), -1, dtype=np.int64)
+            columns[present] = np.arange(len(present))
+        else:
+            vocabulary = self.vectorizer.vocabulary_
+            columns = np.array([vocabulary.get(term, -1) for term in terms], dtype=np.int64)
+
+        mapped = columns[counts.indices]
+        known = mapped >= 0
+        # Unknown terms are dropped, like CountVectorizer.transform does
+        doc_rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))[known]
+        count_matrix = sparse.csr_matrix(
+            (counts.data[known].astype(np.int32), (doc_rows, mapped[known])),
+            shape=(counts.shape[0], len(self.vectorizer.vocabulary_)),
+        )
+        count_matrix.sort_indices()
+        return count_matrix
+
+    def weigh(self, count_matrix: sparse.csr_matrix, fit: bool = True) -> Tuple[sparse.csr_matrix, pd.DataFrame]:
+        """TF-IDF of the word counts along with the top 3 most frequent unigrams of each document.
+
+        Args:
+            count_matrix: Sparse word counts.
+            fit: Fit the idf if True, reuse the fitted one otherwise.
+
+        Returns:
+            Sparse TF-IDF matrix scaled to int and the `Top Unigram 1/2/3` columns.
+        """
+        if fit:
+            self.transformer = TfidfTransformer().fit(count_matrix)
+
+        tfidf_matrix = self.transformer.transform(count_matrix)
+        tfidf_matrix.data = (np.round(tfidf_matrix.data, 3) * 1000).astype(np.int32)
+        tfidf_matrix = tfidf_matrix.astype(np.float32)
+        tfidf_matrix.eliminate_zeros()
+
+        top3 = top_k(count_matrix, self.vectorizer.get_feature_names_out(), 3)
+        return tfidf_matrix, pd.DataFrame(top3, columns=TOP_COLUMNS)
+
+    def encode(self, X_scaled: sparse.csr_matrix, fit: bool = True) -> np.ndarray:
+        """Reduces the TF-IDF of the documents with the selected backend.
+
+        `autoencoder` trains a stacked dense autoencoder from sparse mini-batches,
+        `svd` runs a randomized truncated SVD on the sparse matrix using the cpu only.
+
+        Args:
+            X_scaled: Sparse scaled TF-IDF matrix.
+            fit: Fit the reducer if True, reuse the fitted one otherwise.
+
+        Returns:
+            Encoded documents.
+        """
+        if self.reducer == "svd":
+            if fit:
+                n_components = max(1, min(self.svd_components, X_scaled.shape[1] - 1))
+                self.encoder = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=0)
+                self.encoder.fit(X_scaled)
+            return self.encoder.transform(X_scaled)
+
+        # Keras is only imported by the autoencoder backend
+        from modules.autoencoder import encode, fit_encoder
+
+        if fit:
+            self.encoder = fit_encoder(X_scaled, self.encoded_dimensions, self.epochs, self.fit_batch_size)
+        return encode(self.encoder, X_scaled)
+
+    def reduce(self, X_encoded: np.ndarray, fit: bool = True) -> np.ndarray:
+        """Manifold learning of the encoded documents.
+
+        Args:
+            X_encoded: Encoded documents.
+            fit: Fit UMAP if True, embed the documents with the fitted UMAP otherwise.
+
+        Returns:
+            Embedded documents ready for clustering.
+        """
+        if fit:
+            self.manifold = get_manifold(
+                umap_neighbors=30, umap_dim=int(self.encoded_dimensions / 2), n_jobs=self.n_jobs
+            )
+            return self.manifold.fit_transform(X_encoded)
+        return self.manifold.transform(X_encoded)
+
+    def cluster(self, X_reduced: np.ndarray, fit: bool = True) -> np.ndarray:
+        """Hierarchical Density Based Spatial Clustering of Applications with Noise.
+
+        Args:
+            X_reduced: Embedded documents.
+            fit: Fit HDBSCAN if True, assign the documents to the fitted clusters otherwise.
+
+        Returns:
+            Cluster label of each document, -1 for noise.
+        """
+        if fit:
+            self.clusterer = hdbscan.HDBSCAN(
+                min_samples=100, min_cluster_size=25, prediction_data=True, core_dist_n_jobs=self.n_jobs
+            )
+            return self.clusterer.fit_predict(X_reduced)
+        return hdbscan.approximate_predict(self.clusterer, X_reduced)[0]
+
+    def sample(self, urls: pd.Series) -> Optional[np.ndarray]:
+        """Documents UMAP and HDBSCAN are fitted on, keeping the share of every host.
+
+        Args:
+            urls: Url of each document.
+
+        Returns:
+            Sorted indexes of the sampled documents or None if every document is used.
+        """
+        if self.sample_size is None or len(urls) <= self.sample_size:
+            return None
+        return stratified_sample(urls.map(extract_domain).values, self.sample_size)
+
+    def assign(self, X_encoded: np.ndarray) -> np.ndarray:
+        """Assigns documents to the fitted clusters in batches of `assign_batch_size` using `n_jobs` processes.
+
+        Args:
+            X_encoded: Encoded documents.
+
+        Returns:
+            Cluster label of each document, -1 for noise.
+        """
+        batches = [X_encoded[i : i + self.assign_batch_size] for i in range(0, len(X_encoded), self.assign_batch_size)]
+        if not batches:
+            return np.empty(0, dtype=np.int64)
+
+        if self.n_jobs > 1 and len(batches) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_jobs, len(batches)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=set_assign_models,
+                initargs=(self.manifold, self.clusterer),
+            ) as pool:
+                results = list(pool.map(assign_batch, batches))
+        else:
+            results = [assign_batch(batch, (self.manifold, self.clusterer)) for batch in batches]
+        return np.concatenate(results)
+
+    def label(
+        self, data_vect: pd.DataFrame, X_counts: sparse.csr_matrix, labels: np.ndarray, fit: bool = True
+    ) -> pd.DataFrame:
+        """Labels each cluster with its top 3 most frequent unigrams.
+
+        Args:
+            data_vect: Vectorized documents with `URL` and `Top Unigram 1/2/3` columns.
+            X_counts: Sparse word counts of the documents, in the same order.
+            labels: Cluster label of each document.
+            fit: Find the labels of each cluster if True, reuse the fitted ones otherwise.
+
+        Returns:
+            URL | Top Unigram 1 | Top Unigram 2 | Top Unigram 3 | label_1 | label_2 | label_3
+        """
+        labels = np.asarray(labels)
+        if fit:
+            names = self.vectorizer.get_feature_names_out()
+            self.cluster_labels = cluster_top_k(X_counts, labels, names, len(LABEL_COLUMNS))
+
+        # Row 0 of the table holds the noise label, the others the labels of the sorted clusters
+        clusters = np.array(sorted(self.cluster_labels), dtype=np.int64)
+        table = np.array(
+            [[NOISE_LABEL] * len(LABEL_COLUMNS)] + [self.cluster_labels[cluster] for cluster in clusters], dtype=object
+        ).reshape(-1, len(LABEL_COLUMNS))
+        position = np.searchsorted(clusters, labels)
+        known = position < clusters.size
+        known[known] = clusters[position[known]] == labels[known]
+
+        data_clust = data_vect[["URL"] + TOP_COLUMNS].copy()
+        data_clust[LABEL_COLUMNS] = pd.DataFrame(
+            table[np.where(known, position + 1, 0)], columns=LABEL_COLUMNS, index=data_clust.index
+        )
+        return data_clust
+
+    def save(self, data_clust: pd.DataFrame, output_file: Optional[str] = None) -> str:
+        """Streams the corpus again and writes each chunk joined with its labels.
+
+        Args:
+            data_clust: Cluster labels of each document.
+            output_file: Filename of the output file in `out_path`, `output_file` if None.
+
+        Returns:
+            Path of the output file.
+        """
+        output_file = os.path.join(self.out_path, output_file or self.output_file)
+        seen = set()
+        header = True
+        with open(output_file, "w", encoding="UTF-8", newline="") as file:
+            for chunk in self.load():
+                chunk = pd.merge(data_clust[["URL"] + TOP_COLUMNS], self.clean(chunk, seen), on="URL", how="inner")
+                chunk = pd.merge(chunk, data_clust[["URL"] + LABEL_COLUMNS], on="URL", how="left")
+                chunk.to_csv(file, index=False, header=header)
+                header = False
+        return output_file
@@ -0,0 +1,154 @@
+import csv
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+
+from modules.checker import extract_domain
+from modules.graph import Convergence, Graph
+
+# Columns of the communities file, `URL` joins it with the text clusters of `clusterized.csv`
+COLUMNS = ["URL", "Host", "Community", "Host Community"]
+# Share of the nodes updated at each iteration, a synchronous update oscillates on bipartite parts of the graph
+UPDATE_RATE = 0.5
+
+
+def undirected(graph: Graph) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Links of the graph in both directions, without self links.
+
+    Args:
+        graph: Graph to symmetrize.
+
+    Returns:
+        Source, target and weight of each undirected link, the weights of reciprocal links are summed.
+    """
+    symmetric = (graph.adjacency + graph.adjacency.T).tocoo()
+    keep = symmetric.row != symmetric.col
+    return symmetric.row[keep], symmetric.col[keep], symmetric.data[keep].astype(np.float64)
+
+
+def row_argmax(votes: sparse.csr_matrix) -> np.ndarray:
+    """Column of the largest value of each row of a sparse matrix without empty rows, in linear time.
+
+    Args:
+        votes: Sparse matrix with at least one stored value per row.
+
+    Returns:
+        Column of the largest value of each row, the first one on ties.
+    """
+    counts = np.diff(votes.indptr)
+    best = np.maximum.reduceat(votes.data, votes.indptr[:-1])
+    positions = np.flatnonzero(votes.data == np.repeat(best, counts))
+    rows = np.repeat(np.arange(votes.shape[0]), counts)[positions]
+    first = np.flatnonzero(np.diff(rows, prepend=-1))
+    return votes.indices[positions[first]]
+
+
+def label_propagation(
+    graph: Graph, max_iter: int = 100, tol: float = 1.0e-4, seed: int = 0
+) -> Tuple[np.ndarray, Convergence]:
+    """Communities of the undirected graph by weighted label propagation.
+
+    Every node starts in its own community and repeatedly joins the
+    community with the largest link weight among its neighbours (Raghavan
+    et al., "Near linear time algorithm to detect community structures").
+    The votes of all the nodes are counted at once by building a sparse
+    (node, community) matrix, so an iteration is linear in the number of
+    links. A random half of the nodes is updated at each iteration, a node
+    keeps its community on ties and the other ties go to the community of
+    largest id, which floods the graph faster than random tie breaks and
+    leaves fewer tiny communities (as in the semi-synchronous variant of
+    Cordasco and Gargano).
+
+    Args:
+        graph: Graph to partition, its weights are counts of links.
+        max_iter: Maximum number of iterations.
+        tol: Convergence tolerance on the share of nodes not in a community of largest weight.
+        seed: Seed of the updated nodes.
+
+    Returns:
+        Community of each node, numbered by decreasing size, and the convergence diagnostics.
+    """
+    n = graph.n_nodes
+    rows, cols, weights = undirected(graph)
+    nodes = np.arange(n)
+    # The weights are integers: the bonus keeps the community on ties and neither it nor the tie break outweighs a link
+    rows, weights = np.concatenate([rows, nodes]), np.concatenate([weights, np.full(n, 0.1)])
+    labels = nodes.copy()
+    rng = np.random.default_rng(seed)
+    errors = []
+    for _ in range(max_iter if n else 0):
+        votes = sparse.csr_matrix((weights, (rows, labels[np.concatenate([cols, nodes])])), shape=(n, n))
+        votes.sum_duplicates()
+        votes.data += votes.indices / n * 0.05
+        best = row_argmax(votes)
+        changed = best != labels
+        errors.append(float(changed.sum() / n))
+        if errors[-1] < tol:
+            break
+        update = changed & (rng.random(n) < UPDATE_RATE)
+        labels[update] = best[update]
+
+    _, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return rank[inverse.ravel()], {
+        "converged": n == 0 or (bool(errors) and errors[-1] < tol),
+        "iterations": len(errors),
+        "error": errors[-1] if errors else 0.0,
+        "tolerance": tol,
+        "errors": errors,
+    }
+
+
+def host(url: str) -> str:
+    """Host of an url, empty if it can't be parsed like in `Graph.from_hosts`."""
+    try:
+        return extract_domain(url)
+    except ValueError:
+        return ""
+
+
+def host_labels(graph: Graph, host_graph: Graph, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Host and host community of each node of a page graph.
+
+    Args:
+        graph: Page graph.
+        host_graph: Host graph of the same network structure.
+        labels: Community of each host.
+
+    Returns:
+        Host and host community of each page, -1 for the pages whose host isn't in the host graph.
+    """
+    hosts = np.array([host(url) for url in graph.urls], dtype=object)
+    unique, inverse = np.unique(hosts, return_inverse=True)
+    by_host = np.full(len(unique), -1, dtype=np.int64)
+    for i, name in enumerate(unique.tolist()):
+        try:
+            by_host[i] = labels[host_graph.index(name)]
+        except KeyError:
+            pass
+    return hosts, by_host[inverse.ravel()]
+
+
+def write_communities(
+    path: str, graph: Graph, labels: np.ndarray, host_graph: Graph, host_communities: np.ndarray
+) -> str:
+    """Streams the page and host community of every url to a CSV file.
+
+    Args:
+        path: Path of the CSV file.
+        graph: Page graph.
+        labels: Community of each page.
+        host_graph: Host graph of the same network structure.
+        host_communities: Community of each host.
+
+    Returns:
+        Path of the CSV file.
+    """
+    hosts, by_host = host_labels(graph, host_graph, host_communities)
+    with open(path, "w", encoding="UTF-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        writer.writerows(zip(graph.urls, hosts.tolist(), labels.tolist(), by_host.tolist()))
+    return path
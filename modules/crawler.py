@@ -5,7 +5,7 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import TextIOBase
 from logging import Logger
-from typing import Dict, List, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urljoin
 
 import requests
@@ -13,7 +13,11 @@ from bs4 import BeautifulSoup
 from requests.models import Response
 
 from modules.checker import url_canon
-from modules.helper import get_requests_header
+from modules.fingerprint import SimHashIndex, simhash
+from modules.helper import Profiler, get_requests_header
+from modules.network import write_binary
+from modules.stats import GraphStats
+from modules.text import TextExtractor, header_charset
 
 
 class Crawler:
@@ -29,9 +33,24 @@ class Crawler:
         exclusion: Paths that you don't want to include.
         thread: Number pages to visit (Threads) at the same time.
         logger: A logger object to log the output.
+        near_dup: Hamming distance of SimHash fingerprints below which pages are near duplicates. Disabled if None.
+        near_dup_skip: Don't follow the links of near duplicate pages if True, they are recorded in the
+            network structure without links, else only tag them in the log.
+        fingerprints: Index of the near duplicate fingerprints shared with the extractor, e.g.
+            `Extractor.fingerprints`. A new one if None and `near_dup` is set.
+        text_extractor: Text extractor of the fingerprinted pages shared with the extractor, so that
+            its cache is reused. A new one if None.
+        on_response: Called with the url, response and near duplicate verdict of every fetched page,
+            e.g. `Extractor.feed`.
+        profiler: Records the time and memory of each depth, a new one if None.
+        stats_interval: Seconds between two snapshots of the graph statistics within a depth,
+            they are also saved at the end of every depth.
+        network_format: `json` to write `network_structure.json`, `binary` to write the memory mappable
+            `network_structure.bin` instead.
     """
 
     network_file = "network_structure.json"
+    binary_file = "network_structure.bin"
     __headers = get_requests_header()
 
     def __init__(
@@ -45,6 +64,14 @@ class Crawler:
         exclusion: str,
         thread: int,
         logger: Logger,
+        near_dup: Optional[int] = None,
+        near_dup_skip: bool = True,
+        fingerprints: Optional[SimHashIndex] = None,
+        text_extractor: Optional[TextExtractor] = None,
+        on_response: Optional[Callable[..., None]] = None,
+        profiler: Optional[Profiler] = None,
+        stats_interval: float = 60.0,
+        network_format: str = "json",
     ):
         self.website = website
         self.proxies = proxies
@@ -55,6 +82,18 @@ class Crawler:
         self.exclusion = rf"{exclusion}" if exclusion else None
         self.thread = thread
         self.logger = logger
+        self.near_dup_skip = near_dup_skip
+        if fingerprints is None and near_dup is not None:
+            fingerprints = SimHashIndex(distance=near_dup)
+        self.fingerprints = fingerprints
+        self.on_response = on_response
+        self.profiler = profiler or Profiler(name="crawler")
+        self.stats_interval = stats_interval
+        self.stats = GraphStats()
+        self.network_format = network_format
+        if network_format == "binary":
+            self.network_file = self.binary_file
+        self.__text_extractor = text_extractor or TextExtractor()
 
         self.__executor = ThreadPoolExecutor(max_workers=min(32, self.thread))
         self.__files = {
@@ -157,6 +196,21 @@ class Crawler:
         except Exception as err:
             return url, url_data, ("Request", err)
 
+        original = None
+        if self.fingerprints is not None and isinstance(html_page, Response):
+            text = self.__text_extractor.text(html_page.content, header_charset(html_page.headers.get("Content-Type")))
+            original = self.fingerprints.check(simhash(text), url)
+
+        if self.on_response is not None and isinstance(html_page, Response):
+            # Hand the page and its verdict over to the extractor, blocks while its queue is full
+            self.on_response(url, html_page, original=original, checked=self.fingerprints is not None)
+
+        if original is not None:
+            self.logger.debug("%s :: Near duplicate of %s", url, original)
+            if self.near_dup_skip:
+                # Don't expand pages with the same content as an already crawled page
+                return url, url_data, response_code
+
         try:
             soup = BeautifulSoup(html_page.text, features="html.parser")
         except Exception as err:
@@ -211,8 +265,10 @@ class Crawler:
 
         # Json dictionary
         json_data = {}
+        last_snapshot = time.monotonic()
         # Depth
         for index in range(0, int(self.depth)):
+            stage = self.profiler.stage(f"depth {index + 1}")
             session = self.__get_tor_session()
 
             # Sumbit all the links to the thread pool
@@ -221,6 +277,7 @@ class Crawler:
                 for url in old_level
                 if url not in json_data
             ]
+            stage.items = len(futures)
 
             # Get the results from list of futures and update the json_data
             for future in as_completed(futures):
@@ -239,6 +296,11 @@ class Crawler:
                 # Adding to json data
                 json_data[url] = list(url_data)
 
+                self.stats.add(url, url_data)
+                if time.monotonic() - last_snapshot >= self.stats_interval:
+                    self.stats.save(self.out_path)
+                    last_snapshot = time.monotonic()
+
             # Get the next level withouth duplicates.
             clean_cur_level = cur_level.difference(ord_lst)
             # Merge both ord_lst and cur_level into ord_lst
@@ -247,11 +309,30 @@ class Crawler:
             old_level = list(clean_cur_level)
             # Reset cur_level
             cur_level = set()
-            self.logger.info("Step %d completed :: %d result(s)", index + 1, len(ord_lst))
+            stage.stop()
+            self.logger.info(
+                "Step %d completed :: %d result(s), %d page(s) fetched in %.2fs",
+                index + 1,
+                len(ord_lst),
+                stage.items,
+                stage.wall,
+            )
+            growth = self.stats.end_depth(index + 1, stage.wall)
+            self.stats.save(self.out_path)
+            last_snapshot = time.monotonic()
+            self.logger.debug(
+                "Graph stats :: %d node(s), %d link(s), %d node(s) only seen as targets",
+                growth["nodes"],
+                growth["edges"],
+                growth["targets_only"],
+            )
 
             # Creating json
-            with open(self.__files["network_structure"], "w", encoding="UTF-8") as lst_file:
-                json.dump(json_data, lst_file, indent=2, sort_keys=False)
+            if self.network_format == "binary":
+                write_binary(self.__files["network_structure"], json_data)
+            else:
+                with open(self.__files["network_structure"], "w", encoding="UTF-8") as lst_file:
+                    json.dump(json_data, lst_file, indent=2, sort_keys=False)
 
             with open(self.__files["links"], "w+", encoding="UTF-8") as file:
                 for url in sorted(ord_lst):
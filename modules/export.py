@@ -0,0 +1,147 @@
+import os
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import LogNorm
+
+from modules.graph import Graph
+
+# Export formats
+FORMATS = ("graphml", "parquet")
+# Largest number of links drawn by the overview image, the others are only counted in the node density
+OVERVIEW_MAX_EDGES = 50000
+# Number of bins of the node density along each axis of the overview image
+OVERVIEW_BINS = 400
+
+
+def write_graphml(path: str, graph: Graph, attributes: Dict[str, np.ndarray]) -> str:
+    """Streams a graph to a GraphML file, e.g. for Gephi or Cytoscape.
+
+    Args:
+        path: Path of the GraphML file.
+        graph: Graph to write.
+        attributes: Name to the value of each node, e.g. the `x` and `y` positions and the metrics.
+
+    Returns:
+        Path of the GraphML file.
+    """
+    types = {
+        name: "int" if np.issubdtype(values.dtype, np.integer) else "double" for name, values in attributes.items()
+    }
+    sources, targets = graph.edges()
+    with open(path, "w", encoding="UTF-8") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        file.write('  <key id="url" for="node" attr.name="url" attr.type="string"/>\n')
+        for name, kind in types.items():
+            file.write(f'  <key id="{name}" for="node" attr.name="{name}" attr.type="{kind}"/>\n')
+        file.write('  <key id="weight" for="edge" attr.name="weight" attr.type="int"/>\n')
+        file.write('  <graph id="G" edgedefault="directed">\n')
+
+        columns = [values.tolist() for values in attributes.values()]
+        for i, (url, *values) in enumerate(zip(graph.urls.tolist(), *columns)):
+            data = "".join(f'<data key="{name}">{value}</data>' for name, value in zip(types, values))
+            file.write(f'    <node id="n{i}"><data key="url">{escape(url)}</data>{data}</node>\n')
+        for source, target, weight in zip(sources.tolist(), targets.tolist(), graph.adjacency.data.tolist()):
+            file.write(f'    <edge source="n{source}" target="n{target}"><data key="weight">{weight}</data></edge>\n')
+
+        file.write("  </graph>\n</graphml>\n")
+    return path
+
+
+def write_parquet(out_path: str, graph: Graph, attributes: Dict[str, np.ndarray]) -> List[str]:
+    """Writes the nodes and the edge list of a graph to Parquet files.
+
+    Args:
+        out_path: Dir path of the `nodes.parquet` and `edges.parquet` files.
+        graph: Graph to write.
+        attributes: Name to the value of each node, e.g. the `x` and `y` positions and the metrics.
+
+    Returns:
+        Paths of the nodes and of the edges.
+
+    Raises:
+        ImportError: pyarrow is not installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ImportError("pyarrow is needed to export Parquet files, install it with 'pip install pyarrow'") from err
+
+    nodes_path, edges_path = os.path.join(out_path, "nodes.parquet"), os.path.join(out_path, "edges.parquet")
+    nodes = {"id": np.arange(graph.n_nodes), "url": graph.urls.tolist()}
+    nodes.update({name: np.asarray(values) for name, values in attributes.items()})
+    pq.write_table(pa.table(nodes), nodes_path)
+
+    sources, targets = graph.edges()
+    pq.write_table(pa.table({"source": sources, "target": targets, "weight": graph.adjacency.data}), edges_path)
+    return [nodes_path, edges_path]
+
+
+def overview(path: str, graph: Graph, positions: np.ndarray, max_edges: int = OVERVIEW_MAX_EDGES, seed: int = 0) -> str:
+    """Draws a raster overview of a whole graph from its layout.
+
+    The nodes are drawn as a log scaled density of square bins and at most
+    `max_edges` random links are drawn below them, so the cost of the image
+    does not grow with the size of the graph.
+
+    Args:
+        path: Path of the image.
+        graph: Graph to draw.
+        positions: (n, 2) position of each node, e.g. from `Graph.spectral_layout`.
+        max_edges: Largest number of links drawn.
+        seed: Seed of the links sample.
+
+    Returns:
+        Path of the image.
+    """
+    sources, targets = graph.edges()
+    if len(sources) > max_edges:
+        sample = np.random.default_rng(seed).choice(len(sources), max_edges, replace=False)
+        sources, targets = sources[sample], targets[sample]
+
+    fig, ax = plt.subplots(figsize=(12, 12))
+    try:
+        segments = np.stack([positions[sources], positions[targets]], axis=1)
+        # Fainter links as more are drawn, below the node density
+        alpha = min(0.3, max(0.01, 2000 / max(len(segments), 1)))
+        ax.add_collection(
+            LineCollection(segments, linewidths=0.2, colors="gray", alpha=alpha, rasterized=True, zorder=0)
+        )
+        counts, _, _ = np.histogram2d(positions[:, 1], positions[:, 0], bins=OVERVIEW_BINS, range=[[-1, 1], [-1, 1]])
+        density = ax.imshow(
+            np.ma.masked_equal(counts, 0),
+            extent=(-1, 1, -1, 1),
+            origin="lower",
+            cmap="viridis",
+            norm=LogNorm(vmin=1, vmax=max(counts.max(), 2)),
+            zorder=1,
+        )
+        fig.colorbar(density, ax=ax, label="No. of Nodes")
+        ax.set_xlim(-1.05, 1.05)
+        ax.set_ylim(-1.05, 1.05)
+        ax.set_axis_off()
+        ax.set_title(f"{graph.n_nodes} nodes, {graph.n_edges} links ({len(sources)} drawn)")
+        fig.savefig(path, bbox_inches="tight", dpi=150)
+    finally:
+        plt.close(fig)
+    return path
+
+
+def top_nodes(scores: np.ndarray, sample: Optional[int]) -> np.ndarray:
+    """Ids of the nodes with the highest scores.
+
+    Args:
+        scores: Score of each node, e.g. its PageRank.
+        sample: Number of nodes kept, every node if None.
+
+    Returns:
+        Sorted node ids.
+    """
+    if sample is None or sample >= len(scores):
+        return np.arange(len(scores))
+    return np.sort(np.argpartition(-np.asarray(scores), sample)[:sample])
@@ -1,6 +1,9 @@
+import csv
 import logging
 import os
+import queue
 import re
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from http.client import IncompleteRead, InvalidURL
 from io import TextIOWrapper
@@ -11,10 +14,13 @@ from urllib.parse import urlparse
 
 import requests
 import yara as _yara
-from bs4 import BeautifulSoup
+from requests.models import Response
 
 from modules.checker import folder
-from modules.helper import get_requests_header
+from modules.fingerprint import SimHashIndex, simhash
+from modules.helper import Profiler, Stage, get_requests_header
+from modules.rules import CACHE_DIR, MATCHES_SUFFIX, YaraMatch, compile_rules, match, matches_summary, write_matches
+from modules.text import TextExtractor, header_charset
 
 # Type hinting aliases
 ExcInfo = Union[Exception, bool]
@@ -24,6 +30,10 @@ Log = Tuple[LogLevel, LogMsg, ExcInfo]
 SingleRes = List[Log]
 Results = List[SingleRes]
 
+# Index of the url of every extracted page, the file names drop the scheme and part of the query
+INDEX_FILE = "urls.csv"
+INDEX_COLUMNS = ["File", "URL"]
+
 
 class Extractor:
     """Extractor - scrapes the resulting website or discovered links.
@@ -38,10 +48,16 @@ class Extractor:
         thread: Number pages to extract (Threads) at the same time.
         yara: keyword search option.
         logger: A logger object to log the output.
+        rules: Yara rule files or directories. (Default: res/keywords.yar)
+        rules_cache: Dir path for compiled yara rules. Caching is disabled if None.
+        boilerplate: Remove navigation, header, footer and other page chrome from the text.
+        text_cache: Dir path for the extracted text cache shared with later stages. Disabled if None.
+        near_dup: Hamming distance of SimHash fingerprints below which pages are near duplicates. Disabled if None.
+        near_dup_skip: Skip near duplicate pages if True else only tag them in the log.
+        profiler: Records the time and memory of the extraction, a new one if None.
     """
 
     __headers = get_requests_header()
-    __yara_rules = _yara.compile("res/keywords.yar")
     __extract_folder = "extracted"
 
     def __init__(
@@ -55,6 +71,13 @@ class Extractor:
         thread: int,
         yara: Optional[int],
         logger: Logger,
+        rules: Optional[List[str]] = None,
+        rules_cache: Optional[str] = CACHE_DIR,
+        boilerplate: bool = False,
+        text_cache: Optional[str] = None,
+        near_dup: Optional[int] = None,
+        near_dup_skip: bool = True,
+        profiler: Optional[Profiler] = None,
     ):
         self.website = website
         self.proxies = proxies
@@ -69,10 +92,28 @@ class Extractor:
         self.thread = thread
         self.yara = yara
         self.logger = logger
+        self.rules = rules
+        self.rules_cache = rules_cache
+        self.text_extractor = TextExtractor(boilerplate=boilerplate, cache_dir=text_cache)
+        self.near_dup_skip = near_dup_skip
+        self.fingerprints = SimHashIndex(distance=near_dup) if near_dup is not None else None
+        self.profiler = profiler or Profiler(name="extractor")
+
+        # Rules are compiled on the first yara search
+        self.__yara_rules = None
+        self.__yara_lock = threading.Lock()
+        self.__index_lock = threading.Lock()
 
         self.__executor = ThreadPoolExecutor(max_workers=min(32, self.thread))
         self.__session = self.__get_tor_session()
 
+        # Extract-while-crawling pipeline state
+        self.__queue: Optional[queue.Queue] = None
+        self.__workers: List[threading.Thread] = []
+        self.__fed = set()
+        self.__pipeline_results: Results = []
+        self.__pipeline_stage: Optional[Stage] = None
+
     def extract(self) -> Results:
         """Extracts the contents of the input file/single URL into the outputs folder/file/terminal.
 
@@ -108,6 +149,7 @@ class Extractor:
                 (10, ("IOError Error :: %s", "`http://example.com/file.html`"), IOError()),
             ]]
         """
+        stage = self.profiler.stage("extract")
         results: Results = []
         if len(self.input_file) > 0:
             if self.crawl or self.out_path:
@@ -129,8 +171,88 @@ class Extractor:
                 self.logger.log(level, *args, exc_info=exception)
 
             results.append(single_res)
+
+        stage.items = len(results)
+        stage.stop()
+        self.logger.info("Extraction completed :: %d page(s) in %.2fs", stage.items, stage.wall)
         return results
 
+    def start_pipeline(self, maxsize: int = 0) -> None:
+        """Starts the extraction workers of the extract-while-crawling pipeline.
+
+        Pages handed over with `feed` are extracted into the output folder
+        while the crawl is still running.
+
+        Args:
+            maxsize: Size of the bounded queue between crawler and extractor. (Default: 2 * thread)
+        """
+        self.logger.info("Pipex :: Extracting crawled pages to %s", self.out_path)
+        self.__pipeline_stage = self.profiler.stage("pipeline extract")
+        self.__fed = set()
+        self.__pipeline_results = []
+        self.__queue = queue.Queue(maxsize=maxsize or 2 * self.thread)
+        self.__workers = [
+            threading.Thread(target=self.__pipe_worker, name=f"pipex-{index}", daemon=True)
+            for index in range(min(32, self.thread))
+        ]
+        for worker in self.__workers:
+            worker.start()
+
+    def feed(
+        self, url: str, response: Optional[Response] = None, original: Optional[str] = None, checked: bool = False
+    ) -> None:
+        """Hands a page over to the pipeline. Blocks while the queue is full.
+
+        Args:
+            url: Url of the page.
+            response: Response of the already fetched page. The page is fetched if None.
+            original: Url of the near duplicate of the page found by the crawler, if `checked`.
+            checked: True if the crawler already checked the page against the shared `fingerprints`,
+                so that it isn't fingerprinted again.
+        """
+        self.__fed.add(url)
+        self.__queue.put((url, response, original, checked))
+
+    def finish_pipeline(self) -> Results:
+        """Extracts the links of `input_file` that were never fed and stops the workers.
+
+        Returns:
+            List of `SingleRes` for each extracted url.
+        """
+        try:
+            with open(self.input_file, "r", encoding="UTF-8") as file:
+                for url in file.read().splitlines():
+                    if url not in self.__fed:
+                        self.feed(url)
+        except IOError as _:
+            self.logger.exception("Read Error :: %s", self.input_file)
+
+        for _ in self.__workers:
+            self.__queue.put(None)
+        for worker in self.__workers:
+            worker.join()
+
+        stage = self.__pipeline_stage.stop()
+        stage.items = len(self.__pipeline_results)
+        self.logger.info("Pipex :: %d page(s) extracted in %.2fs", stage.items, stage.wall)
+        return self.__pipeline_results
+
+    def __pipe_worker(self) -> None:
+        """Extracts queued pages until the stop sentinel is received."""
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+
+            url, response, original, checked = item
+            single_res = self.__generate_file(
+                url=url, out_path=self.out_path, yara=self.yara, response=response, original=original, checked=checked
+            )
+            self.__pipeline_results.append(single_res)
+
+            for level, args, exception in single_res:
+                self.logger.log(level, *args, exc_info=exception)
+
     def __get_tor_session(self) -> requests.Session:
         """Get a new session with Tor proxies.
 
@@ -143,6 +265,18 @@ class Extractor:
         session.verify = False
         return session
 
+    def __get_yara_rules(self) -> _yara.Rules:
+        """Compile the yara rules once, on first use.
+
+        Returns:
+            Compiled yara rules.
+        """
+        if self.__yara_rules is None:
+            with self.__yara_lock:
+                if self.__yara_rules is None:
+                    self.__yara_rules = compile_rules(self.rules, cache_dir=self.rules_cache, logger=self.logger)
+        return self.__yara_rules
+
     def __cinex(self, input_file: str, out_path: str, yara: Optional[int]) -> Results:
         """Ingests the crawled links from the input_file,
         scrapes the contents of the resulting web pages and writes the contents to
@@ -242,13 +376,24 @@ class Extractor:
 
         return results
 
-    def __generate_file(self, url: str, out_path: Optional[str], yara: Optional[int]) -> SingleRes:
+    def __generate_file(
+        self,
+        url: str,
+        out_path: Optional[str],
+        yara: Optional[int],
+        response: Optional[Response] = None,
+        original: Optional[str] = None,
+        checked: bool = False,
+    ) -> SingleRes:
         """Generate output file from url and send it to extractor.
 
         Args:
             url: Url of web address to scrape.
             output_file: Filename to write the contents to.
             yara: Keyword search argument.
+            response: Already fetched response of the url.
+            original: Url of the near duplicate found by the crawler, if `checked`.
+            checked: True if the crawler already checked the url for near duplicates.
 
         Returns:
             List of `Log` [`SingleRes`] for given url.
@@ -273,9 +418,26 @@ class Extractor:
                     )
                 ]
 
-        return self.__ex(website=url, yara=yara, output_file=output_file)
-
-    def __ex(self, website: str, output_file: str = None, yara: Optional[int] = None) -> SingleRes:
+        return self.__ex(
+            website=url,
+            yara=yara,
+            output_file=output_file,
+            response=response,
+            original=original,
+            checked=checked,
+            out_path=out_path,
+        )
+
+    def __ex(
+        self,
+        website: str,
+        output_file: str = None,
+        yara: Optional[int] = None,
+        response: Optional[Response] = None,
+        original: Optional[str] = None,
+        checked: bool = False,
+        out_path: Optional[str] = None,
+    ) -> SingleRes:
         """Scrapes the contents of the provided web address and outputs the
         contents to file or terminal.
 
@@ -283,15 +445,31 @@ class Extractor:
             website: Url of web address to scrape.
             output_file: Filename to write the contents to.
             yara: Keyword search argument.
+            response: Already fetched response of the website. Fetched if None.
+            original: Url of the near duplicate found by the crawler, if `checked`.
+            checked: True if the crawler already checked the website for near duplicates.
+            out_path: Dir path of the extracted pages, the url of `output_file` is added to its index.
 
         Returns:
             List of `Log` [`SingleRes`] for given website.
         """
         result = []
         try:
-            content = self.__session.get(website, allow_redirects=True, timeout=10).text
+            if response is None:
+                response = self.__session.get(website, allow_redirects=True, timeout=10)
+            # Raw body, scanned and written without decoding
+            content = response.content
+            encoding = header_charset(response.headers.get("Content-Type"))
+            if self.fingerprints is not None and not checked:
+                # Fingerprint before writing and scanning, unless the crawler already did
+                original = self.fingerprints.check(simhash(self.__text(response=content, encoding=encoding)), website)
+            if original is not None:
+                result.append((logging.DEBUG, ("%s :: Near duplicate of %s", website, original), False))
+                if self.near_dup_skip:
+                    return result
+
             if yara is not None:
-                full_match_keywords = self.__check_yara(raw=content, yara=yara)
+                full_match_keywords = self.__check_yara(raw=content, yara=yara, encoding=encoding)
 
                 result.append(
                     (
@@ -299,22 +477,32 @@ class Extractor:
                         (
                             "%s :: %s match found!",
                             website,
-                            "Yara" if full_match_keywords["matches"] else "No yara",
+                            "Yara" if full_match_keywords else "No yara",
                         ),
                         False,
                     )
                 )
-
-                # Don't write to file/terminal if no matches found.
-                if len(full_match_keywords) == 0:
+                # Only scrape documents that contain a match
+                if not full_match_keywords:
                     return result
+                result.append(
+                    (logging.DEBUG, ("%s :: Yara matches :: %s", website, matches_summary(full_match_keywords)), False)
+                )
 
             if output_file is not None:
-                with open(output_file, "w", encoding="UTF-8") as file:
+                with open(output_file, "wb") as file:
                     file.write(content)
                 result.append((logging.DEBUG, ("File created :: %s", output_file), False))
+                if out_path is not None:
+                    self.__index(out_path, output_file, website)
+                if yara is not None:
+                    # Matched rules and strings next to the page
+                    matches_file = write_matches(
+                        f"{os.path.splitext(output_file)[0]}{MATCHES_SUFFIX}", full_match_keywords
+                    )
+                    result.append((logging.DEBUG, ("File created :: %s", matches_file), False))
             else:
-                result.append((logging.INFO, ("%s :: %s", website, content), False))
+                result.append((logging.INFO, ("%s :: %s", website, response.text), False))
         except HTTPError as err:
             result.append((logging.DEBUG, ("Request Error :: %s", website), err))
         except (InvalidURL, URLError) as _:
@@ -328,46 +516,68 @@ class Extractor:
 
         return result
 
-    def __check_yara(self, raw: str, yara: int = 0) -> Dict[str, list]:
+    def __index(self, out_path: str, output_file: str, website: str) -> None:
+        """Appends the url of an extracted page to the index of the extracted folder.
+
+        Args:
+            out_path: Dir path of the extracted pages.
+            output_file: Path of the page file.
+            website: Url of the page.
+        """
+        path = os.path.join(out_path, INDEX_FILE)
+        with self.__index_lock:
+            new = not os.path.isfile(path)
+            with open(path, "a", encoding="UTF-8", newline="") as file:
+                writer = csv.writer(file)
+                if new:
+                    writer.writerow(INDEX_COLUMNS)
+                writer.writerow([os.path.relpath(output_file, out_path).replace(os.sep, "/"), website])
+
+    def __check_yara(
+        self, raw: Optional[bytes], yara: int = 0, encoding: Optional[str] = None
+    ) -> Optional[List[YaraMatch]]:
         """Validates Yara Rule to categorize the site and check for keywords.
 
         Args:
-            yara: Keyword search argument.
-            raw: HTTP Response body.
+            yara: Keyword search argument. 0 search the raw html, 1 search only
+                the text and 2 search both in one pass.
+            raw: Raw HTTP Response body.
+            encoding: Charset of the HTTP `Content-Type` header.
 
         Returns:
-            Dictionary of yara rule matches.
-
-            {"namespace":[match1,match2,...]}
+            List of `YaraMatch` for every matching rule of each target with the following format:
+
+            [{
+                "target": "html",
+                "rule": "keyword_search",
+                "namespace": "default",
+                "tags": [],
+                "meta": {"author": "@the-siegfried", "score": 90},
+                "strings": [(124, "$a", b"website"), (574, "$b", b"physics laboratory")],
+            }]
         """
         if raw is None:
             return None
 
-        if yara == 1:
-            raw = self.__text(response=raw).lower()
-
-        rule_data = []
+        rules = self.__get_yara_rules()
+        matches: List[YaraMatch] = []
 
-        def callback(data):
-            rule_data.append(data)
-            return 0  # yara.CALLBACK_CONTINUE
+        if yara in (0, 2):
+            matches.extend(match(rules, raw, target="html"))
+        if yara in (1, 2):
+            matches.extend(match(rules, self.__text(response=raw, encoding=encoding).encode("UTF-8"), target="text"))
 
-        matches = self.__yara_rules.match(data=raw, callback=callback)
+        return matches
 
-        return rule_data[0]
-
-    def __text(self, response: str) -> str:
+    def __text(self, response: Union[bytes, str], encoding: Optional[str] = None) -> str:
         """Removes all the garbage from the HTML and takes only text elements
         from the page.
 
         Args:
             response: HTTP Response.
+            encoding: Charset of the HTTP `Content-Type` header.
 
         Returns:
         Text only stripped response.
         """
-        soup = BeautifulSoup(response, features="lxml")
-        for s in soup(["script", "style"]):
-            s.decompose()
-
-        return " ".join(soup.stripped_strings)
+        return self.text_extractor.text(response, encoding)
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from modules.checker import folder
+from modules.preprocess import MAX_WORDS
+
+# Bumped whenever the preprocessing or the layout of the segments changes
+CACHE_VERSION = 1
+SEGMENT_ARRAYS = ("keys", "token_indptr", "tokens", "indptr", "indices", "data")
+
+
+class FeatureCache:
+    """On-disk cache of the preprocessed tokens and word counts of documents, keyed by content hash.
+
+    Rows are appended in immutable segments of `.npy` arrays loaded as memory maps,
+    so only the rows requested by `counts` are read. Terms are stored once in
+    `terms.txt` and referred to by their line number.
+
+    Attributes:
+        path: Dir path of the cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = folder(path)
+        self.__analyzer = CountVectorizer().build_analyzer()
+
+        meta_path = os.path.join(self.path, "meta.json")
+        meta = {"version": CACHE_VERSION, "max_words": MAX_WORDS}
+        if os.path.isfile(meta_path):
+            with open(meta_path, "r", encoding="UTF-8") as file:
+                if json.load(file) != meta:
+                    # Rows of an other preprocessing can't be reused
+                    self.clear()
+        with open(meta_path, "w", encoding="UTF-8") as file:
+            json.dump(meta, file)
+
+        terms_path = os.path.join(self.path, "terms.txt")
+        self.__terms: List[str] = []
+        if os.path.isfile(terms_path):
+            with open(terms_path, "r", encoding="UTF-8") as file:
+                self.__terms = file.read().splitlines()
+        self.__term_ids: Dict[str, int] = {term: i for i, term in enumerate(self.__terms)}
+        self.__saved_terms = len(self.__terms)
+
+        self.__segments: List[Dict[str, np.ndarray]] = []
+        self.__offsets = [0]
+        self.__index: Dict[bytes, int] = {}
+        for name in sorted(os.listdir(self.path)):
+            if name.startswith("segment-") and not name.endswith(".tmp"):
+                self.__load_segment(os.path.join(self.path, name))
+
+        self.__pending: List[tuple] = []
+        self.__stats = {"documents": 0, "seconds": 0.0}
+        stats_path = os.path.join(self.path, "stats.json")
+        if os.path.isfile(stats_path):
+            with open(stats_path, "r", encoding="UTF-8") as file:
+                self.__stats = json.load(file)
+
+    def __len__(self) -> int:
+        return self.__offsets[-1] + len(self.__pending)
+
+    @property
+    def seconds_per_document(self) -> Optional[float]:
+        """Mean time spent preprocessing a cached document, None if unknown."""
+        if not self.__stats["documents"]:
+            return None
+        return self.__stats["seconds"] / self.__stats["documents"]
+
+    @property
+    def terms(self) -> np.ndarray:
+        """Every cached term, indexed by term id."""
+        return np.array(self.__terms, dtype=object)
+
+    def clear(self) -> None:
+        """Removes every cached row."""
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        """Cache key of a document.
+
+        Args:
+            text: Scraped text of the document.
+
+        Returns:
+            16 bytes hash of the text.
+        """
+        return hashlib.blake2b(text.encode("UTF-8", "surrogatepass"), digest_size=16).digest()
+
+    def lookup(self, keys: List[bytes]) -> np.ndarray:
+        """Rows of the cached documents.
+
+        Args:
+            keys: Cache keys of the documents.
+
+        Returns:
+            Row of each document, -1 if it is not cached.
+        """
+        return np.array([self.__index.get(key, -1) for key in keys], dtype=np.int64)
+
+    def add(self, keys: List[bytes], preprocessed: List[str], seconds: float = 0.0) -> np.ndarray:
+        """Caches preprocessed documents, kept in memory until `flush`.
+
+        Args:
+            keys: Cache keys of the documents.
+            preprocessed: Preprocessed text of the documents.
+            seconds: Time spent preprocessing the documents.
+
+        Returns:
+            Row of each document.
+        """
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, (key, text) in enumerate(zip(keys, preprocessed)):
+            row = self.__index.get(key)
+            if row is None:
+                row = self.__index[key] = len(self)
+                tokens = [self.__term_id(token) for token in text.split()]
+                counts: Dict[int, int] = {}
+                for term in self.__analyzer(text):
+                    term = self.__term_id(term)
+                    counts[term] = counts.get(term, 0) + 1
+                self.__pending.append((key, tokens, sorted(counts.items())))
+            rows[i] = row
+        self.__stats["documents"] += len(keys)
+        self.__stats["seconds"] += seconds
+        return rows
+
+    def __term_id(self, term: str) -> int:
+        term_id = self.__term_ids.get(term)
+        if term_id is None:
+            term_id = self.__term_ids[term] = len(self.__terms)
+            self.__terms.append(term)
+        return term_id
+
+    def flush(self) -> Optional[str]:
+        """Writes the documents added since the last flush as a new segment.
+
+        Returns:
+            Path of the segment or None if nothing was added.
+        """
+        if not self.__pending:
+            return None
+
+        with open(os.path.join(self.path, "terms.txt"), "a", encoding="UTF-8") as file:
+            file.writelines(f"{term}\n" for term in self.__terms[self.__saved_terms :])
+        self.__saved_terms = len(self.__terms)
+
+        keys, tokens, counts = zip(*self.__pending)
+        arrays = {
+            "keys": np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, 16),
+            "token_indptr": np.cumsum([0] + [len(row) for row in tokens], dtype=np.int64),
+            "tokens": np.fromiter((term for row in tokens for term in row), dtype=np.int32),
+            "indptr": np.cumsum([0] + [len(row) for row in counts], dtype=np.int64),
+            "indices": np.fromiter((term for row in counts for term, _ in row), dtype=np.int32),
+            "data": np.fromiter((count for row in counts for _, count in row), dtype=np.int32),
+        }
+
+        # Written to a temporary dir first so that a partial segment is never loaded
+        path = os.path.join(self.path, f"segment-{self.__offsets[-1]:012d}")
+        tmp_path = folder(f"{path}.tmp")
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        os.replace(tmp_path, path)
+        with open(os.path.join(self.path, "stats.json"), "w", encoding="UTF-8") as file:
+            json.dump(self.__stats, file)
+
+        self.__pending = []
+        self.__load_segment(path)
+        return path
+
+    def __load_segment(self, path: str) -> None:
+        if not all(os.path.isfile(os.path.join(path, f"{name}.npy")) for name in SEGMENT_ARRAYS):
+            return
+        segment = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in SEGMENT_ARRAYS}
+        offset = self.__offsets[-1]
+        keys = segment["keys"].tobytes()
+        for row in range(len(segment["keys"])):
+            self.__index.setdefault(keys[16 * row : 16 * (row + 1)], offset + row)
+        self.__segments.append(segment)
+        self.__offsets.append(offset + len(segment["keys"]))
+
+    def tokens(self, row: int) -> List[str]:
+        """Preprocessed tokens of a flushed document.
+
+        Args:
+            row: Row of the document.
+
+        Returns:
+            Tokens in the document order.
+        """
+        segment = np.searchsorted(self.__offsets, row, side="right") - 1
+        arrays, row = self.__segments[segment], row - self.__offsets[segment]
+        ids = arrays["tokens"][arrays["token_indptr"][row] : arrays["token_indptr"][row + 1]]
+        return [self.__terms[term] for term in ids]
+
+    def counts(self, rows: np.ndarray) -> sparse.csr_matrix:
+        """Word counts of flushed documents, columns indexed by term id.
+
+        Args:
+            rows: Rows of the documents.
+
+        Returns:
+            Sparse matrix of shape (len(rows), number of terms).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        segments = np.searchsorted(self.__offsets, rows, side="right") - 1
+        parts, order = [], []
+        for segment in np.unique(segments):
+            selected = np.flatnonzero(segments == segment)
+            arrays = self.__segments[segment]
+            matrix = sparse.csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=(len(arrays["indptr"]) - 1, len(self.__terms)),
+                copy=False,
+            )
+            parts.append(matrix[rows[selected] - self.__offsets[segment]])
+            order.append(selected)
+
+        if not parts:
+            return sparse.csr_matrix((0, len(self.__terms)), dtype=np.int32)
+        matrix = sparse.vstack(parts, format="csr")
+        return matrix[np.argsort(np.concatenate(order), kind="stable")]
@@ -0,0 +1,132 @@
+import hashlib
+import re
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# Type hinting aliases
+Key = Hashable
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64 bit SimHash of the text over word shingles.
+
+    Similar texts get fingerprints with a small hamming distance.
+
+    Args:
+        text: Text of the page.
+        shingle: Number of consecutive words hashed together.
+
+    Returns:
+        Fingerprint of the text.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) > shingle:
+        features = [" ".join(words[i : i + shingle]) for i in range(len(words) - shingle + 1)]
+    else:
+        features = [" ".join(words)]
+
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(feature.encode("UTF-8"), digest_size=8).digest() for feature in features),
+        dtype=np.uint8,
+    ).reshape(-1, 8)
+    # Each feature votes +1/-1 for every bit, the sign of the sum is the fingerprint bit
+    votes = np.unpackbits(hashes, axis=1).sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints.
+
+    Args:
+        a: Fingerprint.
+        b: Fingerprint.
+
+    Returns:
+        Hamming distance.
+    """
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """Thread safe LSH index of SimHash fingerprints.
+
+    The 64 bits are split into `distance + 1` bands. Two fingerprints within
+    `distance` bits share at least one identical band, so only the fingerprints
+    in the same band buckets are compared.
+
+    Attributes:
+        distance: Maximum hamming distance of near duplicates.
+    """
+
+    def __init__(self, distance: int = 3):
+        if not 0 <= distance < 64:
+            raise ValueError("distance must be in between 0 and 63")
+        self.distance = distance
+
+        bands = distance + 1
+        bounds = [round(64 * i / bands) for i in range(bands + 1)]
+        self.__bands = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self.__buckets: List[Dict[int, List[Tuple[int, Key]]]] = [{} for _ in self.__bands]
+        self.__lock = threading.Lock()
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __keys(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> shift) & mask for shift, mask in self.__bands]
+
+    def __query(self, fingerprint: int, keys: List[int]) -> Optional[Key]:
+        for bucket, band in zip(self.__buckets, keys):
+            for other, key in bucket.get(band, ()):
+                if hamming(fingerprint, other) <= self.distance:
+                    return key
+        return None
+
+    def query(self, fingerprint: int) -> Optional[Key]:
+        """Finds an indexed near duplicate.
+
+        Args:
+            fingerprint: SimHash fingerprint.
+
+        Returns:
+            Key of a near duplicate or None.
+        """
+        with self.__lock:
+            return self.__query(fingerprint, self.__keys(fingerprint))
+
+    def add(self, fingerprint: int, key: Key) -> None:
+        """Indexes a fingerprint.
+
+        Args:
+            fingerprint: SimHash fingerprint.
+            key: Key returned for its near duplicates, e.g. the url.
+        """
+        with self.__lock:
+            self.__add(fingerprint, key, self.__keys(fingerprint))
+
+    def __add(self, fingerprint: int, key: Key, keys: List[int]) -> None:
+        for bucket, band in zip(self.__buckets, keys):
+            bucket.setdefault(band, []).append((fingerprint, key))
+        self.__size += 1
+
+    def check(self, fingerprint: int, key: Key) -> Optional[Key]:
+        """Atomically finds a near duplicate or indexes the fingerprint if there is none.
+
+        Args:
+            fingerprint: SimHash fingerprint.
+            key: Key returned for its near duplicates, e.g. the url.
+
+        Returns:
+            Key of a near duplicate or None if the fingerprint was added.
+        """
+        keys = self.__keys(fingerprint)
+        with self.__lock:
+            original = self.__query(fingerprint, keys)
+            if original is None:
+                self.__add(fingerprint, key, keys)
+            return original
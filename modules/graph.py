@@ -0,0 +1,479 @@
+import json
+from logging import Logger
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from modules.checker import extract_domain
+from modules.network import NetworkFile, UrlTable, is_binary
+
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+# Type hinting aliases
+Network = Dict[str, List[str]]
+Convergence = Dict[str, Union[bool, int, float, List[float]]]
+
+# Largest graph converted to networkx, e.g. to be drawn
+NX_MAX_NODES = 10000
+
+
+def distribution(weights: Optional[np.ndarray], n: int) -> np.ndarray:
+    """Normalizes weights to sum to 1.
+
+    Args:
+        weights: Non negative weight of each node, uniform if None.
+        n: Number of nodes.
+
+    Returns:
+        Weights summing to 1, uniform if they sum to 0.
+
+    Raises:
+        ValueError: The weights are not one per node or negative.
+    """
+    if weights is None:
+        return np.full(n, 1.0 / n) if n else np.zeros(0)
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != (n,):
+        raise ValueError(f"Expected {n} weights, got an array of shape {weights.shape}")
+    if (weights < 0).any():
+        raise ValueError("Weights must be non negative")
+    total = weights.sum()
+    return weights / total if total else distribution(None, n)
+
+
+def power_iteration(
+    step: Callable[[np.ndarray], np.ndarray], x: np.ndarray, max_iter: int, tol: float
+) -> Tuple[np.ndarray, Convergence]:
+    """Applies `step` until the vector stops changing.
+
+    The iteration stops once the L1 change relative to the L1 norm of the
+    vector is below `tol`, or after `max_iter` iterations without raising.
+    Unlike the `n * tol` absolute threshold of networkx, it does not get
+    looser as the graph grows.
+
+    Args:
+        step: Next vector of the iteration.
+        x: Start vector.
+        max_iter: Maximum number of iterations.
+        tol: Convergence tolerance on the relative L1 change.
+
+    Returns:
+        Last vector and the convergence diagnostics, i.e. whether it converged,
+        the number of iterations, the last relative L1 change and the change at each iteration.
+    """
+    n = len(x)
+    errors: List[float] = []
+    for _ in range(max_iter if n else 0):
+        xlast, x = x, step(x)
+        norm = np.abs(x).sum()
+        errors.append(float(np.abs(x - xlast).sum() / norm) if norm else 0.0)
+        if errors[-1] < tol:
+            break
+    converged = n == 0 or (bool(errors) and errors[-1] < tol)
+    return x, {
+        "converged": converged,
+        "iterations": len(errors),
+        "error": errors[-1] if errors else 0.0,
+        "tolerance": tol,
+        "errors": errors,
+    }
+
+
+class Graph:
+    """Directed crawl graph stored as a CSR adjacency matrix over interned urls.
+
+    Every url is interned to an integer id, the crawled pages first in the
+    order of the network structure and then the urls only seen as link
+    targets. Duplicate links are merged, as in a networkx DiGraph.
+
+    A host graph, from `from_hosts`, has a node per host instead and is
+    weighted by the number of page links between two hosts.
+
+    A graph opened from a binary network structure, by `from_binary`,
+    keeps its urls sorted in a memory mapped `UrlTable` instead.
+
+    Attributes:
+        urls: Url, or host, of each node id.
+        adjacency: Sparse (n, n) matrix with the weight of every link from row to column, 1 for page graphs.
+        seed: Node id of the first crawled page.
+    """
+
+    def __init__(self, urls: Iterable[str], adjacency: sparse.csr_matrix, seed: int = 0):
+        if isinstance(urls, UrlTable):
+            self.urls = urls
+        else:
+            self.urls = np.asarray(urls if isinstance(urls, np.ndarray) else list(urls), dtype=object)
+        self.adjacency = adjacency
+        self.seed = seed
+        self.__index: Optional[Dict[str, int]] = None
+        self.__transpose: Optional[sparse.csr_matrix] = None
+
+    @classmethod
+    def from_dict(cls, data: Network) -> "Graph":
+        """Builds the graph of a network structure.
+
+        Args:
+            data: Links of every crawled url.
+
+        Returns:
+            Graph of the links.
+        """
+        ids: Dict[str, int] = {url: i for i, url in enumerate(data)}
+        intern = ids.setdefault
+        indptr = np.zeros(len(data) + 1, dtype=np.int64)
+        indices = []
+        for i, links in enumerate(data.values()):
+            indices.extend(intern(url, len(ids)) for url in links)
+            indptr[i + 1] = len(indices)
+        return cls.from_arrays(list(ids), indptr, np.array(indices, dtype=np.int64))
+
+    @classmethod
+    def from_hosts(cls, data: Network, logger: Optional[Logger] = None) -> "Graph":
+        """Builds the weighted host graph of a network structure.
+
+        The page links are streamed into host to host link counts, so the
+        page graph is never built. Links within a host are dropped, as are
+        the urls whose host can't be parsed, e.g. with an invalid IPv6 bracket.
+
+        Args:
+            data: Links of every crawled url.
+            logger: A logger object to log the skipped urls.
+
+        Returns:
+            Graph of the hosts, weighted by the number of page links.
+        """
+        ids: Dict[str, int] = {}
+        intern = ids.setdefault
+        weights: Dict[Tuple[int, int], int] = {}
+        for url, links in data.items():
+            try:
+                source = intern(extract_domain(url), len(ids))
+            except ValueError as err:
+                source = None
+                if logger:
+                    logger.debug("Invalid URL Error :: %s :: Skipping...", url, exc_info=err)
+            for link in links:
+                try:
+                    target = intern(extract_domain(link), len(ids))
+                except ValueError as err:
+                    if logger:
+                        logger.debug("Invalid URL Error :: %s :: Skipping...", link, exc_info=err)
+                    continue
+                if source is not None and target != source:
+                    weights[source, target] = weights.get((source, target), 0) + 1
+
+        n = len(ids)
+        pairs = np.fromiter((i for pair in weights for i in pair), dtype=np.int64, count=2 * len(weights))
+        adjacency = sparse.csr_matrix(
+            (np.fromiter(weights.values(), dtype=np.int64, count=len(weights)), (pairs[0::2], pairs[1::2])),
+            shape=(n, n),
+        )
+        return cls(list(ids), adjacency)
+
+    @classmethod
+    def from_json(cls, path: str, hosts: bool = False, logger: Optional[Logger] = None) -> "Graph":
+        """Builds the graph of a `network_structure.json` file.
+
+        Args:
+            path: Path of the network structure.
+            hosts: True to build the weighted host graph else the page graph.
+            logger: A logger object to log the urls skipped by the host graph.
+
+        Returns:
+            Graph of the links.
+        """
+        with open(path, "r", encoding="UTF-8") as file:
+            data = json.load(file)
+        return cls.from_hosts(data, logger) if hosts else cls.from_dict(data)
+
+    @classmethod
+    def from_binary(cls, path: str, hosts: bool = False, logger: Optional[Logger] = None) -> "Graph":
+        """Opens the graph of a binary network structure, memory mapping its urls and links.
+
+        Args:
+            path: Path of the binary network structure.
+            hosts: True to build the weighted host graph else the page graph.
+            logger: A logger object to log the urls skipped by the host graph.
+
+        Returns:
+            Graph of the links.
+        """
+        network = NetworkFile(path)
+        if hosts:
+            return cls.from_hosts(network, logger)
+        n = len(network.urls)
+        adjacency = sparse.csr_matrix(
+            (np.ones(len(network.indices), dtype=np.int8), network.indices, network.indptr), shape=(n, n), copy=False
+        )
+        # Links are written sorted and without duplicates
+        adjacency.has_sorted_indices = True
+        return cls(network.urls, adjacency, seed=network.seed)
+
+    @classmethod
+    def from_file(cls, path: str, hosts: bool = False, logger: Optional[Logger] = None) -> "Graph":
+        """Builds the graph of a json or binary network structure.
+
+        Args:
+            path: Path of the network structure.
+            hosts: True to build the weighted host graph else the page graph.
+            logger: A logger object to log the urls skipped by the host graph.
+
+        Returns:
+            Graph of the links.
+        """
+        return cls.from_binary(path, hosts, logger) if is_binary(path) else cls.from_json(path, hosts, logger)
+
+    @classmethod
+    def from_arrays(cls, urls: List[str], indptr: np.ndarray, indices: np.ndarray) -> "Graph":
+        """Builds the graph from CSR arrays, possibly with duplicate links.
+
+        Args:
+            urls: Url of each node id.
+            indptr: Links of node `i` are `indices[indptr[i]:indptr[i + 1]]`, may cover only the first nodes.
+            indices: Target node id of each link.
+
+        Returns:
+            Graph of the links.
+        """
+        n = len(urls)
+        indptr = np.concatenate([indptr, np.full(n + 1 - len(indptr), indptr[-1], dtype=indptr.dtype)])
+        dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+        adjacency = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int8), indices.astype(dtype, copy=False), indptr.astype(dtype, copy=False)),
+            shape=(n, n),
+        )
+        # Duplicate links are summed, then reset to 1
+        adjacency.sum_duplicates()
+        adjacency.data[:] = 1
+        return cls(urls, adjacency)
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of nodes."""
+        return self.adjacency.shape[0]
+
+    @property
+    def n_edges(self) -> int:
+        """Number of links."""
+        return self.adjacency.nnz
+
+    @property
+    def weighted(self) -> bool:
+        """Whether some links have a weight other than 1."""
+        return bool((self.adjacency.data != 1).any())
+
+    @property
+    def transpose(self) -> sparse.csr_matrix:
+        """Float CSR matrix of the incoming links of each node, used by the power iterations."""
+        if self.__transpose is None:
+            self.__transpose = self.adjacency.T.tocsr().astype(np.float64)
+        return self.__transpose
+
+    def index(self, url: str) -> int:
+        """Node id of an url.
+
+        Args:
+            url: Url of the node.
+
+        Returns:
+            Node id.
+        """
+        if isinstance(self.urls, UrlTable):
+            return self.urls.index(url)
+        if self.__index is None:
+            self.__index = {url: i for i, url in enumerate(self.urls)}
+        return self.__index[url]
+
+    def in_degree(self) -> np.ndarray:
+        """Number of incoming links of each node."""
+        return np.bincount(self.adjacency.indices, minlength=self.n_nodes)
+
+    def out_degree(self) -> np.ndarray:
+        """Number of outgoing links of each node."""
+        return np.diff(self.adjacency.indptr)
+
+    def out_weight(self) -> np.ndarray:
+        """Total weight of the outgoing links of each node, the outdegree for page graphs."""
+        return np.asarray(self.adjacency.sum(axis=1)).ravel()
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Links as arrays of source and target node ids."""
+        return np.repeat(np.arange(self.n_nodes), self.out_degree()), self.adjacency.indices
+
+    def warm_start(self, urls: Iterable[str], scores: np.ndarray) -> np.ndarray:
+        """Start vector of a power iteration from the scores of a previous graph, e.g. before an incremental crawl.
+
+        Args:
+            urls: Url of each node of the previous graph.
+            scores: Score of each node of the previous graph.
+
+        Returns:
+            Previous score of each node, the mean score for the new nodes.
+        """
+        previous = dict(zip(urls, np.asarray(scores, dtype=np.float64).tolist()))
+        mean = float(np.mean(scores)) if len(previous) else 1.0
+        return np.fromiter((previous.get(url, mean) for url in self.urls), dtype=np.float64, count=self.n_nodes)
+
+    def pagerank(
+        self,
+        alpha: float = 0.85,
+        max_iter: int = 100,
+        tol: float = 1.0e-6,
+        personalization: Optional[np.ndarray] = None,
+        dangling: Optional[np.ndarray] = None,
+        start: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, Convergence]:
+        """PageRank of each node by sparse power iteration.
+
+        The rank of a node is split over its links in proportion to their
+        weight. The rank of the dangling nodes, without outgoing links, is
+        spread over the `dangling` distribution, the teleport one if None.
+
+        Args:
+            alpha: Damping factor.
+            max_iter: Maximum number of iterations.
+            tol: Convergence tolerance on the relative L1 change of the ranks.
+            personalization: Teleport weight of each node, uniform if None.
+            dangling: Weight of each node in the redistribution of the dangling rank, `personalization` if None.
+            start: Initial ranks, e.g. from `warm_start`, uniform if None.
+
+        Returns:
+            PageRank of each node, summing to 1, and the convergence diagnostics.
+        """
+        n = self.n_nodes
+        teleport = distribution(personalization, n)
+        dangling_weights = teleport if dangling is None else distribution(dangling, n)
+        out_weight = self.out_weight()
+        is_dangling = out_weight == 0
+        inv_weight = np.divide(1.0, out_weight, out=np.zeros(n), where=~is_dangling)
+
+        def step(x: np.ndarray) -> np.ndarray:
+            return (
+                alpha * (self.transpose @ (x * inv_weight) + x[is_dangling].sum() * dangling_weights)
+                + (1 - alpha) * teleport
+            )
+
+        return power_iteration(step, distribution(start, n), max_iter, tol)
+
+    def eigenvector_centrality(
+        self, max_iter: int = 1000, tol: float = 1.0e-6, start: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, Convergence]:
+        """Eigenvector centrality of each node by sparse power iteration over the weighted incoming links.
+
+        The identity is added to the adjacency, as networkx does, so that the
+        iteration also converges on bipartite graphs instead of oscillating.
+
+        Args:
+            max_iter: Maximum number of iterations.
+            tol: Convergence tolerance on the relative L1 change of the centralities.
+            start: Initial centralities, e.g. from `warm_start`, uniform if None.
+
+        Returns:
+            Centrality of each node, with a unit euclidean norm, and the convergence diagnostics.
+        """
+
+        def step(x: np.ndarray) -> np.ndarray:
+            x = x + self.transpose @ x
+            norm = np.linalg.norm(x)
+            return x / norm if norm else x
+
+        return power_iteration(step, distribution(start, self.n_nodes), max_iter, tol)
+
+    def spectral_layout(
+        self, max_iter: int = 100, tol: float = 1.0e-4, seed: int = 0, regularization: float = 1.0
+    ) -> Tuple[np.ndarray, Convergence]:
+        """2D layout of the nodes from the degree normalized eigenvectors of the undirected graph.
+
+        The two vectors are found together by power iteration over the
+        weighted neighbour averaging `(x + D^-1 A x) / 2`, D-orthogonalized
+        against the constant vector and each other after every iteration
+        (Koren, "Drawing graphs by eigenvectors"). Each iteration costs one
+        sparse product, so the layout scales to millions of links and stops
+        after `max_iter` iterations even if not converged.
+
+        A complete graph of total weight `regularization` times the mean
+        degree is added to A, as in regularized spectral clustering, so that
+        the small components and the sparse fringes of a crawl do not take
+        over the eigenvectors and squeeze the rest of the graph to a point.
+
+        Args:
+            max_iter: Maximum number of iterations.
+            tol: Convergence tolerance on the relative L1 change of the positions.
+            seed: Seed of the random start positions.
+            regularization: Weight of the added complete graph relative to the mean degree.
+
+        Returns:
+            (n, 2) positions in [-1, 1] and the convergence diagnostics.
+        """
+        n = self.n_nodes
+        symmetric = (self.adjacency + self.adjacency.T).tocsr().astype(np.float64)
+        degree = np.asarray(symmetric.sum(axis=1)).ravel()
+        tau = regularization * degree.mean() if n else 0.0
+        # Nodes without links keep a unit degree
+        weight = degree + (tau if tau else 1.0)
+
+        def step(x: np.ndarray) -> np.ndarray:
+            x = x.reshape(n, 2)
+            # The complete graph adds tau / n times the sum of the positions to every neighbourhood
+            x = (x + (symmetric @ x + tau / n * x.sum(axis=0)) / weight[:, None]) / 2
+            basis = [np.ones(n)]
+            for j in range(2):
+                for b in basis:
+                    norm = (weight * b) @ b
+                    if norm:
+                        x[:, j] -= (weight * x[:, j]) @ b / norm * b
+                norm = np.sqrt((weight * x[:, j]) @ x[:, j])
+                if norm:
+                    x[:, j] /= norm
+                basis.append(x[:, j])
+            return x.ravel()
+
+        rng = np.random.default_rng(seed)
+        x, convergence = power_iteration(step, rng.standard_normal(2 * n), max_iter, tol)
+        positions = x.reshape(n, 2)
+        if n:
+            low, high = positions.min(axis=0), positions.max(axis=0)
+            span = np.where(high > low, high - low, 1.0)
+            positions = 2 * (positions - low) / span - 1
+        return positions, convergence
+
+    def subgraph(self, nodes: np.ndarray) -> "Graph":
+        """Graph induced by some nodes.
+
+        Args:
+            nodes: Node ids to keep, in their order in the subgraph.
+
+        Returns:
+            Graph of the nodes and the links between them.
+        """
+        return Graph(self.urls[nodes], self.adjacency[nodes][:, nodes].tocsr())
+
+    def to_networkx(self, max_nodes: int = NX_MAX_NODES):
+        """networkx DiGraph of small graphs.
+
+        Args:
+            max_nodes: Largest number of nodes converted.
+
+        Returns:
+            networkx DiGraph with urls as nodes, and a `weight` edge attribute if weighted.
+
+        Raises:
+            ImportError: networkx is not installed.
+            ValueError: The graph has more than `max_nodes` nodes.
+        """
+        if nx is None:
+            raise ImportError("networkx is needed to convert the graph, install it with 'pip install networkx'")
+        if self.n_nodes > max_nodes:
+            raise ValueError(f"Graph has {self.n_nodes} nodes, more than the {max_nodes} converted to networkx")
+        G = nx.DiGraph()
+        G.add_nodes_from(self.urls)
+        sources, targets = self.edges()
+        if self.weighted:
+            G.add_weighted_edges_from(zip(self.urls[sources], self.urls[targets], self.adjacency.data.tolist()))
+        else:
+            G.add_edges_from(zip(self.urls[sources], self.urls[targets]))
+        return G
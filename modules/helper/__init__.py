@@ -2,3 +2,4 @@ from .exceptions import *
 from .header import *
 from .helper import *
 from .logger import *
+from .profiler import *
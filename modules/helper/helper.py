@@ -4,6 +4,11 @@ import sys
 from io import StringIO
 from typing import Dict
 
+import matplotlib
+
+# Plots are only written to files, never shown
+matplotlib.use("Agg")
+
 import matplotlib.pyplot as plt
 
 from modules.helper.header import Colors
@@ -36,11 +41,13 @@ def verbose(func):
 
     def wrapper(*args, **kwargs):
         args[0].logger.info("Generating :: %s..", func.__doc__)
-        plt.cla()
-        plt.figure(figsize=(12, 6))
-        plt.grid()
-        ret = func(*args, **kwargs)
-        plt.savefig(os.path.join(args[0].out_path, f"{func.__name__}.png"), bbox_inches="tight")
+        fig = plt.figure(figsize=(12, 6))
+        try:
+            plt.grid()
+            ret = func(*args, **kwargs)
+            fig.savefig(os.path.join(args[0].out_path, f"{func.__name__}.png"), bbox_inches="tight")
+        finally:
+            plt.close(fig)
         return ret
 
     wrapper.__doc__ = func.__doc__
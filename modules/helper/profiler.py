@@ -0,0 +1,205 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss() -> int:
+    """Resident set size of the process.
+
+    Returns:
+        Bytes of memory resident in RAM.
+    """
+    return psutil.Process().memory_info().rss
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of the process since it started.
+
+    Returns:
+        Bytes of memory or None if unavailable.
+    """
+    if resource is None:
+        # Peak working set on Windows
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def children_cpu() -> float:
+    """CPU time of the terminated child processes, e.g. of a finished process pool.
+
+    Returns:
+        User and system seconds.
+    """
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Stage:
+    """Wall time, CPU time, peak RSS and item count of a profiled stage.
+
+    Use as a context manager or call `stop`. The peak RSS is sampled by a
+    background thread every `interval` seconds while the stage runs.
+
+    Attributes:
+        name: Name of the stage.
+        items: Number of items processed by the stage, set by the caller.
+        wall: Elapsed seconds.
+        cpu: CPU seconds of the process, all threads included.
+        children_cpu: CPU seconds of the child processes which terminated during the stage.
+        rss: RSS in bytes when the stage started.
+        peak: Peak RSS in bytes during the stage.
+    """
+
+    def __init__(self, name: str, items: Optional[int] = None, interval: float = 0.05):
+        self.name = name
+        self.items = items
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.children_cpu = 0.0
+        self.rss = current_rss()
+        self.peak = self.rss
+
+        self.__interval = interval
+        self.__stopped = threading.Event()
+        self.__sampler = threading.Thread(target=self.__sample, name=f"profiler-{name}", daemon=True)
+        self.__start = (time.perf_counter(), time.process_time(), children_cpu())
+        self.__sampler.start()
+
+    def __enter__(self) -> "Stage":
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __sample(self) -> None:
+        while not self.__stopped.wait(self.__interval):
+            self.__update_peak()
+
+    def __update_peak(self) -> None:
+        self.peak = max(self.peak, current_rss())
+
+    @property
+    def running(self) -> bool:
+        """True until the stage is stopped."""
+        return not self.__stopped.is_set()
+
+    def stop(self) -> "Stage":
+        """Stops the stage and records its measures.
+
+        Returns:
+            The stage itself.
+        """
+        if self.running:
+            self.__stopped.set()
+            self.__sampler.join()
+            self.__update_peak()
+            wall, cpu, child = self.__start
+            self.wall = time.perf_counter() - wall
+            self.cpu = time.process_time() - cpu
+            self.children_cpu = children_cpu() - child
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Measures of the stage.
+
+        Returns:
+            JSON serializable measures, the memory in bytes and the time in seconds.
+        """
+        return {
+            "name": self.name,
+            "wall_seconds": round(self.wall, 4),
+            "cpu_seconds": round(self.cpu, 4),
+            "children_cpu_seconds": round(self.children_cpu, 4),
+            "rss_start": self.rss,
+            "peak_rss": self.peak,
+            "items": self.items,
+            "items_per_second": round(self.items / self.wall, 2) if self.items is not None and self.wall else None,
+        }
+
+
+class Profiler:
+    """Records the stages of a run and writes them to a JSON run report.
+
+    Thread safe, so that stages can be recorded by the crawler and extractor threads.
+
+    >>> profiler = Profiler()
+    >>> with profiler.stage("preprocess") as stage:
+            stage.items = len(documents)
+    >>> profiler.save("profile.json")
+
+    Attributes:
+        name: Name of the run.
+        interval: Seconds in between two RSS samples of a running stage.
+    """
+
+    def __init__(self, name: str = "darkspider", interval: float = 0.05):
+        self.name = name
+        self.interval = interval
+        self.started = datetime.now(timezone.utc)
+        self.stages: List[Stage] = []
+
+        self.__lock = threading.Lock()
+        self.__start = (time.perf_counter(), time.process_time(), children_cpu())
+
+    def stage(self, name: str, items: Optional[int] = None) -> Stage:
+        """Starts recording a stage.
+
+        Args:
+            name: Name of the stage, e.g. `preprocess` or `depth 1`.
+            items: Number of items processed by the stage, can be set later.
+
+        Returns:
+            Running stage, stopped on exit of the with block or by `Stage.stop`.
+        """
+        stage = Stage(name, items=items, interval=self.interval)
+        with self.__lock:
+            self.stages.append(stage)
+        return stage
+
+    def report(self) -> Dict[str, Any]:
+        """Run report of the stopped stages.
+
+        Returns:
+            JSON serializable report with the totals of the run and the measures of each stage.
+        """
+        wall, cpu, child = self.__start
+        with self.__lock:
+            stages = [stage.to_dict() for stage in self.stages if not stage.running]
+        return {
+            "name": self.name,
+            "started": self.started.isoformat(),
+            "wall_seconds": round(time.perf_counter() - wall, 4),
+            "cpu_seconds": round(time.process_time() - cpu, 4),
+            "children_cpu_seconds": round(children_cpu() - child, 4),
+            "peak_rss": peak_rss(),
+            "pid": os.getpid(),
+            "stages": stages,
+        }
+
+    def save(self, path: str) -> str:
+        """Writes the run report.
+
+        Args:
+            path: File path of the JSON report.
+
+        Returns:
+            Path of the report.
+        """
+        with open(path, "w", encoding="UTF-8") as file:
+            json.dump(self.report(), file, indent=2)
+        return path
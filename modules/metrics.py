@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+from logging import Logger
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from modules.checker import folder
+from modules.graph import Graph
+
+# Node metrics computed by `Graph` methods of the same name
+METRICS = ("in_degree", "out_degree", "pagerank", "eigenvector_centrality")
+# Power iteration metrics, warm started from the cached values of the previous network file
+ITERATIVE_METRICS = ("pagerank", "eigenvector_centrality")
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """Hash of the content of a file.
+
+    Args:
+        path: Path of the file.
+        block_size: Number of bytes hashed at a time.
+
+    Returns:
+        Hex digest of the file.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class GraphMetrics:
+    """Node metrics of a crawl graph, computed at most once per network file.
+
+    Every metric is stored as a `.npy` array in `cache_dir` along with the
+    node urls, keyed by the hash of the network file. A rerun on the same
+    file loads the arrays as memory maps without parsing the file, and a
+    changed file warm starts the power iterations from the previous values.
+
+    Attributes:
+        json_file: The json, or binary, network structure of the crawled data.
+        logger: A logger object to log the output.
+        cache_dir: Dir path of the cached metrics, `metrics` (or `host_metrics`) next to `json_file` if None.
+        hosts: True for the metrics of the weighted host graph else of the page graph.
+    """
+
+    meta_file = "meta.json"
+    urls_file = "urls.txt"
+
+    def __init__(self, json_file: str, logger: Logger, cache_dir: Optional[str] = None, hosts: bool = False):
+        self.json_file = json_file
+        self.logger = logger
+        self.hosts = hosts
+        self.cache_dir = folder(
+            cache_dir
+            or os.path.join(os.path.dirname(os.path.abspath(json_file)), "host_metrics" if hosts else "metrics")
+        )
+        # Page and host metrics of the same file never share a key
+        self.key = f"{file_digest(json_file)}-hosts" if hosts else file_digest(json_file)
+
+        self.__graph: Optional[Graph] = None
+        self.__values: Dict[str, np.ndarray] = {}
+
+        self.__meta = {"key": self.key, "nodes": None, "metrics": {}}
+        self.__previous_urls: Optional[List[str]] = None
+        self.__previous: Dict[str, dict] = {}
+        meta_path = os.path.join(self.cache_dir, self.meta_file)
+        if os.path.isfile(meta_path):
+            with open(meta_path, "r", encoding="UTF-8") as file:
+                meta = json.load(file)
+            if meta.get("key") == self.key:
+                self.__meta = meta
+            else:
+                # Values of an other network file, only used to warm start the power iterations
+                self.__previous = {name: meta["metrics"][name] for name in ITERATIVE_METRICS if name in meta["metrics"]}
+
+    @property
+    def graph(self) -> Graph:
+        """CSR graph of the network file, loaded on first use."""
+        if self.__graph is None:
+            self.__graph = Graph.from_file(self.json_file, hosts=self.hosts, logger=self.logger)
+        return self.__graph
+
+    @property
+    def urls(self) -> List[str]:
+        """Url, or host, of each node, read from the cache when available."""
+        path = os.path.join(self.cache_dir, self.urls_file)
+        if self.__graph is None and self.__meta["nodes"] is not None and os.path.isfile(path):
+            with open(path, "r", encoding="UTF-8") as file:
+                return file.read().splitlines()
+        return self.graph.urls.tolist()
+
+    def cached(self, name: str) -> bool:
+        """Checks whether a metric of the current network file is cached.
+
+        Args:
+            name: Name of the metric.
+
+        Returns:
+            True if the metric is in memory or on disk.
+        """
+        return name in self.__values or name in self.__meta["metrics"]
+
+    def get(self, name: str) -> np.ndarray:
+        """Metric of each node, from the cache or computed and cached.
+
+        Args:
+            name: One of `METRICS`.
+
+        Returns:
+            Metric of each node, in the node order of `Graph`.
+        """
+        if name not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+        if name in self.__values:
+            return self.__values[name]
+
+        if name in self.__meta["metrics"]:
+            values = np.load(os.path.join(self.cache_dir, f"{name}.npy"), mmap_mode="r")
+            self.logger.debug("Metric loaded :: %s", name)
+        else:
+            values = self.__compute(name)
+        self.__values[name] = values
+        return values
+
+    def compute_all(self) -> Dict[str, np.ndarray]:
+        """Every metric of `METRICS`.
+
+        Returns:
+            Metric name to the metric of each node.
+        """
+        return {name: self.get(name) for name in METRICS}
+
+    def __compute(self, name: str) -> np.ndarray:
+        kwargs = {}
+        if name in self.__previous:
+            previous = np.load(os.path.join(self.cache_dir, f"{name}.npy"))
+            kwargs["start"] = self.graph.warm_start(self.__read_previous_urls(), previous)
+
+        values = getattr(self.graph, name)(**kwargs)
+        info = {}
+        if isinstance(values, tuple):
+            values, convergence = values
+            info = {key: value for key, value in convergence.items() if key != "errors"}
+            info["warm_start"] = "start" in kwargs
+            if convergence["converged"]:
+                self.logger.debug("%s converged :: %d iteration(s)", name, convergence["iterations"])
+            else:
+                self.logger.warning(
+                    "%s did not converge :: error %.2E after %d iteration(s), tolerance %.2E",
+                    name,
+                    convergence["error"],
+                    convergence["iterations"],
+                    convergence["tolerance"],
+                )
+        self.__save(name, values, info)
+        return values
+
+    def __read_previous_urls(self) -> List[str]:
+        if self.__previous_urls is None:
+            with open(os.path.join(self.cache_dir, self.urls_file), "r", encoding="UTF-8") as file:
+                self.__previous_urls = file.read().splitlines()
+        return self.__previous_urls
+
+    def __save(self, name: str, values: np.ndarray, info: dict) -> None:
+        if self.__meta["nodes"] is None:
+            if self.__previous:
+                # The previous urls are still needed to warm start the other metrics
+                self.__read_previous_urls()
+            self.__write(self.urls_file, lambda path: self.__write_urls(path))
+            self.__meta["nodes"] = self.graph.n_nodes
+
+        self.__write(f"{name}.npy", lambda path: self.__write_array(path, values))
+        self.__meta["metrics"][name] = info
+        self.__previous.pop(name, None)
+        self.__write(self.meta_file, lambda path: self.__write_meta(path))
+
+    def __write_urls(self, path: str) -> None:
+        with open(path, "w", encoding="UTF-8") as file:
+            file.writelines(f"{url}\n" for url in self.graph.urls)
+
+    @staticmethod
+    def __write_array(path: str, values: np.ndarray) -> None:
+        # Saved through a file object, np.save would append `.npy` to the temporary path
+        with open(path, "wb") as file:
+            np.save(file, values)
+
+    def __write_meta(self, path: str) -> None:
+        with open(path, "w", encoding="UTF-8") as file:
+            json.dump(self.__meta, file, indent=2)
+
+    def __write(self, name: str, write) -> None:
+        # Written to a temporary file first so that readers never see a partial file
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = f"{path}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
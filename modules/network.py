@@ -0,0 +1,257 @@
+"""Compact binary, memory-mappable network structure.
+
+Layout of a `network_structure.bin` file, little endian, every section aligned to 8 bytes:
+
+    header      magic, version, flags, number of urls, links, crawled pages and url bytes
+    offsets     uint64[urls + 1], url `i` is `strings[offsets[i]:offsets[i + 1]]`
+    strings     utf-8 urls, sorted
+    indptr      id[urls + 1], links of url `i` are `indices[indptr[i]:indptr[i + 1]]`
+    indices     id[links], sorted target url id of each link
+    order       id[crawled], url id of each crawled page in crawl order
+
+Ids are int32, or int64 if the `FLAG_INT64` flag is set.
+
+Usage:
+    python -m modules.network network_structure.json network_structure.bin
+    python -m modules.network network_structure.bin network_structure.json
+"""
+
+import argparse
+import json
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Type hinting aliases
+Network = Dict[str, List[str]]
+
+MAGIC = b"DSPIDNET"
+VERSION = 1
+FLAG_INT64 = 1
+# magic, version, flags, urls, links, crawled pages, url bytes
+HEADER = struct.Struct("<8sIIQQQQ")
+HEADER_SIZE = 64
+# Output formats of the crawler network structure
+NETWORK_FORMATS = ("json", "binary")
+
+
+def is_binary(path: str) -> bool:
+    """Checks whether a file is a binary network structure.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        True if the file starts with the binary magic.
+    """
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def _aligned(size: int) -> int:
+    return -size % 8
+
+
+class UrlTable:
+    """Sorted url strings of a binary network structure, decoded on access.
+
+    Attributes:
+        offsets: Start of each url in `strings`, and the end of the last one.
+        strings: Concatenated utf-8 urls.
+    """
+
+    def __init__(self, offsets: np.ndarray, strings: np.ndarray):
+        self.offsets = offsets
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __bytes(self, i: int) -> bytes:
+        return self.strings[self.offsets[i] : self.offsets[i + 1]].tobytes()
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray]) -> Union[str, np.ndarray]:
+        if isinstance(key, (int, np.integer)):
+            return self.__bytes(int(key) % len(self)).decode("utf-8")
+        indices = np.arange(len(self))[key]
+        return np.array([self.__bytes(i).decode("utf-8") for i in indices.tolist()], dtype=object)
+
+    def __iter__(self) -> Iterator[str]:
+        strings, offsets = self.strings.tobytes(), self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield strings[start:end].decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        """Every url."""
+        return list(self)
+
+    def index(self, url: str) -> int:
+        """Id of an url by binary search.
+
+        Args:
+            url: Url to find.
+
+        Returns:
+            Id of the url.
+
+        Raises:
+            KeyError: The url is not in the table.
+        """
+        key = url.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.__bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(self) or self.__bytes(low) != key:
+            raise KeyError(url)
+        return low
+
+
+class NetworkFile:
+    """Memory map of a binary network structure, opened without reading the urls or the links.
+
+    Attributes:
+        path: Path of the file.
+        urls: Sorted url table.
+        indptr: Links of url `i` are `indices[indptr[i]:indptr[i + 1]]`.
+        indices: Target url id of each link.
+        order: Url id of each crawled page in crawl order.
+
+    Raises:
+        ValueError: The file is not a binary network structure of a supported version.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(buffer) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a binary network structure")
+        magic, version, flags, n_urls, n_links, n_crawled, n_bytes = HEADER.unpack(buffer[: HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary network structure")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary network structure version {version}, expected {VERSION}")
+        dtype = np.dtype(np.int64 if flags & FLAG_INT64 else np.int32)
+
+        position = HEADER_SIZE
+
+        def section(count: int, section_dtype: np.dtype) -> np.ndarray:
+            nonlocal position
+            size = count * np.dtype(section_dtype).itemsize
+            array = buffer[position : position + size].view(section_dtype)
+            position += size + _aligned(size)
+            return array
+
+        offsets = section(n_urls + 1, np.dtype(np.uint64))
+        self.urls = UrlTable(offsets, section(n_bytes, np.dtype(np.uint8)))
+        self.indptr = section(n_urls + 1, dtype)
+        self.indices = section(n_links, dtype)
+        self.order = section(n_crawled, dtype)
+
+    @property
+    def seed(self) -> int:
+        """Url id of the first crawled page."""
+        return int(self.order[0]) if len(self.order) else 0
+
+    def items(self) -> Iterator[Tuple[str, List[str]]]:
+        """Streams the crawled pages and their links in crawl order, like `dict.items` of the json structure."""
+        for i in self.order.tolist():
+            links = self.indices[self.indptr[i] : self.indptr[i + 1]]
+            yield self.urls[i], self.urls[links].tolist()
+
+    def to_dict(self) -> Network:
+        """Network structure of the crawled pages, their links sorted by url."""
+        return dict(self.items())
+
+
+def write_binary(path: str, data: Network) -> str:
+    """Writes a network structure to a binary file, replaced atomically.
+
+    Duplicate links are merged and the links of a page are sorted by url.
+
+    Args:
+        path: Path of the binary file.
+        data: Links of every crawled url.
+
+    Returns:
+        Path of the binary file.
+    """
+    urls = sorted(set(data).union(*data.values()))
+    ids = {url: i for i, url in enumerate(urls)}
+    n_links = sum(len(links) for links in data.values())
+    dtype = np.dtype(np.int64 if max(len(urls), n_links) >= np.iinfo(np.int32).max else np.int32)
+
+    sources = np.repeat(
+        np.fromiter((ids[url] for url in data), dtype=np.int64, count=len(data)),
+        np.fromiter((len(links) for links in data.values()), dtype=np.int64, count=len(data)),
+    )
+    targets = np.fromiter((ids[link] for links in data.values() for link in links), dtype=np.int64, count=n_links)
+    # Sorted unique links
+    pairs = np.unique(sources * max(len(urls), 1) + targets)
+    sources, targets = np.divmod(pairs, max(len(urls), 1))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=len(urls)))])
+
+    strings = [url.encode("utf-8") for url in urls]
+    offsets = np.zeros(len(urls) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(string) for string in strings], dtype=np.uint64)
+    order = np.fromiter((ids[url] for url in data), dtype=dtype, count=len(data))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        flags = FLAG_INT64 if dtype == np.int64 else 0
+        header = HEADER.pack(MAGIC, VERSION, flags, len(urls), len(targets), len(order), int(offsets[-1]))
+        file.write(header.ljust(HEADER_SIZE, b"\0"))
+        for section in (offsets, b"".join(strings), indptr.astype(dtype), targets.astype(dtype), order):
+            raw = section if isinstance(section, bytes) else section.tobytes()
+            file.write(raw + b"\0" * _aligned(len(raw)))
+    os.replace(tmp_path, path)
+    return path
+
+
+def json_to_binary(json_path: str, binary_path: Optional[str] = None) -> str:
+    """Converts a `network_structure.json` file to the binary format.
+
+    Args:
+        json_path: Path of the json network structure.
+        binary_path: Path of the binary file, `json_path` with a `.bin` extension if None.
+
+    Returns:
+        Path of the binary file.
+    """
+    with open(json_path, "r", encoding="UTF-8") as file:
+        data = json.load(file)
+    return write_binary(binary_path or f"{os.path.splitext(json_path)[0]}.bin", data)
+
+
+def binary_to_json(binary_path: str, json_path: Optional[str] = None) -> str:
+    """Converts a binary network structure to the json format.
+
+    Args:
+        binary_path: Path of the binary network structure.
+        json_path: Path of the json file, `binary_path` with a `.json` extension if None.
+
+    Returns:
+        Path of the json file.
+    """
+    json_path = json_path or f"{os.path.splitext(binary_path)[0]}.json"
+    with open(json_path, "w", encoding="UTF-8") as file:
+        json.dump(NetworkFile(binary_path).to_dict(), file, indent=2, sort_keys=False)
+    return json_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a network structure between the json and binary formats")
+    parser.add_argument("input", help="json or binary network structure")
+    parser.add_argument("output", nargs="?", default=None, help="Converted file. (Default: input with a new extension)")
+    args = parser.parse_args()
+    path = binary_to_json(args.input, args.output) if is_binary(args.input) else json_to_binary(args.input, args.output)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterator, List, Optional, Tuple
+
+import contractions
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+# Number of useful words kept from each document
+MAX_WORDS = 100
+
+# Urls and tags are removed in a single pass
+_NOISE = re.compile(r"https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+[/\w]*|www\.[^\s]+|<[^>]*>")
+_NON_ALPHA = re.compile(r"[^a-zA-Z]")
+_TOKEN = re.compile(r"\S+")
+_SPACE = re.compile(r"\s")
+
+_STOP_WORDS: Optional[FrozenSet[str]] = None
+_LEMMATIZER: Optional[WordNetLemmatizer] = None
+
+
+def load_corpora() -> None:
+    """Loads the NLTK stop words and lemmatizer once per process."""
+    global _STOP_WORDS, _LEMMATIZER
+    if _STOP_WORDS is None:
+        _STOP_WORDS = frozenset(stopwords.words("english"))
+        _LEMMATIZER = WordNetLemmatizer()
+
+
+@lru_cache(maxsize=1 << 18)
+def normalise_token(token: str) -> Tuple[str, ...]:
+    """Expanded, lemmatized, non stop words of a lowercase alphabetic token.
+
+    Documents share most of their vocabulary so the result is memoised.
+
+    Args:
+        token: Lowercase alphabetic token.
+
+    Returns:
+        Words kept from the token.
+    """
+    load_corpora()
+    words = []
+    for word in contractions.fix(token).split():
+        if word not in _STOP_WORDS:
+            word = _LEMMATIZER.lemmatize(word)
+            if word.isalpha():
+                words.append(word)
+    return tuple(words)
+
+
+def text_windows(text: str, size: int = 4096) -> Iterator[str]:
+    """Splits a text at whitespaces outside of tags.
+
+    Urls and tags never span two windows, so each window is cleaned on its own
+    and the rest of a long document is never scanned once enough words are found.
+
+    Args:
+        text: Scraped text of the document.
+        size: Minimum length of a window.
+
+    Yields:
+        Consecutive windows of the text.
+    """
+    start, length = 0, len(text)
+    while start < length:
+        end = start + size
+        while end < length:
+            space = _SPACE.search(text, end)
+            end = space.start() if space else length
+            # Stop unless the window ends inside a tag
+            if text.rfind("<", start, end) <= text.rfind(">", start, end):
+                break
+            closing = text.find(">", end)
+            end = length if closing == -1 else closing + 1
+        yield text[start:end]
+        start = end
+
+
+def preprocess_text(text: str, max_words: int = MAX_WORDS) -> str:
+    """Normalises a document into its first lemmatized, non stop words.
+
+    The text is consumed window by window and the scan stops as soon as `max_words` words are found.
+
+    Args:
+        text: Scraped text of the document.
+        max_words: Number of words kept.
+
+    Returns:
+        Space separated words.
+    """
+    words: List[str] = []
+    for window in text_windows(text):
+        for match in _TOKEN.finditer(_NOISE.sub("", window)):
+            # Remove non-alphabetic characters and convert to lowercase
+            token = _NON_ALPHA.sub("", match.group().lower())
+            if token:
+                words.extend(normalise_token(token))
+                if len(words) >= max_words:
+                    return " ".join(words[:max_words])
+    return " ".join(words)
+
+
+def preprocess_batch(texts: List[str]) -> List[str]:
+    """Preprocesses a batch of documents, the unit of work of the process pool.
+
+    Args:
+        texts: Scraped text of the documents.
+
+    Returns:
+        Preprocessed documents.
+    """
+    return [preprocess_text(text) for text in texts]
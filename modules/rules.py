@@ -0,0 +1,223 @@
+import hashlib
+import json
+import mmap
+import os
+from logging import Logger
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import yara as _yara
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res", "keywords.yar")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "darkspider", "yara")
+RULE_EXTENSIONS = (".yar", ".yara")
+# Extension of the yara matches written next to a scraped page
+MATCHES_SUFFIX = ".yara.json"
+
+# Type hinting aliases
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+YaraString = Tuple[int, str, bytes]
+YaraMatch = Dict[str, Union[str, List[str], Dict[str, Union[str, int]], List[YaraString]]]
+
+
+def rule_files(paths: Iterable[str]) -> List[str]:
+    """Expands rule files and directories into a sorted list of rule files.
+
+    Args:
+        paths: Rule files or directories containing `.yar`/`.yara` files.
+
+    Returns:
+        Absolute paths of all the rule files without duplicates.
+
+    Raises:
+        FileNotFoundError: If a path does not exist.
+    """
+    files = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.update(os.path.join(root, name) for name in names if name.lower().endswith(RULE_EXTENSIONS))
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            raise FileNotFoundError(f"Yara rule path not found :: {path}")
+    return sorted(files)
+
+
+def rules_digest(files: List[str]) -> str:
+    """Hash of the rule sources used as the compiled rules cache key.
+
+    Note:
+        Files pulled in with `include` directives are not part of the digest.
+
+    Args:
+        files: Rule files to hash.
+
+    Returns:
+        Hex digest of the yara version, file paths and their contents.
+    """
+    digest = hashlib.sha256(_yara.__version__.encode())
+    for file in files:
+        digest.update(file.encode("UTF-8") + b"\0")
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def namespaces(files: List[str]) -> Dict[str, str]:
+    """Unique yara namespace for each rule file derived from its name.
+
+    Args:
+        files: Rule files.
+
+    Returns:
+        Dictionary mapping namespace to rule file.
+
+        {"keywords": "/res/keywords.yar", "keywords_1": "/extra/keywords.yara"}
+    """
+    filepaths = {}
+    for file in files:
+        name = base = os.path.splitext(os.path.basename(file))[0]
+        index = 0
+        while name in filepaths:
+            index += 1
+            name = f"{base}_{index}"
+        filepaths[name] = file
+    return filepaths
+
+
+def compile_rules(
+    paths: Optional[Iterable[str]] = None, cache_dir: Optional[str] = CACHE_DIR, logger: Optional[Logger] = None
+) -> _yara.Rules:
+    """Compiles yara rules, reusing a compiled copy from the cache when the sources are unchanged.
+
+    A single rule file is compiled in the `default` namespace, multiple files
+    get a namespace each named after the file.
+
+    Args:
+        paths: Rule files or directories. Defaults to `res/keywords.yar`.
+        cache_dir: Dir path for compiled rules. Caching is disabled if None.
+        logger: A logger object to log the output.
+
+    Returns:
+        Compiled yara rules.
+    """
+    files = rule_files(paths or [DEFAULT_RULES])
+    if not files:
+        raise FileNotFoundError("No yara rule files found")
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, f"{rules_digest(files)}.yarc")
+        if os.path.isfile(cache_file):
+            try:
+                rules = _yara.load(filepath=cache_file)
+                if logger:
+                    logger.debug("Yara rules loaded :: %s", cache_file)
+                return rules
+            except _yara.Error as err:
+                if logger:
+                    logger.debug("Yara cache Error :: %s", cache_file, exc_info=err)
+
+    if len(files) == 1:
+        rules = _yara.compile(filepath=files[0])
+    else:
+        rules = _yara.compile(filepaths=namespaces(files))
+    if logger:
+        logger.debug("Yara rules compiled :: %d file(s)", len(files))
+
+    if cache_file is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Save to a temporary file first so that concurrent runs never load a partial file
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            rules.save(filepath=tmp_file)
+            os.replace(tmp_file, cache_file)
+        except (OSError, _yara.Error) as err:
+            if logger:
+                logger.debug("Yara cache Error :: %s", cache_file, exc_info=err)
+
+    return rules
+
+
+def match(rules: _yara.Rules, data: Buffer, target: str = "html") -> List[YaraMatch]:
+    """Matches the rules against a buffer without copying or decoding it.
+
+    Args:
+        rules: Compiled yara rules.
+        data: Bytes-like object to scan, e.g. `bytes`, `memoryview` or `mmap`.
+        target: Name of the scanned buffer stored with each match.
+
+    Returns:
+        List of `YaraMatch` for every matching rule with the following format:
+
+        [{
+            "target": "html",
+            "rule": "keyword_search",
+            "namespace": "default",
+            "tags": [],
+            "meta": {"author": "@the-siegfried", "score": 90},
+            "strings": [(124, "$a", b"website"), (574, "$b", b"physics laboratory")],
+        }]
+    """
+    return [
+        {
+            "target": target,
+            "rule": yara_match.rule,
+            "namespace": yara_match.namespace,
+            "tags": list(yara_match.tags),
+            "meta": dict(yara_match.meta),
+            "strings": [
+                (instance.offset, string.identifier, instance.matched_data)
+                for string in yara_match.strings
+                for instance in string.instances
+            ],
+        }
+        for yara_match in rules.match(data=data)
+    ]
+
+
+def matches_summary(matches: List[YaraMatch]) -> str:
+    """One line summary of yara matches for the log.
+
+    Args:
+        matches: Matches of `match`.
+
+    Returns:
+        Target, namespace, rule and matched string identifiers of every match, e.g.
+        `html:default.keyword_search[$a,$e]`.
+    """
+    return ", ".join(
+        f"{item['target']}:{item['namespace']}.{item['rule']}"
+        f"[{','.join(sorted({identifier for _, identifier, _ in item['strings']}))}]"
+        for item in matches
+    )
+
+
+def write_matches(path: str, matches: List[YaraMatch]) -> str:
+    """Writes yara matches to a JSON file, e.g. next to the scraped page.
+
+    The matched data is decoded as utf-8, undecodable bytes are backslash escaped.
+
+    Args:
+        path: Path of the JSON file.
+        matches: Matches of `match`.
+
+    Returns:
+        Path of the JSON file.
+    """
+    data = [
+        {
+            **item,
+            "strings": [
+                {"offset": offset, "identifier": identifier, "data": data.decode("utf-8", "backslashreplace")}
+                for offset, identifier, data in item["strings"]
+            ],
+        }
+        for item in matches
+    ]
+    with open(path, "w", encoding="UTF-8") as file:
+        json.dump(data, file, indent=2)
+    return path
@@ -0,0 +1,190 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Type hinting aliases
+Growth = Dict[str, Union[int, float]]
+Top = Dict[str, List[Dict[str, Union[str, int]]]]
+
+
+class GraphStats:
+    """Degree counters of a crawl graph, updated as the pages are crawled.
+
+    The urls are interned to integer ids in the order they are seen and the
+    degrees are kept in arrays grown by doubling, so that the degrees, the
+    graph size and its growth per depth are known at any point of the crawl
+    without reading the network structure. Links are counted once per
+    crawled page, like the merged links of `Graph`.
+
+    Attributes:
+        top_k: Number of urls of largest in and out degree in the summary.
+        n_edges: Number of links of the crawled pages.
+        n_crawled: Number of crawled pages.
+        growth: Size of the graph at the end of each depth.
+    """
+
+    stats_file = "graph_stats.json"
+    degree_file = "graph_stats.npz"
+
+    def __init__(self, capacity: int = 1024, top_k: int = 10):
+        self.top_k = top_k
+        self.__ids: Dict[str, int] = {}
+        self.__urls: List[str] = []
+        self.__in_degree = np.zeros(capacity, dtype=np.int64)
+        self.__out_degree = np.zeros(capacity, dtype=np.int64)
+        self.__crawled = np.zeros(capacity, dtype=bool)
+        self.n_edges = 0
+        self.n_crawled = 0
+        self.growth: List[Growth] = []
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of urls, crawled or only seen as link targets."""
+        return len(self.__ids)
+
+    @property
+    def n_targets_only(self) -> int:
+        """Number of urls only seen as link targets, i.e. never crawled."""
+        return self.n_nodes - self.n_crawled
+
+    @property
+    def in_degree(self) -> np.ndarray:
+        """Number of incoming links of each url, in the order they were seen."""
+        return self.__in_degree[: self.n_nodes]
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        """Number of outgoing links of each url, 0 for the urls not crawled yet."""
+        return self.__out_degree[: self.n_nodes]
+
+    def __intern(self, url: str) -> int:
+        index = self.__ids.setdefault(url, len(self.__ids))
+        if index == len(self.__urls):
+            self.__urls.append(url)
+        if index == len(self.__crawled):
+            capacity = 2 * len(self.__crawled)
+            self.__in_degree = np.resize(self.__in_degree, capacity)
+            self.__out_degree = np.resize(self.__out_degree, capacity)
+            self.__crawled = np.resize(self.__crawled, capacity)
+            self.__in_degree[index:] = 0
+            self.__out_degree[index:] = 0
+            self.__crawled[index:] = False
+        return index
+
+    def add(self, url: str, links: Iterable[str]) -> None:
+        """Counts the links of a crawled page, a page crawled again is ignored.
+
+        Args:
+            url: Url of the crawled page.
+            links: Links of the page.
+        """
+        source = self.__intern(url)
+        if self.__crawled[source]:
+            return
+        targets = np.fromiter({self.__intern(link) for link in links}, dtype=np.int64)
+        self.__crawled[source] = True
+        self.n_crawled += 1
+        self.__in_degree[targets] += 1
+        self.__out_degree[source] = len(targets)
+        self.n_edges += len(targets)
+
+    def end_depth(self, depth: int, seconds: float) -> Growth:
+        """Records the size of the graph at the end of a depth.
+
+        Args:
+            depth: Depth of the crawl, from 1.
+            seconds: Duration of the depth.
+
+        Returns:
+            Size of the graph and the number of urls found during the depth.
+        """
+        previous = self.growth[-1]["nodes"] if self.growth else 0
+        self.growth.append(
+            {
+                "depth": depth,
+                "nodes": self.n_nodes,
+                "new_nodes": self.n_nodes - previous,
+                "edges": self.n_edges,
+                "crawled": self.n_crawled,
+                "targets_only": self.n_targets_only,
+                "seconds": seconds,
+            }
+        )
+        return self.growth[-1]
+
+    def top(self, k: Optional[int] = None) -> Top:
+        """Urls of largest in and out degree, in linear time.
+
+        Args:
+            k: Number of urls of each degree, `top_k` if None.
+
+        Returns:
+            Url and degree of the `k` urls of largest degree, by decreasing degree then order seen.
+        """
+        k = self.top_k if k is None else k
+        top = {}
+        for name, degree in (("in_degree", self.in_degree), ("out_degree", self.out_degree)):
+            ids = np.arange(len(degree))
+            if 0 < k < len(degree):
+                # Every url above the k-th largest degree and the first ones seen at that degree
+                threshold = np.partition(degree, len(degree) - k)[len(degree) - k]
+                above = np.flatnonzero(degree > threshold)
+                ids = np.concatenate([above, np.flatnonzero(degree == threshold)[: k - len(above)]])
+            ids = ids[np.lexsort((ids, -degree[ids]))][: max(k, 0)]
+            top[name] = [{"url": self.__urls[i], "degree": int(degree[i])} for i in ids.tolist()]
+        return top
+
+    def summary(self) -> Dict[str, Union[int, List[Growth], Top]]:
+        """Size of the graph, its growth per depth and its urls of largest degree."""
+        return {
+            "nodes": self.n_nodes,
+            "edges": self.n_edges,
+            "crawled": self.n_crawled,
+            "targets_only": self.n_targets_only,
+            "growth": self.growth,
+            "top": self.top(),
+        }
+
+    def save(self, out_path: str) -> Tuple[str, str]:
+        """Snapshots the summary and the degree arrays in `out_path`.
+
+        Both files are replaced atomically, so a snapshot can be read while the crawl goes on.
+
+        Args:
+            out_path: Dir path of the snapshot.
+
+        Returns:
+            Paths of the summary and of the degree arrays.
+        """
+        stats_path = os.path.join(out_path, self.stats_file)
+        with open(f"{stats_path}.tmp", "w", encoding="UTF-8") as file:
+            json.dump(self.summary(), file, indent=2)
+        os.replace(f"{stats_path}.tmp", stats_path)
+
+        degree_path = os.path.join(out_path, self.degree_file)
+        with open(f"{degree_path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                in_degree=self.in_degree,
+                out_degree=self.out_degree,
+                crawled=self.__crawled[: self.n_nodes],
+            )
+        os.replace(f"{degree_path}.tmp", degree_path)
+        return stats_path, degree_path
+
+    @classmethod
+    def load(cls, out_path: str) -> Tuple[Dict[str, Union[int, List[Growth], Top]], Dict[str, np.ndarray]]:
+        """Reads the last snapshot of `out_path`.
+
+        Args:
+            out_path: Dir path of the snapshot.
+
+        Returns:
+            Summary and the `in_degree`, `out_degree` and `crawled` arrays.
+        """
+        with open(os.path.join(out_path, cls.stats_file), "r", encoding="UTF-8") as file:
+            summary = json.load(file)
+        with np.load(os.path.join(out_path, cls.degree_file)) as arrays:
+            return summary, dict(arrays)
@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from modules.graph import Graph
+
+# Bow-tie region of each label returned by `bow_tie`
+BOW_TIE = ("SCC", "IN", "OUT", "TENDRILS", "DISCONNECTED")
+# Number of largest component sizes listed in the report
+TOP_COMPONENTS = 10
+
+# Type hinting aliases
+Report = Dict[str, Union[int, float, str, Dict, List]]
+
+
+def components(graph: Graph, connection: str = "strong") -> Tuple[int, np.ndarray]:
+    """Strongly or weakly connected components, in linear time without recursion.
+
+    Args:
+        graph: Graph to decompose.
+        connection: `strong` or `weak`.
+
+    Returns:
+        Number of components and the component label of each node.
+    """
+    if not graph.n_nodes:
+        return 0, np.zeros(0, dtype=np.int32)
+    return csgraph.connected_components(graph.adjacency, directed=True, connection=connection)
+
+
+def reachable(adjacency: sparse.csr_matrix, sources: np.ndarray) -> np.ndarray:
+    """Nodes reachable from any of the sources by a single breadth first search.
+
+    A virtual node linked to every source is appended to the matrix, so the
+    search stays linear in the number of links whatever the number of sources.
+
+    Args:
+        adjacency: Sparse (n, n) matrix of the links, transposed to follow them backwards.
+        sources: Node ids to start from.
+
+    Returns:
+        Mask of the nodes reachable from the sources, sources included.
+    """
+    n = adjacency.shape[0]
+    mask = np.zeros(n, dtype=bool)
+    if not len(sources):
+        return mask
+    adjacency = adjacency.tocsr()
+    indptr = np.append(adjacency.indptr, adjacency.indptr[-1] + len(sources))
+    indices = np.concatenate([adjacency.indices, sources]).astype(adjacency.indices.dtype, copy=False)
+    augmented = sparse.csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n + 1, n + 1))
+    order = csgraph.breadth_first_order(augmented, n, directed=True, return_predecessors=False)
+    mask[order[1:]] = True
+    return mask
+
+
+def bow_tie(graph: Graph) -> np.ndarray:
+    """Bow-tie region of each node around the largest strongly connected component.
+
+    IN nodes reach the SCC, OUT nodes are reached from it, TENDRILS are
+    reached from IN or reach OUT without going through the SCC (tubes
+    included), and the other nodes are DISCONNECTED.
+
+    Args:
+        graph: Graph to classify.
+
+    Returns:
+        Index in `BOW_TIE` of the region of each node.
+    """
+    labels = np.full(graph.n_nodes, BOW_TIE.index("DISCONNECTED"), dtype=np.int8)
+    n_components, scc = components(graph, "strong")
+    if not n_components:
+        return labels
+
+    core = scc == np.bincount(scc).argmax()
+    reverse = graph.adjacency.T.tocsr()
+    core_nodes = np.flatnonzero(core)
+    out = reachable(graph.adjacency, core_nodes) & ~core
+    into = reachable(reverse, core_nodes) & ~core
+    rest = ~(core | into | out)
+    tendrils = rest & (reachable(graph.adjacency, np.flatnonzero(into)) | reachable(reverse, np.flatnonzero(out)))
+
+    labels[core] = BOW_TIE.index("SCC")
+    labels[into] = BOW_TIE.index("IN")
+    labels[out] = BOW_TIE.index("OUT")
+    labels[tendrils] = BOW_TIE.index("TENDRILS")
+    return labels
+
+
+def distances(graph: Graph, seed: int = 0) -> np.ndarray:
+    """Number of links on the shortest path from the seed to each node, by breadth first search.
+
+    Args:
+        graph: Graph to search.
+        seed: Node id of the seed, the first crawled page.
+
+    Returns:
+        Distance of each node, -1 if it isn't reachable.
+    """
+    n = graph.n_nodes
+    depth = np.full(n, -1, dtype=np.int64)
+    if not n:
+        return depth
+    adjacency = graph.adjacency
+    frontier = np.array([seed])
+    depth[seed] = 0
+    level = 0
+    # Level synchronous search, each link is scanned once over all the levels
+    while len(frontier):
+        level += 1
+        starts, ends = adjacency.indptr[frontier], adjacency.indptr[frontier + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        targets = np.unique(adjacency.indices[offsets])
+        frontier = targets[depth[targets] < 0]
+        depth[frontier] = level
+    return depth
+
+
+def component_stats(n_components: int, labels: np.ndarray) -> Dict[str, Union[int, List[int]]]:
+    """Summary of the sizes of the components.
+
+    Args:
+        n_components: Number of components.
+        labels: Component label of each node.
+
+    Returns:
+        Number of components and of single node components, and the largest sizes.
+    """
+    sizes = np.bincount(labels, minlength=n_components)
+    return {
+        "count": int(n_components),
+        "largest": int(sizes.max()) if n_components else 0,
+        "singletons": int((sizes == 1).sum()),
+        "sizes": np.sort(sizes)[::-1][:TOP_COMPONENTS].tolist(),
+    }
+
+
+def structure_report(graph: Graph, seed: Optional[int] = None) -> Report:
+    """Structural analysis of a crawl graph: SCCs, bow-tie, WCCs and reachability from the seed.
+
+    Every analysis is iterative and linear in the number of links.
+
+    Args:
+        graph: Graph to analyse.
+        seed: Node id of the seed, `graph.seed` if None.
+
+    Returns:
+        Report of the graph structure.
+    """
+    n = graph.n_nodes
+    seed = graph.seed if seed is None else seed
+    regions = np.bincount(bow_tie(graph), minlength=len(BOW_TIE))
+    depth = distances(graph, seed)
+    reached = depth[depth >= 0]
+    return {
+        "nodes": n,
+        "edges": graph.n_edges,
+        "scc": component_stats(*components(graph, "strong")),
+        "wcc": component_stats(*components(graph, "weak")),
+        "bow_tie": {
+            region: {"nodes": int(count), "fraction": float(count / n) if n else 0.0}
+            for region, count in zip(BOW_TIE, regions)
+        },
+        "seed": {
+            "url": str(graph.urls[seed]) if n else None,
+            "reachable": len(reached),
+            "fraction": float(len(reached) / n) if n else 0.0,
+            "max_depth": int(reached.max()) if len(reached) else 0,
+            "depths": np.bincount(reached).tolist(),
+        },
+    }
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from modules.autoencoder import SparseBatches, encode, fit_encoder
+
+
+class TestAutoencoderFunctions(unittest.TestCase):
+    """Unit test for Autoencoder module."""
+
+    def test_sparse_batches(self):
+        """SparseBatches unit test."""
+        matrix = sparse.random(10, 4, density=0.5, format="csr", dtype=np.float32, random_state=0)
+        batches = SparseBatches(matrix, batch_size=4)
+
+        self.assertEqual(3, len(batches))
+        x, y = batches[2]
+        np.testing.assert_array_equal(matrix[8:].toarray(), x)
+        np.testing.assert_array_equal(x, y)
+
+        # Shuffled batches still cover every row once per epoch
+        batches = SparseBatches(matrix, batch_size=4, shuffle=True, target=False)
+        for _ in range(2):
+            rows = np.vstack([batches[i][0] for i in range(len(batches))])
+            self.assertCountEqual(matrix.toarray().tolist(), rows.tolist())
+            batches.on_epoch_end()
+
+    def test_fit_encoder(self):
+        """fit_encoder unit test."""
+        matrix = sparse.random(50, 16, density=0.2, format="csr", dtype=np.float32, random_state=0)
+        encoder = fit_encoder(matrix, encoded_dimensions=2, epochs=1, batch_size=16)
+
+        result = encode(encoder, matrix)
+        self.assertEqual((50, 2), result.shape)
@@ -0,0 +1,344 @@
+import os
+import shutil
+import tarfile
+import unittest
+import zipfile
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from modules.checker import folder
+from modules.classifier import MODEL_FILES, REDUCER_FILES, Classifier, cluster_top_k, stratified_sample, top_k
+from modules.helper import assertMsg, setup_custom_logger
+
+DOCUMENTS = [
+    ("http://market.onion", "<p>Buy with bitcoin, escrow for every vendor listing</p>"),
+    ("http://forum.onion/thread", "Members reply to the thread and moderators close it"),
+    ("http://market.onion", "Duplicate url of the market page"),
+    ("http://news.onion/story", None),
+    ("http://news.onion/world", "Journalists report the world news headlines"),
+]
+
+
+class TestClassifierFunctions(unittest.TestCase):
+    """Unit test for Classifier module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "classifier")
+        cls.corpus = os.path.join(cls.path, "corpus.csv")
+        cls.logger = setup_custom_logger(
+            name="testlog",
+            filename=None,
+            verbose_=False,
+            filelog=False,
+            argv=None,
+        )
+
+    def setUp(self):
+        """Test Case Setup."""
+        folder(self.path)
+        pd.DataFrame(DOCUMENTS, columns=["url", "scrape_data"]).to_csv(self.corpus, index=False)
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree(os.path.dirname(self.path), ignore_errors=True)
+
+    def classifier(self, input_path: str, chunksize: int = 2) -> Classifier:
+        """Classifier of the test corpus."""
+        return Classifier(input_path=input_path, out_path=self.path, logger=self.logger, chunksize=chunksize)
+
+    def test_load_001(self):
+        """load unit test."""
+        chunks = list(self.classifier(self.corpus).load())
+
+        expected = [2, 2, 1]
+        result = [len(chunk) for chunk in chunks]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(["URL", "scrape_data"], chunks[0].columns.tolist())
+
+    def test_load_002(self):
+        """load unit test."""
+        parquet = os.path.join(self.path, "corpus.parquet")
+        pd.read_csv(self.corpus).to_parquet(parquet)
+
+        expected = pd.read_csv(self.corpus).rename(columns={"url": "URL"})
+        result = pd.concat(self.classifier(parquet).load(), ignore_index=True)
+        pd.testing.assert_frame_equal(expected, result)
+
+    def test_load_003(self):
+        """load unit test."""
+        extracted = os.path.join(self.path, "extracted")
+        for name, content in [
+            ("market.onion/_.html", b"<title>Market</title><p>bitcoin</p>"),
+            ("forum.onion/thread/1.html_.html", b"<p>reply</p><script>skip()</script>"),
+            ("forum.onion/notes.txt", b"not extracted"),
+        ]:
+            path = os.path.join(extracted, *name.split("/"))
+            folder(path, is_file=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+        expected = [("http://forum.onion/thread/1.html", "reply"), ("http://market.onion", "Market bitcoin")]
+
+        result = pd.concat(self.classifier(extracted).load())
+        self.assertCountEqual(expected, list(result.itertuples(index=False, name=None)))
+
+        archive = os.path.join(self.path, "extracted.zip")
+        with zipfile.ZipFile(archive, "w") as f:
+            for root, _, names in os.walk(extracted):
+                for name in names:
+                    f.write(os.path.join(root, name), os.path.relpath(os.path.join(root, name), self.path))
+
+        result = pd.concat(self.classifier(archive).load())
+        self.assertCountEqual(expected, list(result.itertuples(index=False, name=None)))
+
+    def test_clean(self):
+        """clean unit test."""
+        classifier = self.classifier(self.corpus)
+        seen = set()
+        result = [classifier.clean(chunk, seen)["URL"].tolist() for chunk in classifier.load()]
+
+        # Empty documents and urls of previous chunks are dropped
+        expected = [["http://market.onion", "http://forum.onion/thread"], [], ["http://news.onion/world"]]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_load_004(self):
+        """load unit test."""
+        extracted = os.path.join(self.path, "extracted")
+        for name, content in [
+            ("market.onion/_.html", b"<p>bitcoin</p>"),
+            ("forum.onion/threadid1_.html", b"<p>reply</p>"),
+            ("news.onion/_.html", b"<p>news</p>"),
+            (
+                "urls.csv",
+                b"File,URL\nmarket.onion/_.html,https://market.onion/\nforum.onion/threadid1_.html,"
+                b"http://forum.onion/thread?id=1\n",
+            ),
+        ]:
+            path = os.path.join(extracted, *name.split("/"))
+            folder(path, is_file=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+        # The indexed urls are recovered, the others are rebuilt from the file name
+        expected = [
+            ("https://market.onion/", "bitcoin"),
+            ("http://forum.onion/thread?id=1", "reply"),
+            ("http://news.onion", "news"),
+        ]
+        result = pd.concat(self.classifier(extracted + os.sep).load())
+        self.assertCountEqual(expected, list(result.itertuples(index=False, name=None)))
+
+        archive = os.path.join(self.path, "extracted.tar")
+        with tarfile.open(archive, "w") as f:
+            f.add(extracted, arcname="extracted")
+        result = pd.concat(self.classifier(archive).load())
+        self.assertCountEqual(expected, list(result.itertuples(index=False, name=None)))
+
+    def test_text_cache_dir(self):
+        """text_cache_dir unit test."""
+        expected = os.path.abspath(os.path.join("output", "a.com", "text"))
+        for path in (os.path.join("output", "a.com", "extracted"), os.path.join("output", "a.com", "extracted", "")):
+            result = Classifier.text_cache_dir(path)
+            self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_extracted_url(self):
+        """extracted_url unit test."""
+        expected = "http://a.com/b/c.html"
+        result = Classifier.extracted_url(os.path.join("a.com", "b", "c.html_.html"))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual("http://a.com", Classifier.extracted_url("a.com/_.html"))
+
+    def test_preprocess(self):
+        """preprocess unit test."""
+        classifier = self.classifier(self.corpus)
+        chunk = classifier.clean(pd.concat(classifier.load()))
+
+        expected = [
+            "buy bitcoin escrow every vendor listing",
+            "member reply thread moderator close",
+            "journalist report world news headline",
+        ]
+        for n_jobs in (1, 2):
+            classifier.n_jobs, classifier.batch_size = n_jobs, 1
+            try:
+                result = classifier.preprocess(chunk)["preprocessed"].tolist()
+            finally:
+                classifier.close()
+            self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_top_k(self):
+        """top_k unit test."""
+        matrix = sparse.csr_matrix([[0, 2, 1, 2], [0, 0, 0, 0], [5, 0, 0, 0]])
+        expected = [["b", "d"], ["", ""], ["a", ""]]
+        result = top_k(matrix, np.array(["a", "b", "c", "d"]), 2).tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_vectorize(self):
+        """vectorize unit test."""
+        text = pd.Series(["bitcoin bitcoin escrow vendor", "thread reply reply reply member", "bitcoin"])
+        counts, tfidf, result = self.classifier(self.corpus).vectorize(text)
+
+        expected = [["bitcoin", "escrow", "vendor"], ["reply", "member", "thread"], ["bitcoin", "", ""]]
+        self.assertEqual(expected, result[["Top Unigram 1", "Top Unigram 2", "Top Unigram 3"]].values.tolist())
+
+        self.assertEqual([2, 1, 1], counts[0].data.tolist())
+        self.assertTrue(sparse.isspmatrix_csr(tfidf), "Test Fail:: expected a sparse TF-IDF matrix")
+        self.assertEqual((3, 6), tfidf.shape, "Test Fail:: expected a TF-IDF column per unigram")
+        expected = (TfidfVectorizer().fit_transform(text).toarray().round(3) * 1000).astype(int)
+        np.testing.assert_array_equal(expected, tfidf.toarray())
+
+    def test_count_cached(self):
+        """count_cached unit test."""
+        cached = Classifier(
+            input_path=self.corpus,
+            out_path=self.path,
+            logger=self.logger,
+            feature_cache=os.path.join(self.path, "cache"),
+        )
+        chunk = cached.clean(pd.concat(cached.load()))
+        rows = cached.preprocess(chunk)["row"].to_numpy()
+        cached.feature_cache.flush()
+        self.assertEqual([0, 1, 2], rows.tolist())
+
+        text = self.classifier(self.corpus).preprocess(chunk)["preprocessed"]
+        expected = self.classifier(self.corpus)
+        counts, tfidf, top = expected.vectorize(text)
+        result = cached.count_cached(rows)
+        self.assertEqual(
+            expected.vectorizer.get_feature_names_out().tolist(), cached.vectorizer.get_feature_names_out().tolist()
+        )
+        np.testing.assert_array_equal(counts.toarray(), result.toarray())
+        result_tfidf, result_top = cached.weigh(result)
+        np.testing.assert_array_equal(tfidf.toarray(), result_tfidf.toarray())
+        pd.testing.assert_frame_equal(top, result_top)
+
+        # Unknown terms are dropped with the fitted vocabulary
+        more = pd.DataFrame({"URL": ["http://new.onion"], "scrape_data": ["bitcoin vendor unknownword"]})
+        rows = cached.preprocess(more)["row"].to_numpy()
+        cached.feature_cache.flush()
+        np.testing.assert_array_equal(
+            expected.vectorizer.transform(["bitcoin vendor unknownword"]).toarray(),
+            cached.count_cached(rows, fit=False).toarray(),
+        )
+
+        expected = {"hits": 0, "misses": 4, "hit_ratio": 0.0}
+        result = {key: cached.cache_report()[key] for key in expected}
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        cached.preprocess(chunk)
+        self.assertEqual(3, cached.cache_report()["hits"])
+        self.assertTrue(os.path.isfile(os.path.join(self.path, Classifier.cache_report_file)))
+
+    def test_encode(self):
+        """encode unit test."""
+        classifier = Classifier(
+            input_path=self.corpus, out_path=self.path, logger=self.logger, reducer="svd", svd_components=3
+        )
+        X_scaled = sparse.random(20, 8, density=0.5, format="csr", dtype=np.float32, random_state=0)
+
+        result = classifier.encode(X_scaled)
+        self.assertEqual((20, 3), result.shape)
+        np.testing.assert_allclose(result, classifier.encode(X_scaled, fit=False), rtol=1e-5)
+
+        with self.assertRaises(ValueError):
+            Classifier(input_path=self.corpus, out_path=self.path, logger=self.logger, reducer="pca")
+
+    def test_cluster_top_k(self):
+        """cluster_top_k unit test."""
+        counts = sparse.csr_matrix([[2, 0, 1, 0], [0, 1, 1, 0], [0, 0, 0, 9], [1, 0, 0, 1]])
+        expected = {0: ["a", "c", "b"], 4: ["a", "d", ""]}
+        result = cluster_top_k(counts, np.array([0, 0, -1, 4]), np.array(["a", "b", "c", "d"]))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_stratified_sample(self):
+        """stratified_sample unit test."""
+        groups = np.array(["a"] * 80 + ["b"] * 15 + ["c"] * 5)
+        result = stratified_sample(groups, 10)
+
+        expected = {"a": 8, "b": 1, "c": 1}
+        self.assertEqual(expected, {group: int((groups[result] == group).sum()) for group in "abc"})
+        self.assertEqual(sorted(set(result)), result.tolist(), "Test Fail:: expected sorted unique indexes")
+
+        # More groups than sampled items
+        self.assertEqual(5, len(stratified_sample(np.arange(20), 5)))
+
+    def test_sample(self):
+        """sample unit test."""
+        classifier = self.classifier(self.corpus)
+        urls = pd.Series([f"http://{host}.onion/{i}" for host in ("a", "b") for i in range(50)])
+        self.assertIsNone(classifier.sample(urls))
+
+        classifier.sample_size = 10
+        result = classifier.sample(urls)
+        self.assertEqual([5, 5], [int((result < 50).sum()), int((result >= 50).sum())])
+
+    def test_assign(self):
+        """assign unit test."""
+        classifier = self.classifier(self.corpus)
+        centers = np.repeat(np.eye(3) * 10, 150, axis=0)
+        X_encoded = centers + np.random.default_rng(0).normal(size=centers.shape)
+
+        labels = classifier.cluster(classifier.reduce(X_encoded))
+        classifier.n_jobs, classifier.assign_batch_size = 1, 100
+        result = classifier.assign(X_encoded)
+        self.assertEqual(len(X_encoded), len(result))
+        self.assertGreater((labels == result).mean(), 0.9, "Test Fail:: expected the fitted clusters to be assigned")
+
+    def test_label(self):
+        """label unit test."""
+        classifier = self.classifier(self.corpus)
+        data_vect = pd.DataFrame(
+            [
+                ("http://a.onion", "bitcoin", "escrow", ""),
+                ("http://b.onion", "reply", "", ""),
+                ("http://c.onion", "x", "", ""),
+            ],
+            columns=["URL", "Top Unigram 1", "Top Unigram 2", "Top Unigram 3"],
+        )
+        counts, _, _ = classifier.vectorize(pd.Series(["bitcoin escrow", "reply reply", "x"]))
+        result = classifier.label(data_vect, counts, np.array([0, 0, -1]))
+
+        expected = [["reply", "bitcoin", "escrow"], ["reply", "bitcoin", "escrow"], ["micellaneous"] * 3]
+        self.assertEqual(expected, result[["label_1", "label_2", "label_3"]].values.tolist())
+        self.assertEqual({0: ["reply", "bitcoin", "escrow"]}, classifier.cluster_labels)
+
+        # Fitted labels are reused, unknown clusters are labelled as noise
+        result = classifier.label(data_vect, None, np.array([7, 0, -1]), fit=False)
+        expected = [["micellaneous"] * 3, ["reply", "bitcoin", "escrow"], ["micellaneous"] * 3]
+        self.assertEqual(expected, result[["label_1", "label_2", "label_3"]].values.tolist())
+
+    def test_load_models(self):
+        """load_models unit test."""
+        classifier = self.classifier(self.corpus)
+        self.assertFalse(classifier.fitted())
+        with self.assertRaises(FileNotFoundError):
+            classifier.predict()
+
+        # Models saved with another reducer are neither fitted nor loaded
+        for name in list(MODEL_FILES.values()) + [REDUCER_FILES["svd"]]:
+            open(os.path.join(folder(classifier.model_dir), name), "wb").close()
+        self.assertEqual("svd", classifier.saved_reducer())
+        self.assertFalse(classifier.fitted())
+        with self.assertRaises(ValueError):
+            classifier.load_models()
+
+    def test_save(self):
+        """save unit test."""
+        classifier = self.classifier(self.corpus)
+        data_clust = pd.DataFrame(
+            [("http://market.onion", "bitcoin", "escrow", "", "market", "bitcoin", "escrow")],
+            columns=["URL", "Top Unigram 1", "Top Unigram 2", "Top Unigram 3", "label_1", "label_2", "label_3"],
+        )
+
+        # The labels of a predict run don't overwrite those of the fitted corpus
+        expected = [os.path.join(self.path, "clusterized.csv"), os.path.join(self.path, "predicted.csv")]
+        result = [classifier.save(data_clust), classifier.save(data_clust, classifier.predict_file)]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        expected = ["http://market.onion"]
+        result = pd.read_csv(result[1])["URL"].tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
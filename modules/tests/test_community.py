@@ -0,0 +1,161 @@
+import csv
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from requests.models import Response
+from scipy import sparse
+
+from modules.checker import folder
+from modules.classifier import LABEL_COLUMNS, TOP_COLUMNS, Classifier
+from modules.community import COLUMNS, host_labels, label_propagation, row_argmax, write_communities
+from modules.extractor import Extractor
+from modules.graph import Graph
+from modules.helper import assertMsg, setup_custom_logger
+from modules.tests.test_graph import random_network
+
+
+def cliques(n_cliques: int, size: int) -> dict:
+    """Network of cliques of pages on their own host, each clique links to the next one once."""
+    data = {}
+    for c in range(n_cliques):
+        for i in range(size):
+            data[f"http://{c}.onion/{i}"] = [f"http://{c}.onion/{j}" for j in range(size) if j != i]
+        data[f"http://{c}.onion/0"].append(f"http://{(c + 1) % n_cliques}.onion/1")
+    return data
+
+
+def mocked_get(url: str, *_, **__) -> Response:
+    """Page of each url."""
+    response = Response()
+    response.status_code, response._content = 200, f"<p>page {url}</p>".encode("utf-8")
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    return response
+
+
+class TestCommunityFunctions(unittest.TestCase):
+    """Unit test for Community module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "community")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_row_argmax(self):
+        """row_argmax unit test."""
+        votes = sparse.csr_matrix(np.array([[0, 3, 1], [2, 0, 2], [0, 0, 5]], dtype=np.float64))
+
+        expected = [1, 0, 2]
+        result = row_argmax(votes).tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_label_propagation(self):
+        """label_propagation unit test."""
+        data = cliques(4, 6)
+        data["http://alone.onion"] = ["http://alone.onion"]
+        graph = Graph.from_dict(data)
+        labels, convergence = label_propagation(graph)
+
+        expected = sorted([list(range(c * 6, (c + 1) * 6)) for c in range(4)] + [[24]])
+        result = sorted(np.flatnonzero(labels == label).tolist() for label in range(labels.max() + 1))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertTrue(convergence["converged"])
+        # Numbered by decreasing size
+        self.assertEqual(4, labels[graph.index("http://alone.onion")])
+
+    def test_label_propagation_seed(self):
+        """label_propagation determinism unit test."""
+        graph = Graph.from_dict(random_network())
+        labels, convergence = label_propagation(graph, seed=1)
+
+        np.testing.assert_array_equal(labels, label_propagation(graph, seed=1)[0])
+        self.assertEqual(graph.n_nodes, len(labels))
+        self.assertTrue(np.all(np.bincount(labels)[:-1] >= np.bincount(labels)[1:]))
+        self.assertEqual(len(convergence["errors"]), convergence["iterations"])
+
+        labels, convergence = label_propagation(Graph([], sparse.csr_matrix((0, 0))))
+        self.assertEqual(0, len(labels))
+        self.assertTrue(convergence["converged"])
+
+    def test_write_communities(self):
+        """write_communities unit test."""
+        data = cliques(3, 4)
+        graph, host_graph = Graph.from_dict(data), Graph.from_hosts(data)
+        labels, _ = label_propagation(graph)
+        host_communities, _ = label_propagation(host_graph)
+        path = write_communities(
+            os.path.join(folder(self.path), "communities.csv"), graph, labels, host_graph, host_communities
+        )
+        with open(path, "r", encoding="UTF-8", newline="") as file:
+            rows = list(csv.reader(file))
+
+        self.assertEqual(COLUMNS, rows[0])
+        expected = [[url, url.split("/")[2], str(label)] for url, label in zip(graph.urls, labels.tolist())]
+        result = [row[:3] for row in rows[1:]]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        expected = {row[1]: host_communities[host_graph.index(row[1])] for row in rows[1:]}
+        result = {row[1]: int(row[3]) for row in rows[1:]}
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_host_labels(self):
+        """host_labels unit test."""
+        data = {"http://a.onion/": ["http://[::1/x", "http://b.onion/"]}
+        graph, host_graph = Graph.from_dict(data), Graph.from_hosts(data)
+        hosts, by_host = host_labels(graph, host_graph, np.array([5, 7]))
+
+        # The page of the malformed href has no host
+        expected = [("a.onion", 5), ("", -1), ("b.onion", 7)]
+        result = list(zip(hosts.tolist(), by_host.tolist()))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    @mock.patch("requests.Session.get", side_effect=mocked_get)
+    def test_join_clusterized(self, _):
+        """communities and clusterized join unit test."""
+        # Urls whose scheme, query and trailing slash are lost in the extracted file names
+        data = {
+            "https://a.onion/": ["https://a.onion/list?page=2", "http://b.onion/post/"],
+            "https://a.onion/list?page=2": ["https://a.onion/"],
+            "http://b.onion/post/": ["http://b.onion/post?id=7"],
+            "http://b.onion/post?id=7": [],
+        }
+        graph = Graph.from_dict(data)
+        path = folder(self.path)
+        with open(os.path.join(path, "links.txt"), "w", encoding="UTF-8") as file:
+            file.write("\n".join(graph.urls))
+        logger = setup_custom_logger(name="testlog", filename=None, verbose_=False, filelog=False, argv=None)
+        extractor = Extractor(
+            website="https://a.onion/",
+            proxies=None,
+            crawl=True,
+            output_file="",
+            input_file=os.path.join(path, "links.txt"),
+            out_path=path,
+            thread=1,
+            yara=None,
+            logger=logger,
+        )
+        extractor.extract()
+
+        classifier = Classifier(input_path=os.path.join(path, "extracted"), out_path=path, logger=logger)
+        data_clust = pd.concat(classifier.load(), ignore_index=True)[["URL"]]
+        data_clust[TOP_COLUMNS + LABEL_COLUMNS] = "page"
+        clusterized = pd.read_csv(classifier.save(data_clust))
+
+        host_graph = Graph.from_hosts(data)
+        labels, _ = label_propagation(graph)
+        host_communities, _ = label_propagation(host_graph)
+        communities = pd.read_csv(
+            write_communities(os.path.join(path, "communities.csv"), graph, labels, host_graph, host_communities)
+        )
+
+        expected = sorted(graph.urls)
+        result = sorted(pd.merge(communities, clusterized, on="URL", how="inner")["URL"].tolist())
+        self.assertEqual(expected, result, assertMsg(expected, result))
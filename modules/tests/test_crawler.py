@@ -1,6 +1,9 @@
 import os
 import shutil
 import unittest
+from unittest import mock
+
+from requests.models import Response
 
 from modules import Crawler
 from modules.checker import extract_domain, folder
@@ -147,3 +150,70 @@ class TestCrawlerFunctions(unittest.TestCase):
             result_ex,
             f"Test Fail:: Crawler returned = {result_ex}, expected {expected_ex}",
         )
+
+    def test_crawl_003(self):
+        """Test Crawler.crawl functionality"""
+        _uri = self._website
+        fetched = []
+
+        page = Response()
+        page.status_code = 200
+        page._content = f'<a href="{_uri}hypertext/WWW/TheProject.html">Project</a>'.encode("utf-8")
+
+        crawler = Crawler(
+            website=_uri,
+            proxies=None,
+            depth=1,
+            pause=0,
+            out_path=self.out_path,
+            external=False,
+            exclusion=None,
+            thread=1,
+            logger=self.logger,
+            on_response=lambda url, response, **_: fetched.append((url, response)),
+        )
+        with mock.patch("requests.Session.get", return_value=page):
+            result = crawler.crawl()
+
+        # Every crawled page is handed over with its response
+        expected = [(_uri, page)]
+        self.assertEqual(expected, fetched, f"Test Fail:: Crawler handed over = {fetched}, expected {expected}")
+        self.assertEqual({_uri: [f"{_uri}hypertext/WWW/TheProject.html"]}, result)
+
+    def test_crawl_004(self):
+        """Test Crawler.crawl near duplicate functionality"""
+        _uri = self._website
+        project = f"{_uri}hypertext/WWW/TheProject.html"
+
+        # Every url serves the same page, so the project page is a near duplicate of the seed
+        page = Response()
+        page.status_code = 200
+        page._content = f'<p>Home of the first website</p><a href="{project}">Project</a>'.encode("utf-8")
+
+        for near_dup_skip, expected in (
+            (True, {_uri: [project], project: []}),
+            (False, {_uri: [project], project: [project]}),
+        ):
+            verdicts = []
+            crawler = Crawler(
+                website=_uri,
+                proxies=None,
+                depth=2,
+                pause=0,
+                out_path=self.out_path,
+                external=False,
+                exclusion=None,
+                thread=1,
+                logger=self.logger,
+                near_dup=0,
+                near_dup_skip=near_dup_skip,
+                on_response=lambda url, response, **kwargs: verdicts.append((url, kwargs)),
+            )
+            with mock.patch("requests.Session.get", return_value=page):
+                result = crawler.crawl()
+
+            # Duplicates are recorded without links unless they are only tagged
+            self.assertEqual(expected, result)
+            # The verdict is handed over so that the extractor doesn't fingerprint the pages again
+            expected = [(_uri, {"original": None, "checked": True}), (project, {"original": _uri, "checked": True})]
+            self.assertEqual(expected, verdicts)
@@ -0,0 +1,75 @@
+import os
+import shutil
+import unittest
+
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+import pyarrow.parquet as pq
+
+from modules.checker import folder
+from modules.export import overview, top_nodes, write_graphml, write_parquet
+from modules.graph import Graph
+from modules.helper import assertMsg
+from modules.tests.test_graph import NETWORK
+
+
+class TestExportFunctions(unittest.TestCase):
+    """Unit test for Export module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "export")
+        cls.graph = Graph.from_dict(NETWORK)
+        cls.attributes = {"x": np.linspace(-1, 1, 5), "in_degree": cls.graph.in_degree()}
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_write_graphml(self):
+        """write_graphml unit test."""
+        path = write_graphml(os.path.join(folder(self.path), "network.graphml"), self.graph, self.attributes)
+        G = nx.read_graphml(path)
+
+        expected = self.graph.urls.tolist()
+        result = [data["url"] for _, data in G.nodes(data=True)]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        expected = self.graph.in_degree().tolist()
+        result = [data["in_degree"] for _, data in G.nodes(data=True)]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        np.testing.assert_allclose(self.attributes["x"], [data["x"] for _, data in G.nodes(data=True)])
+        sources, targets = self.graph.edges()
+        expected = [(f"n{s}", f"n{t}") for s, t in zip(sources.tolist(), targets.tolist())]
+        result = list(G.edges())
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_write_parquet(self):
+        """write_parquet unit test."""
+        nodes_path, edges_path = write_parquet(folder(self.path), self.graph, self.attributes)
+        nodes, edges = pq.read_table(nodes_path).to_pydict(), pq.read_table(edges_path).to_pydict()
+
+        expected = self.graph.urls.tolist()
+        result = nodes["url"]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(self.graph.in_degree().tolist(), nodes["in_degree"])
+        sources, targets = self.graph.edges()
+        expected = [sources.tolist(), targets.tolist(), [1] * self.graph.n_edges]
+        result = [edges["source"], edges["target"], edges["weight"]]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_overview(self):
+        """overview unit test."""
+        positions, _ = self.graph.spectral_layout()
+        path = overview(os.path.join(folder(self.path), "overview.png"), self.graph, positions, max_edges=2)
+        self.assertTrue(os.path.exists(path), f"Test Fail:: File: {path} - does not exist")
+        self.assertEqual([], plt.get_fignums(), "Test Fail:: figures must be closed")
+
+    def test_top_nodes(self):
+        """top_nodes unit test."""
+        scores = np.array([0.1, 0.4, 0.2, 0.3])
+        self.assertEqual([1, 3], top_nodes(scores, 2).tolist())
+        self.assertEqual([0, 1, 2, 3], top_nodes(scores, None).tolist())
+        self.assertEqual([0, 1, 2, 3], top_nodes(scores, 10).tolist())
@@ -1,3 +1,5 @@
+import csv
+import json
 import os.path
 import shutil
 import unittest
@@ -6,12 +8,17 @@ from copy import copy
 from unittest import mock
 
 from modules.checker import folder
-from modules.extractor import Extractor
+from modules.extractor import INDEX_COLUMNS, INDEX_FILE, Extractor
 from modules.helper import assertMsg, setup_custom_logger
 
 URL_1 = "http://info.cern.ch/"
 URL_2 = "http://info.cern.ch/hypertext/WWW/TheProject.html"
 URL_3 = "unknown_path"
+# Yara matches of URL_1 with the default rules, for each search mode
+YARA_MATCHES = {
+    0: "html:default.keyword_search[$a,$b,$c,$d,$e]",
+    1: "text:default.keyword_search[$a,$b,$d,$e]",
+}
 
 
 def mocked_requests_Session_get(*args, **kwargs):
@@ -22,6 +29,8 @@ def mocked_requests_Session_get(*args, **kwargs):
 
         def __init__(self, response_data):
             self.text = response_data
+            self.content = response_data.encode("utf-8")
+            self.headers = {"Content-Type": "text/html; charset=utf-8"}
 
     responses = defaultdict(lambda: "")
 
@@ -90,6 +99,17 @@ class TestCheckerFunctions(unittest.TestCase):
         """
         return self.extractor_1._Extractor__session.get(url, allow_redirects=True, timeout=10).text
 
+    def get_response_content(self, url: str) -> bytes:
+        """Get patched raw response body.
+
+        Args:
+            url: URL to get response body.
+
+        Returns:
+            Response body.
+        """
+        return self.extractor_1._Extractor__session.get(url, allow_redirects=True, timeout=10).content
+
     def test_text(self, _):
         """text unit test."""
         expected = """http://info.cern.ch http://info.cern.ch - home of the first website From here you can: Browse the first website Browse the first website using the line-mode browser simulator Learn about the birth of the web Learn about CERN, the physics laboratory where the web was born"""
@@ -99,26 +119,28 @@ class TestCheckerFunctions(unittest.TestCase):
 
     def test_check_yara_001(self, _):
         """check_yara unit test."""
-        expected = {
-            "matches": True,
-            "rule": "keyword_search",
-            "namespace": "default",
-            "tags": [],
-            "meta": {"author": "@the-siegfried", "score": 90},
-            "strings": [
-                (124, "$a", b"website"),
-                (249, "$a", b"website"),
-                (356, "$a", b"website"),
-                (574, "$b", b"physics laboratory"),
-                (80, "$c", b"<h1>http://"),
-                (558, "$d", b"about CERN"),
-                (48, "$e", b"info.cern.ch"),
-                (91, "$e", b"info.cern.ch"),
-                (188, "$e", b"info.cern.ch"),
-            ],
-        }
+        expected = [
+            {
+                "target": "html",
+                "rule": "keyword_search",
+                "namespace": "default",
+                "tags": [],
+                "meta": {"author": "@the-siegfried", "score": 90},
+                "strings": [
+                    (124, "$a", b"website"),
+                    (249, "$a", b"website"),
+                    (356, "$a", b"website"),
+                    (574, "$b", b"physics laboratory"),
+                    (80, "$c", b"<h1>http://"),
+                    (558, "$d", b"about CERN"),
+                    (48, "$e", b"info.cern.ch"),
+                    (91, "$e", b"info.cern.ch"),
+                    (188, "$e", b"info.cern.ch"),
+                ],
+            }
+        ]
 
-        content = self.get_response_text(URL_1)
+        content = self.get_response_content(URL_1)
         result = self.extractor_1._Extractor__check_yara(raw=content, yara=0)
         self.assertEqual(expected, result, assertMsg(expected, result))
 
@@ -126,46 +148,55 @@ class TestCheckerFunctions(unittest.TestCase):
         """check_yara unit test.
         Validates Yara Rule to categorize the site and check for keywords.
         """
-        expected = {
-            "matches": True,
-            "rule": "keyword_search",
-            "namespace": "default",
-            "tags": [],
-            "meta": {"author": "@the-siegfried", "score": 90},
-            "strings": [
-                (60, "$a", b"website"),
-                (104, "$a", b"website"),
-                (129, "$a", b"website"),
-                (230, "$b", b"physics laboratory"),
-                (214, "$d", b"about cern"),
-                (7, "$e", b"info.cern.ch"),
-                (27, "$e", b"info.cern.ch"),
-            ],
-        }
+        expected = [
+            {
+                "target": "text",
+                "rule": "keyword_search",
+                "namespace": "default",
+                "tags": [],
+                "meta": {"author": "@the-siegfried", "score": 90},
+                "strings": [
+                    (60, "$a", b"website"),
+                    (104, "$a", b"website"),
+                    (129, "$a", b"website"),
+                    (230, "$b", b"physics laboratory"),
+                    (214, "$d", b"about CERN"),
+                    (7, "$e", b"info.cern.ch"),
+                    (27, "$e", b"info.cern.ch"),
+                ],
+            }
+        ]
 
-        content = self.get_response_text(URL_1)
+        content = self.get_response_content(URL_1)
         result = self.extractor_1._Extractor__check_yara(raw=content, yara=1)
         self.assertEqual(expected, result, assertMsg(expected, result))
 
+    def test_check_yara_003(self, _):
+        """check_yara unit test."""
+        content = self.get_response_content(URL_1)
+        result = self.extractor_1._Extractor__check_yara(raw=content, yara=2)
+        expected = ["html", "text"]
+        self.assertEqual(expected, [match["target"] for match in result])
+
+        # No rule matches the empty body
+        result = self.extractor_1._Extractor__check_yara(raw=b"", yara=2)
+        self.assertEqual([], result, assertMsg([], result))
+
     @mock.patch("concurrent.futures.ThreadPoolExecutor.shutdown", side_effect=[lambda wait: None])
     def test_cinex_001(self, _, __):
         """cinex unit test."""
         expected = [
             [
                 (10, ("%s :: %s match found!", URL_1, "Yara"), False),
+                (10, ("%s :: Yara matches :: %s", URL_1, YARA_MATCHES[0]), False),
                 (10, ("File created :: %s", f"{self.out_path}/info.cern.ch/_.html"), False),
+                (10, ("File created :: %s", f"{self.out_path}/info.cern.ch/_.yara.json"), False),
             ],
             [
                 (10, ("%s :: %s match found!", URL_2, "No yara"), False),
-                (
-                    10,
-                    ("File created :: %s", f"{self.out_path}/info.cern.ch/hypertext/WWW/TheProject.html_.html"),
-                    False,
-                ),
             ],
             [
                 (10, ("%s :: %s match found!", URL_3, "No yara"), False),
-                (10, ("File created :: %s", f"{self.out_path}/unknown_path_.html"), False),
             ],
         ]
 
@@ -192,29 +223,31 @@ class TestCheckerFunctions(unittest.TestCase):
 
         self.assertCountEqual(expected, result, assertMsg(expected, result))
 
+        # The index keeps the original url of each file
+        with open(os.path.join(self.out_path, INDEX_FILE), "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        expected = [
+            ["info.cern.ch/_.html", URL_1],
+            ["info.cern.ch/hypertext/WWW/TheProject.html_.html", URL_2],
+            ["unknown_path_.html", URL_3],
+        ]
+        self.assertEqual(INDEX_COLUMNS, rows[0])
+        self.assertCountEqual(expected, rows[1:], assertMsg(expected, rows[1:]))
+
     @mock.patch("concurrent.futures.ThreadPoolExecutor.shutdown", side_effect=[lambda wait: None])
     def test_terminex_001(self, _, __):
         """intermex unit test."""
         expected = [
             [
                 (10, ("%s :: %s match found!", URL_1, "Yara"), False),
+                (10, ("%s :: Yara matches :: %s", URL_1, YARA_MATCHES[1]), False),
                 (20, ("%s :: %s", URL_1, mocked_requests_Session_get(URL_1).text), False),
             ],
             [
                 (10, ("%s :: %s match found!", URL_2, "No yara"), False),
-                (
-                    20,
-                    (
-                        "%s :: %s",
-                        URL_2,
-                        mocked_requests_Session_get(URL_2).text,
-                    ),
-                    False,
-                ),
             ],
             [
                 (10, ("%s :: %s match found!", URL_3, "No yara"), False),
-                (20, ("%s :: %s", URL_3, mocked_requests_Session_get(URL_3).text), False),
             ],
         ]
 
@@ -254,12 +287,19 @@ class TestCheckerFunctions(unittest.TestCase):
         """outex unit test."""
         expected = [
             (10, ("%s :: %s match found!", URL_1, "Yara"), False),
+            (10, ("%s :: Yara matches :: %s", URL_1, YARA_MATCHES[0]), False),
             (10, ("File created :: %s", f"{self.out_path}/index.html"), False),
+            (10, ("File created :: %s", f"{self.out_path}/index.yara.json"), False),
         ]
 
         result = self.extractor_1._Extractor__outex(URL_1, self.out_file, 0)
 
         self.assertEqual(expected, result, assertMsg(expected, result))
+        with open(os.path.join(self.out_path, "index.yara.json"), "r", encoding="utf-8") as f:
+            matches = json.load(f)
+        expected = [("html", "keyword_search", {"offset": 48, "identifier": "$e", "data": "info.cern.ch"})]
+        result = [(item["target"], item["rule"], item["strings"][-3]) for item in matches]
+        self.assertEqual(expected, result, assertMsg(expected, result))
 
     @mock.patch("concurrent.futures.ThreadPoolExecutor.shutdown", side_effect=[lambda wait: None])
     def test_outex_002(self, _, __):
@@ -272,11 +312,24 @@ class TestCheckerFunctions(unittest.TestCase):
 
         self.assertEqual(expected, result, assertMsg(expected, result))
 
+    @mock.patch("concurrent.futures.ThreadPoolExecutor.shutdown", side_effect=[lambda wait: None])
+    def test_outex_003(self, _, __):
+        """outex unit test, pages without a yara match are not written."""
+        expected = [
+            (10, ("%s :: %s match found!", URL_2, "No yara"), False),
+        ]
+
+        result = self.extractor_1._Extractor__outex(URL_2, self.out_file, 0)
+
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertFalse(os.path.exists(self.out_file))
+
     @mock.patch("concurrent.futures.ThreadPoolExecutor.shutdown", side_effect=[lambda wait: None])
     def test_termex_001(self, _, __):
         """termex unit test."""
         expected = [
             (10, ("%s :: %s match found!", URL_1, "Yara"), False),
+            (10, ("%s :: Yara matches :: %s", URL_1, YARA_MATCHES[1]), False),
             (20, ("%s :: %s", URL_1, mocked_requests_Session_get(URL_1).text), False),
         ]
 
@@ -301,19 +354,15 @@ class TestCheckerFunctions(unittest.TestCase):
         expected = [
             [
                 (10, ("%s :: %s match found!", URL_1, "Yara"), False),
+                (10, ("%s :: Yara matches :: %s", URL_1, YARA_MATCHES[1]), False),
                 (10, ("File created :: %s", f"{self.out_path}/info.cern.ch/_.html"), False),
+                (10, ("File created :: %s", f"{self.out_path}/info.cern.ch/_.yara.json"), False),
             ],
             [
                 (10, ("%s :: %s match found!", URL_2, "No yara"), False),
-                (
-                    10,
-                    ("File created :: %s", f"{self.out_path}/info.cern.ch/hypertext/WWW/TheProject.html_.html"),
-                    False,
-                ),
             ],
             [
                 (10, ("%s :: %s match found!", URL_3, "No yara"), False),
-                (10, ("File created :: %s", f"{self.out_path}/unknown_path_.html"), False),
             ],
         ]
 
@@ -327,23 +376,14 @@ class TestCheckerFunctions(unittest.TestCase):
         expected = [
             [
                 (10, ("%s :: %s match found!", URL_1, "Yara"), False),
+                (10, ("%s :: Yara matches :: %s", URL_1, YARA_MATCHES[1]), False),
                 (20, ("%s :: %s", URL_1, mocked_requests_Session_get(URL_1).text), False),
             ],
             [
                 (10, ("%s :: %s match found!", "http://info.cern.ch/hypertext/WWW/TheProject.html", "No yara"), False),
-                (
-                    20,
-                    (
-                        "%s :: %s",
-                        "http://info.cern.ch/hypertext/WWW/TheProject.html",
-                        mocked_requests_Session_get(URL_2).text,
-                    ),
-                    False,
-                ),
             ],
             [
                 (10, ("%s :: %s match found!", URL_3, "No yara"), False),
-                (20, ("%s :: %s", URL_3, mocked_requests_Session_get(URL_3).text), False),
             ],
         ]
 
@@ -360,7 +400,6 @@ class TestCheckerFunctions(unittest.TestCase):
         expected = [
             [
                 (10, ("%s :: %s match found!", "http://info.cern.ch/hypertext/WWW/TheProject.html", "No yara"), False),
-                (10, ("File created :: %s", f"{self.out_path}/index.html"), False),
             ]
         ]
 
@@ -379,7 +418,6 @@ class TestCheckerFunctions(unittest.TestCase):
         expected = [
             [
                 (10, ("%s :: %s match found!", URL_3, "No yara"), False),
-                (20, ("%s :: %s", URL_3, mocked_requests_Session_get(URL_3).text), False),
             ]
         ]
 
@@ -391,3 +429,89 @@ class TestCheckerFunctions(unittest.TestCase):
         result = extractor_4.extract()
 
         self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_near_dup(self, _):
+        """near duplicate unit test."""
+        extractor = Extractor(
+            website=URL_1,
+            proxies=None,
+            crawl=False,
+            output_file="",
+            input_file="",
+            out_path=self.out_path,
+            thread=1,
+            yara=None,
+            logger=self.logger,
+            near_dup=0,
+        )
+        expected = [(20, ("%s :: %s", URL_3, ""), False)]
+        result = extractor._Extractor__termex(URL_3, None)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+        # Same (empty) content as URL_3
+        expected = [(10, ("%s :: Near duplicate of %s", "other_path", URL_3), False)]
+        result = extractor._Extractor__termex("other_path", None)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+        extractor.near_dup_skip = False
+        expected = [
+            (10, ("%s :: Near duplicate of %s", "other_path", URL_3), False),
+            (20, ("%s :: %s", "other_path", ""), False),
+        ]
+        result = extractor._Extractor__termex("other_path", None)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_near_dup_checked(self, _):
+        """near duplicate verdict of the crawler unit test."""
+        extractor = Extractor(
+            website=URL_1,
+            proxies=None,
+            crawl=False,
+            output_file="",
+            input_file=self.inp_file,
+            out_path=self.out_path,
+            thread=1,
+            yara=None,
+            logger=self.logger,
+            near_dup=0,
+        )
+        extractor.start_pipeline()
+        # Checked by the crawler against the shared index
+        extractor.feed(URL_1, mocked_requests_Session_get(URL_1), original=None, checked=True)
+        extractor.feed(URL_2, mocked_requests_Session_get(URL_2), original=URL_1, checked=True)
+        result = extractor.finish_pipeline()
+
+        expected = [
+            [(10, ("File created :: %s", f"{self.out_path}/info.cern.ch/_.html"), False)],
+            [(10, ("%s :: Near duplicate of %s", URL_2, URL_1), False)],
+            [(10, ("File created :: %s", f"{self.out_path}/unknown_path_.html"), False)],
+        ]
+        self.assertCountEqual(expected, result, assertMsg(expected, result))
+        # Only the page the crawler never fetched is fingerprinted by the extractor
+        self.assertEqual(1, len(extractor.fingerprints))
+
+    def test_pipeline(self, session_get):
+        """pipeline unit test."""
+        expected = [
+            [(10, ("File created :: %s", f"{self.out_path}/info.cern.ch/_.html"), False)],
+            [
+                (
+                    10,
+                    ("File created :: %s", f"{self.out_path}/info.cern.ch/hypertext/WWW/TheProject.html_.html"),
+                    False,
+                )
+            ],
+            [(10, ("File created :: %s", f"{self.out_path}/unknown_path_.html"), False)],
+        ]
+
+        extractor = copy(self.extractor_1)
+        extractor.yara = None
+        extractor.start_pipeline(maxsize=1)
+        # Crawled page is extracted from its response
+        extractor.feed(URL_1, mocked_requests_Session_get(URL_1))
+        result = extractor.finish_pipeline()
+
+        self.assertCountEqual(expected, result, assertMsg(expected, result))
+        # Only the links which were never fed are fetched
+        fetched = [call.args[0] for call in session_get.call_args_list]
+        self.assertCountEqual([URL_2, URL_3], fetched, assertMsg([URL_2, URL_3], fetched))
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import unittest
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+from modules.features import FeatureCache
+from modules.helper import assertMsg
+
+TEXTS = ["bitcoin bitcoin escrow vendor", "thread reply reply reply member", "bitcoin"]
+
+
+class TestFeaturesFunctions(unittest.TestCase):
+    """Unit test for Features module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "features")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_lookup(self):
+        """lookup unit test."""
+        cache = FeatureCache(self.path)
+        keys = [cache.digest(f"page {i}") for i in range(3)]
+        self.assertEqual([-1, -1, -1], cache.lookup(keys).tolist())
+
+        result = cache.add(keys[:2] + keys[:1], TEXTS[:2] + TEXTS[:1])
+        self.assertEqual([0, 1, 0], result.tolist(), assertMsg([0, 1, 0], result.tolist()))
+        self.assertEqual([0, 1, -1], cache.lookup(keys).tolist())
+        self.assertEqual(2, len(cache))
+
+    def test_counts(self):
+        """counts unit test."""
+        cache = FeatureCache(self.path)
+        keys = [cache.digest(text) for text in TEXTS]
+        cache.add(keys[:2], TEXTS[:2])
+        cache.flush()
+        cache.add(keys[2:], TEXTS[2:])
+        self.assertTrue(os.path.isdir(cache.flush()), "Test Fail:: expected a segment dir")
+        self.assertIsNone(cache.flush())
+
+        vectorizer = CountVectorizer().fit(TEXTS)
+        expected = vectorizer.transform(TEXTS).toarray()
+        rows = np.array([2, 0, 1])
+        counts = cache.counts(rows).toarray()
+        columns = [vectorizer.vocabulary_[term] for term in cache.terms]
+        result = np.zeros_like(expected)
+        result[:, columns] = counts
+        np.testing.assert_array_equal(expected[rows], result)
+
+        expected = ["thread", "reply", "reply", "reply", "member"]
+        result = cache.tokens(1)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_reload(self):
+        """FeatureCache reload unit test."""
+        cache = FeatureCache(self.path)
+        keys = [cache.digest(text) for text in TEXTS]
+        cache.add(keys, TEXTS)
+        cache.flush()
+
+        cache = FeatureCache(self.path)
+        self.assertEqual([0, 1, 2], cache.lookup(keys).tolist())
+        self.assertEqual(["bitcoin"], cache.tokens(2))
+
+        # Rows of an other cache version are dropped
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": 0}, f)
+        cache = FeatureCache(self.path)
+        self.assertEqual(0, len(cache))
+        self.assertEqual([-1, -1, -1], cache.lookup(keys).tolist())
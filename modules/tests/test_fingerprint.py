@@ -0,0 +1,60 @@
+import unittest
+
+from modules.fingerprint import SimHashIndex, hamming, simhash
+from modules.helper import assertMsg
+
+TEXT = (
+    "Welcome to the market. Browse verified vendors, compare listings and pay with escrow. "
+    "Orders ship worldwide within two days and every vendor is reviewed by the community. "
+    "Read the FAQ before placing your first order and contact support for any question."
+)
+
+
+class TestFingerprintFunctions(unittest.TestCase):
+    """Unit test for Fingerprint module."""
+
+    def test_hamming(self):
+        """hamming unit test."""
+        self.assertEqual(0, hamming(0b1011, 0b1011))
+        self.assertEqual(2, hamming(0b1011, 0b1110))
+        self.assertEqual(64, hamming(0, (1 << 64) - 1))
+
+    def test_simhash(self):
+        """simhash unit test."""
+        mirror = simhash(TEXT.replace("two days", "three days"))
+        other = simhash("Search the library catalogue for books, journals and articles about physics.")
+
+        self.assertEqual(simhash(TEXT), simhash(TEXT.upper()), "Test Fail:: simhash must ignore case")
+        self.assertLess(hamming(simhash(TEXT), mirror), hamming(simhash(TEXT), other))
+        self.assertLess(simhash(TEXT), 1 << 64)
+        self.assertIsInstance(simhash(""), int)
+
+    def test_index_001(self):
+        """SimHashIndex unit test."""
+        index = SimHashIndex(distance=3)
+        base = simhash(TEXT)
+
+        self.assertIsNone(index.check(base, "http://a.onion"))
+        # Every fingerprint within 3 bits is found through one of the 4 bands
+        for bits in [(0,), (5, 21), (1, 33, 62), (15, 16, 47)]:
+            near = base
+            for bit in bits:
+                near ^= 1 << bit
+            result = index.check(near, "http://b.onion")
+            self.assertEqual("http://a.onion", result, assertMsg("http://a.onion", result))
+
+        far = base ^ 0b1111
+        self.assertIsNone(index.query(far))
+        index.add(far, "http://c.onion")
+        self.assertEqual("http://c.onion", index.query(far))
+        self.assertEqual(2, len(index))
+
+    def test_index_002(self):
+        """SimHashIndex unit test."""
+        with self.assertRaises(ValueError):
+            SimHashIndex(distance=64)
+
+        index = SimHashIndex(distance=0)
+        index.add(42, "a")
+        self.assertEqual("a", index.query(42))
+        self.assertIsNone(index.query(43))
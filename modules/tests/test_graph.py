@@ -0,0 +1,249 @@
+import json
+import os
+import shutil
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from modules.checker import extract_domain, folder
+from modules.graph import Graph
+from modules.helper import assertMsg, setup_custom_logger
+
+NETWORK = {
+    "http://a.onion": ["http://b.onion", "http://c.onion", "http://b.onion"],
+    "http://b.onion": ["http://a.onion", "http://d.onion"],
+    "http://c.onion": ["http://c.onion"],
+    "http://e.onion": [],
+}
+
+
+def random_network(n: int = 300, seed: int = 0) -> dict:
+    """Random network structure with dangling nodes and link targets never crawled."""
+    rng = np.random.default_rng(seed)
+    return {
+        f"http://{i}.onion": [f"http://{j}.onion" for j in rng.integers(0, 2 * n, rng.integers(0, 8))]
+        for i in range(n)
+    }
+
+
+def networkx_graph(data: dict) -> nx.DiGraph:
+    """networkx DiGraph built like Visualization used to."""
+    G = nx.DiGraph()
+    G.add_nodes_from(data.keys())
+    for key, value in data.items():
+        G.add_edges_from([key, val] for val in value)
+    return G
+
+
+class TestGraphFunctions(unittest.TestCase):
+    """Unit test for Graph module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "graph")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_from_json(self):
+        """from_json unit test."""
+        path = os.path.join(folder(self.path), "network_structure.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(NETWORK, f)
+        graph = Graph.from_json(path)
+
+        expected = ["http://a.onion", "http://b.onion", "http://c.onion", "http://e.onion", "http://d.onion"]
+        result = graph.urls.tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(5, graph.n_edges, "Test Fail:: duplicate links must be merged")
+        self.assertEqual(3, graph.index("http://e.onion"))
+
+        self.assertEqual([1, 1, 2, 0, 1], graph.in_degree().tolist())
+        self.assertEqual([2, 2, 1, 0, 0], graph.out_degree().tolist())
+        sources, targets = graph.edges()
+        self.assertEqual([(0, 1), (0, 2), (1, 0), (1, 4), (2, 2)], list(zip(sources.tolist(), targets.tolist())))
+
+    def test_degree(self):
+        """in_degree and out_degree unit test."""
+        data = random_network()
+        graph, G = Graph.from_dict(data), networkx_graph(data)
+
+        self.assertEqual(list(G.nodes), graph.urls.tolist())
+        self.assertEqual([d for _, d in G.in_degree()], graph.in_degree().tolist())
+        self.assertEqual([d for _, d in G.out_degree()], graph.out_degree().tolist())
+
+    def test_pagerank_001(self):
+        """pagerank unit test."""
+        data = random_network()
+        graph, G = Graph.from_dict(data), networkx_graph(data)
+
+        expected = nx.pagerank(G, tol=1e-12)
+        result, convergence = graph.pagerank()
+        np.testing.assert_allclose([expected[url] for url in graph.urls], result, atol=1e-6)
+        self.assertAlmostEqual(1.0, result.sum())
+        self.assertTrue(convergence["converged"])
+        self.assertEqual(convergence["iterations"], len(convergence["errors"]))
+
+    def test_pagerank_002(self):
+        """pagerank unit test."""
+        data = random_network()
+        graph, G = Graph.from_dict(data), networkx_graph(data)
+        weights = np.arange(graph.n_nodes, dtype=float)
+        dangling = np.zeros(graph.n_nodes)
+        dangling[:10] = 1
+
+        expected = nx.pagerank(
+            G,
+            personalization=dict(zip(graph.urls, weights)),
+            dangling=dict(zip(graph.urls, dangling)),
+            tol=1e-12,
+        )
+        result, _ = graph.pagerank(personalization=weights, dangling=dangling)
+        np.testing.assert_allclose([expected[url] for url in graph.urls], result, atol=1e-6)
+
+        with self.assertRaises(ValueError):
+            graph.pagerank(personalization=weights[1:])
+
+    def test_pagerank_003(self):
+        """pagerank unit test."""
+        graph = Graph.from_dict(random_network())
+        _, convergence = graph.pagerank(max_iter=2)
+        self.assertFalse(convergence["converged"], "Test Fail:: 2 iterations must not converge")
+        self.assertEqual(2, convergence["iterations"])
+        self.assertGreater(convergence["error"], convergence["tolerance"])
+
+        _, convergence = Graph.from_dict({}).pagerank()
+        self.assertTrue(convergence["converged"])
+
+    def test_warm_start(self):
+        """warm_start unit test."""
+        before = random_network()
+        after = dict(before)
+        after["http://new.onion"] = ["http://0.onion", "http://1.onion"]
+        graph_before, graph_after = Graph.from_dict(before), Graph.from_dict(after)
+
+        previous, _ = graph_before.pagerank(tol=1e-10, max_iter=1000)
+        start = graph_after.warm_start(graph_before.urls, previous)
+        self.assertEqual(graph_after.n_nodes, len(start))
+        self.assertAlmostEqual(previous.mean(), start[graph_after.index("http://new.onion")])
+
+        cold, cold_convergence = graph_after.pagerank(tol=1e-10, max_iter=1000)
+        warm, warm_convergence = graph_after.pagerank(tol=1e-10, max_iter=1000, start=start)
+        self.assertTrue(warm_convergence["converged"])
+        np.testing.assert_allclose(cold, warm, atol=1e-8)
+        self.assertLess(warm_convergence["iterations"], cold_convergence["iterations"])
+
+    def test_eigenvector_centrality(self):
+        """eigenvector_centrality unit test."""
+        data = random_network()
+        graph, G = Graph.from_dict(data), networkx_graph(data)
+
+        expected = nx.eigenvector_centrality(G, max_iter=10000, tol=1e-12)
+        result, convergence = graph.eigenvector_centrality()
+        np.testing.assert_allclose([expected[url] for url in graph.urls], result, atol=1e-5)
+        self.assertTrue(convergence["converged"])
+
+        # Bipartite graph, the plain power iteration would oscillate
+        graph = Graph.from_dict({"a": ["b", "c"], "b": ["a"], "c": ["a"]})
+        result, convergence = graph.eigenvector_centrality(tol=1e-10)
+        self.assertTrue(convergence["converged"])
+        np.testing.assert_allclose([2**-0.5, 0.5, 0.5], result, atol=1e-6)
+
+    def test_from_hosts(self):
+        """from_hosts unit test."""
+        # Pages spread over 20 hosts
+        rng = np.random.default_rng(0)
+        data = {
+            f"http://{i % 20}.onion/{i}": [
+                f"http://{j % 20}.onion/{j}" for j in rng.integers(0, 600, rng.integers(0, 8))
+            ]
+            for i in range(300)
+        }
+        G = nx.DiGraph()
+        for url, links in data.items():
+            G.add_node(extract_domain(url))
+            for link in links:
+                source, target = extract_domain(url), extract_domain(link)
+                G.add_node(target)
+                if source != target:
+                    weight = G.edges[source, target]["weight"] if G.has_edge(source, target) else 0
+                    G.add_edge(source, target, weight=weight + 1)
+
+        graph = Graph.from_hosts(data)
+        self.assertEqual(20, graph.n_nodes)
+        self.assertTrue(graph.weighted)
+        self.assertTrue(nx.utils.graphs_equal(G, graph.to_networkx()))
+
+        expected = nx.pagerank(G, tol=1e-12)
+        result, _ = graph.pagerank()
+        np.testing.assert_allclose([expected[host] for host in graph.urls], result, atol=1e-6)
+        expected = nx.eigenvector_centrality(G, max_iter=10000, tol=1e-12, weight="weight")
+        result, _ = graph.eigenvector_centrality()
+        np.testing.assert_allclose([expected[host] for host in graph.urls], result, atol=1e-5)
+
+    def test_from_hosts_invalid(self):
+        """from_hosts unit test."""
+        logger = setup_custom_logger(name="testlog", filename=None, verbose_=False, filelog=False, argv=None)
+        # Malformed hrefs with an invalid IPv6 bracket are skipped, the other links of the page are kept
+        data = {
+            "http://a.onion/": ["http://[::1/x", "http://b.onion/", "http://b.onion/1"],
+            "http://[c.onion/": ["http://a.onion/", "http://d.onion/"],
+        }
+        with self.assertLogs(logger, level="DEBUG") as logs:
+            graph = Graph.from_hosts(data, logger)
+
+        expected = ["a.onion", "b.onion", "d.onion"]
+        result = list(graph.urls)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        expected = [[0, 2, 0], [0, 0, 0], [0, 0, 0]]
+        result = graph.adjacency.toarray().tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(2, len(logs.records))
+
+    def test_spectral_layout(self):
+        """spectral_layout unit test."""
+        # Two random clusters joined by a single link
+        rng = np.random.default_rng(0)
+        data = {f"http://a.onion/{i}": [f"http://a.onion/{j}" for j in rng.integers(0, 100, 5)] for i in range(100)}
+        data.update(
+            {f"http://b.onion/{i}": [f"http://b.onion/{j}" for j in rng.integers(0, 100, 5)] for i in range(100)}
+        )
+        data["http://a.onion/0"].append("http://b.onion/0")
+        graph = Graph.from_dict(data)
+
+        positions, convergence = graph.spectral_layout()
+        self.assertEqual((graph.n_nodes, 2), positions.shape)
+        self.assertEqual(convergence["iterations"], len(convergence["errors"]))
+        np.testing.assert_allclose([-1, -1], positions.min(axis=0))
+        np.testing.assert_allclose([1, 1], positions.max(axis=0))
+        # The clusters are on both sides of the first axis
+        a = np.array(["a.onion" in url for url in graph.urls])
+        self.assertGreater(abs(positions[a, 0].mean() - positions[~a, 0].mean()), 1.5)
+
+        # A cycle is drawn as a circle
+        positions, _ = Graph.from_dict({i: [(i + 1) % 50] for i in range(50)}).spectral_layout(
+            max_iter=10000, tol=1e-10
+        )
+        np.testing.assert_allclose(1.0, np.linalg.norm(positions, axis=1), atol=1e-2)
+
+    def test_subgraph(self):
+        """subgraph unit test."""
+        graph = Graph.from_dict(NETWORK).subgraph(np.array([0, 1, 4]))
+        expected = ["http://a.onion", "http://b.onion", "http://d.onion"]
+        result = graph.urls.tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        sources, targets = graph.edges()
+        self.assertEqual([(0, 1), (1, 0), (1, 2)], list(zip(sources.tolist(), targets.tolist())))
+
+    def test_to_networkx(self):
+        """to_networkx unit test."""
+        graph = Graph.from_dict(NETWORK)
+        G = graph.to_networkx()
+        self.assertTrue(nx.utils.graphs_equal(networkx_graph(NETWORK), G))
+
+        with self.assertRaises(ValueError):
+            graph.to_networkx(max_nodes=4)
@@ -0,0 +1,109 @@
+import json
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+from modules.checker import folder
+from modules.graph import Graph
+from modules.helper import assertMsg, setup_custom_logger
+from modules.metrics import METRICS, GraphMetrics
+from modules.tests.test_graph import random_network
+
+
+class TestMetricsFunctions(unittest.TestCase):
+    """Unit test for Metrics module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "metrics")
+        cls.logger = setup_custom_logger(
+            name="testlog",
+            filename=None,
+            verbose_=False,
+            filelog=False,
+            argv=None,
+        )
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def write(self, data: dict) -> str:
+        """Writes a network structure in the test folder."""
+        path = os.path.join(folder(self.path), "network_structure.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+    def test_get(self):
+        """get unit test."""
+        path = self.write(random_network())
+        graph = Graph.from_json(path)
+        metrics = GraphMetrics(path, self.logger)
+        for name in METRICS:
+            expected = getattr(graph, name)()
+            expected = expected[0] if isinstance(expected, tuple) else expected
+            np.testing.assert_allclose(expected, metrics.get(name))
+        self.assertEqual(os.path.join(os.path.abspath(self.path), "metrics"), metrics.cache_dir)
+
+        with self.assertRaises(ValueError):
+            metrics.get("betweenness")
+
+    def test_cache(self):
+        """Cached metrics unit test."""
+        path = self.write(random_network())
+        expected = GraphMetrics(path, self.logger).compute_all()
+
+        metrics = GraphMetrics(path, self.logger)
+        self.assertTrue(all(metrics.cached(name) for name in METRICS), "Test Fail:: metrics must be cached")
+        result = metrics.compute_all()
+        for name in METRICS:
+            self.assertIsInstance(result[name], np.memmap)
+            np.testing.assert_array_equal(expected[name], result[name])
+
+        expected = Graph.from_json(path).urls.tolist()
+        result = metrics.urls
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_warm_start(self):
+        """Warm start from the metrics of a previous network file unit test."""
+        data = random_network()
+        path = self.write(data)
+        GraphMetrics(path, self.logger).compute_all()
+
+        data["http://new.onion"] = ["http://0.onion"]
+        path = self.write(data)
+        metrics = GraphMetrics(path, self.logger)
+        self.assertFalse(metrics.cached("pagerank"), "Test Fail:: metrics of an other file must not be used")
+
+        graph = Graph.from_json(path)
+        for name in ("pagerank", "eigenvector_centrality"):
+            expected, _ = getattr(graph, name)(tol=1e-10)
+            result = metrics.get(name)
+            np.testing.assert_allclose(expected, result, atol=1e-5)
+
+        with open(os.path.join(metrics.cache_dir, GraphMetrics.meta_file), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        expected = [True, True]
+        result = [meta["metrics"][name]["warm_start"] for name in ("pagerank", "eigenvector_centrality")]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(graph.n_nodes, meta["nodes"], assertMsg(graph.n_nodes, meta["nodes"]))
+
+    def test_hosts(self):
+        """Host graph metrics unit test."""
+        path = self.write(random_network())
+        pages = GraphMetrics(path, self.logger)
+        pages.get("in_degree")
+        metrics = GraphMetrics(path, self.logger, hosts=True)
+        self.assertNotEqual(pages.cache_dir, metrics.cache_dir)
+        self.assertFalse(metrics.cached("in_degree"), "Test Fail:: page metrics must not be used for hosts")
+
+        graph = Graph.from_json(path, hosts=True)
+        np.testing.assert_array_equal(graph.in_degree(), metrics.get("in_degree"))
+        expected = graph.urls.tolist()
+        result = GraphMetrics(path, self.logger, hosts=True).urls
+        self.assertEqual(expected, result, assertMsg(expected, result))
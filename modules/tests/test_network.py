@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import struct
+import unittest
+
+import numpy as np
+
+from modules.checker import folder
+from modules.graph import Graph
+from modules.helper import assertMsg
+from modules.network import NetworkFile, binary_to_json, is_binary, json_to_binary, write_binary
+from modules.tests.test_graph import NETWORK, random_network
+
+
+class TestNetworkFunctions(unittest.TestCase):
+    """Unit test for Network module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "network")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_convert(self):
+        """json_to_binary and binary_to_json unit test."""
+        data = random_network()
+        data["http://ünïcode.onion"] = ["http://0.onion", "http://ünïcode.onion"]
+        json_path = os.path.join(folder(self.path), "network_structure.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        binary_path = json_to_binary(json_path)
+        self.assertEqual(os.path.join(self.path, "network_structure.bin"), binary_path)
+        self.assertTrue(is_binary(binary_path))
+        self.assertFalse(is_binary(json_path))
+
+        result_path = binary_to_json(binary_path, os.path.join(self.path, "converted.json"))
+        with open(result_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        expected = {url: sorted(set(links)) for url, links in data.items()}
+        self.assertEqual(list(expected), list(result), "Test Fail:: crawl order must be kept")
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_from_binary(self):
+        """Graph.from_binary unit test."""
+        data = random_network()
+        path = write_binary(os.path.join(folder(self.path), "network_structure.bin"), data)
+        expected, result = Graph.from_dict(data), Graph.from_file(path)
+
+        self.assertEqual(sorted(expected.urls.tolist()), result.urls.tolist())
+        self.assertEqual(expected.urls[0], result.urls[result.seed])
+        self.assertEqual(expected.n_edges, result.n_edges)
+        order = np.array([expected.index(url) for url in result.urls])
+        np.testing.assert_array_equal(expected.in_degree()[order], result.in_degree())
+        np.testing.assert_array_equal(expected.out_degree()[order], result.out_degree())
+        np.testing.assert_allclose(expected.pagerank()[0][order], result.pagerank()[0])
+        self.assertEqual(17, result.index(result.urls[17]))
+        with self.assertRaises(KeyError):
+            result.index("http://missing.onion")
+
+        # Links are sorted in the binary file, so the hosts are interned in an other order
+        expected, result = Graph.from_hosts(data), Graph.from_file(path, hosts=True)
+        self.assertEqual(sorted(expected.urls.tolist()), sorted(result.urls.tolist()))
+        self.assertEqual(expected.n_edges, result.n_edges)
+
+    def test_header(self):
+        """NetworkFile header unit test."""
+        path = write_binary(os.path.join(folder(self.path), "network_structure.bin"), NETWORK)
+        network = NetworkFile(path)
+        self.assertEqual(NETWORK["http://a.onion"][:2], network.to_dict()["http://a.onion"])
+        self.assertEqual(5, len(network.urls))
+
+        with open(path, "r+b") as f:
+            f.seek(struct.calcsize("<8s"))
+            f.write(struct.pack("<I", 99))
+        with self.assertRaises(ValueError):
+            NetworkFile(path)
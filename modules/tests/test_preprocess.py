@@ -0,0 +1,34 @@
+import unittest
+
+from modules.helper import assertMsg
+from modules.preprocess import preprocess_batch, preprocess_text, text_windows
+
+
+class TestPreprocessFunctions(unittest.TestCase):
+    """Unit test for Preprocess module."""
+
+    def test_text_windows(self):
+        """text_windows unit test."""
+        text = "first words <a href='x'>link</a> http://a.onion/page last"
+        expected = ["first", " words", " <a href='x'>link</a>", " http://a.onion/page", " last"]
+        result = list(text_windows(text, size=1))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual([text], list(text_windows(text)))
+
+    def test_preprocess_text(self):
+        """preprocess_text unit test."""
+        text = "<p>The Vendors don't ship!</p> Visit http://market.onion/shop or www.market.com for 42 listings"
+        expected = "vendor ship visit listing"
+        result = preprocess_text(text)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+        # Only the first useful words are kept
+        expected = "bitcoin bitcoin"
+        result = preprocess_text("the " * 5000 + "bitcoin " * 5000, max_words=2)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_preprocess_batch(self):
+        """preprocess_batch unit test."""
+        expected = ["market", "", "forum thread"]
+        result = preprocess_batch(["Markets", "the", "<b>Forum</b> threads"])
+        self.assertEqual(expected, result, assertMsg(expected, result))
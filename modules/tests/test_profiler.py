@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import time
+import unittest
+
+from modules.checker import folder
+from modules.helper import Profiler, assertMsg, current_rss, peak_rss
+
+
+class TestProfilerFunctions(unittest.TestCase):
+    """Unit test for Profiler module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "profiler")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_rss(self):
+        """current_rss and peak_rss unit test."""
+        self.assertGreater(current_rss(), 0)
+        self.assertGreater(peak_rss(), 0)
+
+    def test_stage(self):
+        """stage unit test."""
+        profiler = Profiler(interval=0.01)
+        with profiler.stage("allocate", items=4) as stage:
+            self.assertTrue(stage.running)
+            block = bytearray(64 * 1024 * 1024)
+            time.sleep(0.05)
+            del block
+        self.assertFalse(stage.running)
+        self.assertGreaterEqual(stage.wall, 0.05)
+        self.assertGreaterEqual(stage.peak - stage.rss, 32 * 1024 * 1024, "Test Fail:: allocation not in the peak")
+
+        # The measures are kept once stopped
+        wall = stage.wall
+        self.assertEqual(wall, stage.stop().wall)
+
+        running = profiler.stage("running")
+        expected = ["allocate"]
+        result = [item["name"] for item in profiler.report()["stages"]]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        running.stop()
+
+    def test_save(self):
+        """save unit test."""
+        profiler = Profiler(name="test")
+        with profiler.stage("count") as stage:
+            stage.items = sum(1 for _ in range(1000))
+
+        path = profiler.save(os.path.join(folder(self.path), "profile.json"))
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+
+        self.assertEqual("test", report["name"])
+        expected = [
+            "name",
+            "wall_seconds",
+            "cpu_seconds",
+            "children_cpu_seconds",
+            "rss_start",
+            "peak_rss",
+            "items",
+            "items_per_second",
+        ]
+        result = list(report["stages"][0])
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(1000, report["stages"][0]["items"])
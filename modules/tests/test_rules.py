@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import unittest
+
+from modules.checker import folder
+from modules.helper import assertMsg
+from modules.rules import (
+    DEFAULT_RULES,
+    compile_rules,
+    match,
+    matches_summary,
+    namespaces,
+    rule_files,
+    rules_digest,
+    write_matches,
+)
+
+RULE = """
+rule {name}
+{{
+    strings:
+        $a = "{keyword}" nocase
+
+    condition:
+        any of them
+}}
+"""
+
+
+class TestRulesFunctions(unittest.TestCase):
+    """Unit test for Rules module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "rules")
+        cls.cache = os.path.join("test_run", "cache")
+
+    def setUp(self):
+        """Test Case Setup."""
+        folder(os.path.join(self.path, "nested"))
+
+        with open(os.path.join(self.path, "market.yar"), "w", encoding="utf-8") as f:
+            f.write(RULE.format(name="market", keyword="bitcoin"))
+        with open(os.path.join(self.path, "nested", "forum.yara"), "w", encoding="utf-8") as f:
+            f.write(RULE.format(name="forum", keyword="thread"))
+        with open(os.path.join(self.path, "nested", "market.yar"), "w", encoding="utf-8") as f:
+            f.write(RULE.format(name="shop", keyword="cart"))
+        with open(os.path.join(self.path, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("not a rule")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_rule_files_001(self):
+        """rule_files unit test."""
+        expected = [
+            os.path.abspath(os.path.join(self.path, "market.yar")),
+            os.path.abspath(os.path.join(self.path, "nested", "forum.yara")),
+            os.path.abspath(os.path.join(self.path, "nested", "market.yar")),
+        ]
+        result = rule_files([self.path, os.path.join(self.path, "market.yar")])
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_rule_files_002(self):
+        """rule_files unit test."""
+        with self.assertRaises(FileNotFoundError):
+            rule_files([os.path.join(self.path, "missing.yar")])
+
+    def test_namespaces(self):
+        """namespaces unit test."""
+        files = rule_files([self.path])
+        expected = {"market": files[0], "forum": files[1], "market_1": files[2]}
+        result = namespaces(files)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_rules_digest(self):
+        """rules_digest unit test."""
+        files = rule_files([self.path])
+        before = rules_digest(files)
+        self.assertEqual(before, rules_digest(files))
+
+        with open(files[0], "a", encoding="utf-8") as f:
+            f.write("\n// changed\n")
+        self.assertNotEqual(before, rules_digest(files), "Test Fail:: digest must change with the rule source")
+
+    def test_compile_rules_001(self):
+        """compile_rules unit test."""
+        rules = compile_rules(cache_dir=None)
+        result = [match.rule for match in rules.match(data=b"Browse the first website")]
+        expected = ["keyword_search"]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertTrue(os.path.isfile(DEFAULT_RULES), f"Test Fail:: could not find {DEFAULT_RULES}")
+
+    def test_compile_rules_002(self):
+        """compile_rules unit test."""
+        rules = compile_rules([self.path], cache_dir=self.cache)
+        cached = os.listdir(self.cache)
+        self.assertEqual(1, len(cached), f"Test Fail:: expected one cached file, got {cached}")
+
+        # Second compilation is loaded from the cache
+        rules = compile_rules([self.path], cache_dir=self.cache)
+        result = sorted((match.namespace, match.rule) for match in rules.match(data=b"bitcoin cart thread"))
+        expected = [("forum", "forum"), ("market", "market"), ("market_1", "shop")]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(cached, os.listdir(self.cache))
+
+    def test_write_matches(self):
+        """matches_summary and write_matches unit test."""
+        rules = compile_rules([self.path], cache_dir=None)
+        matches = match(rules, b"<p>Pay with Bitcoin \xff</p>")
+
+        expected = "html:market.market[$a]"
+        result = matches_summary(matches)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+        path = write_matches(os.path.join(self.path, "body.yara.json"), matches)
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        expected = [
+            {
+                "target": "html",
+                "rule": "market",
+                "namespace": "market",
+                "tags": [],
+                "meta": {},
+                "strings": [{"offset": 12, "identifier": "$a", "data": "Bitcoin"}],
+            }
+        ]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual("", matches_summary([]))
@@ -0,0 +1,93 @@
+import os
+import shutil
+import unittest
+
+import numpy as np
+
+from modules.checker import folder
+from modules.graph import Graph
+from modules.helper import assertMsg
+from modules.stats import GraphStats
+from modules.tests.test_graph import random_network
+
+
+class TestStatsFunctions(unittest.TestCase):
+    """Unit test for Stats module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.path = os.path.join("test_run", "stats")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree("test_run", ignore_errors=True)
+
+    def test_add(self):
+        """add unit test."""
+        data = random_network()
+        # Small capacity to grow the arrays many times
+        stats = GraphStats(capacity=1)
+        for url, links in data.items():
+            stats.add(url, links)
+        stats.add("http://0.onion", ["http://new.onion"])
+
+        graph = Graph.from_dict(data)
+        order = np.array([graph.index(url) for url in stats_urls(data)])
+        np.testing.assert_array_equal(graph.in_degree()[order], stats.in_degree)
+        np.testing.assert_array_equal(graph.out_degree()[order], stats.out_degree)
+        expected = [graph.n_nodes, graph.n_edges, len(data), graph.n_nodes - len(data)]
+        result = [stats.n_nodes, stats.n_edges, stats.n_crawled, stats.n_targets_only]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_save(self):
+        """end_depth, save and load unit test."""
+        stats = GraphStats()
+        stats.add("http://a.onion", ["http://b.onion", "http://c.onion"])
+        stats.end_depth(1, 1.5)
+        stats.add("http://b.onion", ["http://a.onion", "http://d.onion", "http://d.onion"])
+        stats.add("http://c.onion", [])
+        stats.end_depth(2, 2.5)
+        stats.save(folder(self.path))
+
+        summary, arrays = GraphStats.load(self.path)
+        expected = [
+            {"depth": 1, "nodes": 3, "new_nodes": 3, "edges": 2, "crawled": 1, "targets_only": 2, "seconds": 1.5},
+            {"depth": 2, "nodes": 4, "new_nodes": 1, "edges": 4, "crawled": 3, "targets_only": 1, "seconds": 2.5},
+        ]
+        result = summary["growth"]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual([1, 1, 1, 1], arrays["in_degree"].tolist())
+        self.assertEqual([2, 2, 0, 0], arrays["out_degree"].tolist())
+        self.assertEqual([True, True, True, False], arrays["crawled"].tolist())
+        expected = [{"url": "http://a.onion", "degree": 1}, {"url": "http://b.onion", "degree": 1}]
+        result = summary["top"]["in_degree"][:2]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_top(self):
+        """top unit test."""
+        data = random_network()
+        stats = GraphStats(top_k=5)
+        for url, links in data.items():
+            stats.add(url, links)
+
+        urls = stats_urls(data)
+        for name in ("in_degree", "out_degree"):
+            degree = getattr(stats, name)
+            order = sorted(range(len(urls)), key=lambda i: (-degree[i], i))[:5]
+            expected = [{"url": urls[i], "degree": int(degree[i])} for i in order]
+            result = stats.top()[name]
+            self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(len(urls), len(stats.top(k=10**6)["in_degree"]))
+        self.assertEqual({"in_degree": [], "out_degree": []}, stats.top(k=0))
+
+
+def stats_urls(data: dict) -> list:
+    """Urls in the order GraphStats interns them."""
+    urls = {}
+    for url, links in data.items():
+        urls.setdefault(url, None)
+        for link in links:
+            urls.setdefault(link, None)
+    return list(urls)
@@ -0,0 +1,64 @@
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from modules.graph import Graph
+from modules.helper import assertMsg
+from modules.structure import BOW_TIE, bow_tie, components, distances, reachable, structure_report
+from modules.tests.test_graph import random_network
+
+# 0 <-> 1 is the SCC, 2 reaches it, 3 is reached from it, 4 hangs off 2, 5 reaches 3, 6 is alone
+BOW = {0: [1, 3], 1: [0], 2: [0, 4], 3: [], 4: [], 5: [3], 6: []}
+
+
+class TestStructureFunctions(unittest.TestCase):
+    """Unit test for Structure module."""
+
+    def test_components(self):
+        """components unit test."""
+        graph = Graph.from_dict(random_network())
+        G = graph.to_networkx()
+        for connection, expected in (
+            ("strong", nx.strongly_connected_components(G)),
+            ("weak", nx.weakly_connected_components(G)),
+        ):
+            n_components, labels = components(graph, connection)
+            expected = sorted(sorted(graph.index(url) for url in component) for component in expected)
+            result = sorted(np.flatnonzero(labels == label).tolist() for label in range(n_components))
+            self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_reachable(self):
+        """reachable and distances unit test."""
+        graph = Graph.from_dict(random_network())
+        G = graph.to_networkx()
+
+        expected = sorted(graph.index(url) for url in nx.descendants(G, graph.urls[0]) | {graph.urls[0]})
+        result = np.flatnonzero(reachable(graph.adjacency, np.array([0]))).tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+        lengths = nx.single_source_shortest_path_length(G, graph.urls[0])
+        expected = [lengths.get(url, -1) for url in graph.urls]
+        result = distances(graph).tolist()
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_bow_tie(self):
+        """bow_tie unit test."""
+        graph = Graph.from_dict(BOW)
+        expected = ["SCC", "SCC", "IN", "OUT", "TENDRILS", "TENDRILS", "DISCONNECTED"]
+        result = [BOW_TIE[label] for label in bow_tie(graph)]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_structure_report(self):
+        """structure_report unit test on a long chain, deeper than the recursion limit."""
+        n = 100000
+        graph = Graph.from_dict({i: [i + 1] for i in range(n)})
+        report = structure_report(graph)
+
+        expected = {"count": n + 1, "largest": 1, "singletons": n + 1, "sizes": [1] * 10}
+        self.assertEqual(expected, report["scc"], assertMsg(expected, report["scc"]))
+        self.assertEqual(1, report["wcc"]["count"])
+        expected = [n + 1, n, 1.0]
+        result = [report["seed"]["reachable"], report["seed"]["max_depth"], report["seed"]["fraction"]]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(1, report["bow_tie"]["SCC"]["nodes"])
@@ -0,0 +1,94 @@
+import os
+import shutil
+import unittest
+
+from modules.helper import assertMsg
+from modules.text import TextExtractor, header_charset, sniff_encoding
+
+PAGE = """<html><head><title>Market</title><style>p {color: red}</style></head>
+<body><header><nav><a href="/">Home</a> | <a href="/faq">FAQ</a></nav></header>
+<script>var a = "<p>hidden</p>";</script>
+<p>Fresh <b>listings</b> every<!-- comment -->day</p>
+<footer>Copyright</footer></body></html>"""
+
+
+class TestTextFunctions(unittest.TestCase):
+    """Unit test for Text module."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Test Suite Setup."""
+        cls.cache = os.path.join("test_run", "text")
+
+    def tearDown(self):
+        """Test Case Teardown."""
+        # Remove test folder.
+        shutil.rmtree(os.path.dirname(self.cache), ignore_errors=True)
+
+    def test_sniff_encoding(self):
+        """sniff_encoding unit test."""
+        self.assertEqual("windows-1251", sniff_encoding(b'<head><meta charset="Windows-1251"></head>'))
+        self.assertEqual("iso-8859-1", sniff_encoding(b'<meta content="text/html; charset=ISO-8859-1">'))
+        self.assertEqual("utf-8", sniff_encoding(b"<html></html>"))
+        # The HTTP header wins over the meta charset, a byte order mark over both
+        self.assertEqual("koi8-r", sniff_encoding(b'<meta charset="utf-8">', "KOI8-R"))
+        self.assertEqual("utf-16-le", sniff_encoding("<html>".encode("utf-16"), "koi8-r"))
+        # Unknown and utf-16 meta charsets of an 8-bit page, undeclared non utf-8 pages
+        self.assertEqual("utf-8", sniff_encoding(b'<meta charset="utf-16">'))
+        self.assertEqual("utf-8", sniff_encoding(b'<meta charset="x-unknown">', "x-unknown"))
+        self.assertEqual("cp1252", sniff_encoding("<p>café</p>".encode("cp1252")))
+
+    def test_header_charset(self):
+        """header_charset unit test."""
+        self.assertEqual("ISO-8859-1", header_charset('text/html; charset="ISO-8859-1"'))
+        self.assertEqual(None, header_charset("text/html"))
+        self.assertEqual(None, header_charset(None))
+
+    def test_extract_001(self):
+        """extract unit test."""
+        expected = "Market Home | FAQ Fresh listings every day Copyright"
+        result = TextExtractor().extract(PAGE)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_extract_002(self):
+        """extract unit test."""
+        expected = "Market Fresh listings every day"
+        result = TextExtractor(boilerplate=True).extract(PAGE.encode("utf-8"))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_extract_003(self):
+        """extract unit test."""
+        page = '<meta charset="windows-1251"><p>Привет</p>'
+        expected = "Привет"
+        result = TextExtractor().extract(page.encode("windows-1251"))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual("", TextExtractor().extract(b""))
+
+    def test_extract_004(self):
+        """extract unit test."""
+        page = '<meta charset="utf-16"><p>Привет</p>'
+        expected = "Привет"
+        result = TextExtractor().extract(page.encode("koi8-r"), encoding="koi8-r")
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        result = TextExtractor().extract(page.encode("utf-8"))
+        self.assertEqual(expected, result, assertMsg(expected, result))
+
+    def test_text(self):
+        """text unit test."""
+        extractor = TextExtractor(cache_dir=self.cache)
+        expected = extractor.text(PAGE.encode("utf-8"))
+
+        key = extractor.digest(PAGE)
+        path = os.path.join(self.cache, key[:2], f"{key}.txt")
+        self.assertTrue(os.path.isfile(path), f"Test Fail:: could not find cached text {path}")
+
+        # A new extractor reads the text from the disk cache
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("cached")
+        result = TextExtractor(cache_dir=self.cache).text(PAGE)
+        self.assertEqual("cached", result, assertMsg("cached", result))
+
+        # Boilerplate removal has its own cache entries
+        result = TextExtractor(boilerplate=True, cache_dir=self.cache).text(PAGE)
+        self.assertNotEqual(expected, result)
+        self.assertNotEqual(key, TextExtractor(boilerplate=True).digest(PAGE))
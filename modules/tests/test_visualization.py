@@ -1,11 +1,16 @@
+import json
 import os
 import shutil
 import unittest
+from unittest import mock
+
+import matplotlib.pyplot as plt
+import numpy as np
 
 from modules import Crawler
 from modules.checker import extract_domain, folder
-from modules.helper import setup_custom_logger
-from modules.visualization import Visualization
+from modules.helper import assertMsg, setup_custom_logger
+from modules.visualization import PLOTS, Visualization, log_bins, plot_stats
 
 
 class TestVisualizationFunctions(unittest.TestCase):
@@ -87,3 +92,86 @@ class TestVisualizationFunctions(unittest.TestCase):
     def test_visualize(self):
         """Test visualization.visualize function."""
         self.plot(self.obj.visualize)
+        self.assertEqual([], plt.get_fignums(), "Test Fail:: figures must be closed")
+
+    def test_plot_all(self):
+        """Test visualization.plot_all function."""
+        expected = [os.path.join(self.obj.out_path, f"{name}.png") for name in PLOTS]
+        for n_jobs in (1, 2):
+            for path in expected:
+                if os.path.exists(path):
+                    os.remove(path)
+            result = self.obj.plot_all(n_jobs=n_jobs)
+            self.assertEqual(expected, result, assertMsg(expected, result))
+            self.assertTrue(all(os.path.exists(path) for path in result), "Test Fail:: missing plots")
+        self.assertEqual([], plt.get_fignums(), "Test Fail:: figures must be closed")
+
+    def test_log_bins(self):
+        """Test visualization.log_bins function."""
+        result = log_bins(np.array([1e-6, 1e-3, 1.0]), bins=6)
+        np.testing.assert_allclose([1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0], result)
+
+        result = log_bins(np.array([2.0, 4.0]), bins=2)
+        np.testing.assert_allclose([2.0, 3.0, 4.0], result)
+        result = log_bins(np.array([0.5]), bins=1)
+        np.testing.assert_allclose([0.5, 1.5], result)
+
+    def test_plot_stats(self):
+        """Test visualization.plot_stats function."""
+        out_path = os.path.join(os.path.dirname(self.out_path), "stats")
+        expected = [
+            os.path.join(out_path, "visualization", f"{name}.png")
+            for name in ("indegree_plot", "indegree_bar", "outdegree_plot", "outdegree_bar")
+        ]
+        result = plot_stats(self.out_path, out_path)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertTrue(all(os.path.exists(path) for path in result), "Test Fail:: missing plots")
+
+    def test_export(self):
+        """Test visualization.export function."""
+        export_path = os.path.join(self.obj.out_path, "export")
+        expected = [
+            os.path.join(self.obj.out_path, "overview.png"),
+            os.path.join(export_path, "nodes.parquet"),
+            os.path.join(export_path, "edges.parquet"),
+        ]
+        result = self.obj.export(sample=1)
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        result = self.obj.export("graphml")
+        expected = [expected[0], os.path.join(export_path, "network.graphml")]
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertTrue(all(os.path.exists(path) for path in result), "Test Fail:: missing files")
+
+        with self.assertRaises(ValueError):
+            self.obj.export("csv")
+
+    def test_structure(self):
+        """Test visualization.structure function."""
+        path = self.obj.structure()
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        expected = self.obj.graph.n_nodes
+        result = sum(region["nodes"] for region in report["bow_tie"].values())
+        self.assertEqual(expected, result, assertMsg(expected, result))
+        self.assertEqual(self.obj.graph.urls[0], report["seed"]["url"])
+
+    def test_visualize_without_networkx(self):
+        """Test visualization.visualize function without networkx."""
+        obj = Visualization(
+            json_file=os.path.join(self.out_path, self.crawler.network_file),
+            out_path=self.out_path,
+            logger=self.logger,
+        )
+        with mock.patch("modules.graph.nx", None), mock.patch("modules.visualization.nx", None):
+            with self.assertRaises(ImportError):
+                obj.visualize()
+
+    def test_communities(self):
+        """Test visualization.communities function."""
+        path = self.obj.communities()
+        with open(path, "r", encoding="utf-8") as f:
+            header, *rows = f.read().splitlines()
+        self.assertEqual("URL,Host,Community,Host Community", header)
+        expected = self.obj.graph.n_nodes
+        result = len(rows)
+        self.assertEqual(expected, result, assertMsg(expected, result))
@@ -0,0 +1,216 @@
+import codecs
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Union
+
+from lxml import etree
+
+from modules.checker import folder
+
+# Elements whose content is never visible text.
+SKIP_TAGS = frozenset(["script", "style"])
+# Elements holding navigation, menus and other page chrome, dropped with boilerplate removal.
+BOILERPLATE_TAGS = frozenset(["nav", "header", "footer", "aside", "form", "noscript", "select", "button", "iframe"])
+
+_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w-]+)""", re.IGNORECASE)
+_HEADER_CHARSET = re.compile(r"""charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+# Byte order marks, which take precedence over any declared encoding
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    """Canonical name of a known encoding, None for unknown ones."""
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+
+def header_charset(content_type: Optional[str]) -> Optional[str]:
+    """Charset of a `Content-Type` header.
+
+    Unlike `requests.Response.encoding`, it doesn't default to ISO-8859-1
+    for `text/*` responses, so that the page can declare its own encoding.
+
+    Args:
+        content_type: Value of the `Content-Type` header.
+
+    Returns:
+        Declared charset or None if there is none.
+    """
+    found = _HEADER_CHARSET.search(content_type) if content_type else None
+    return found.group(1) if found else None
+
+
+def sniff_encoding(content: bytes, encoding: Optional[str] = None) -> str:
+    """Encoding of an html page, as browsers determine it.
+
+    A byte order mark comes first, then the charset of the HTTP header, then
+    the `<meta>` charset of the first kilobyte. A utf-16/32 `<meta>` charset
+    can't be right for a page which declares it in ascii, so it is read as
+    utf-8 like the HTML specification does. Without any declaration, the page
+    is utf-8 if it decodes as utf-8 else windows-1252.
+
+    Args:
+        content: Raw html body.
+        encoding: Charset of the HTTP `Content-Type` header, e.g. from `header_charset`.
+
+    Returns:
+        Name of the encoding.
+    """
+    for bom, name in _BOMS:
+        if content.startswith(bom):
+            return name
+    if _codec(encoding):
+        return encoding.lower()
+
+    found = _CHARSET.search(content, 0, 1024)
+    declared = found.group(1).decode("ascii").lower() if found else None
+    if _codec(declared):
+        return "utf-8" if _codec(declared).startswith(("utf-16", "utf-32")) else declared
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+class _TextTarget:
+    """lxml parser target collecting stripped text nodes without building a tree.
+
+    Attributes:
+        skip: Tags whose content is ignored.
+    """
+
+    def __init__(self, skip: frozenset):
+        self.skip = skip
+        self.depth = 0
+        self.chunks: List[str] = []
+        self.texts: List[str] = []
+
+    def __flush(self):
+        if self.chunks:
+            text = "".join(self.chunks).strip()
+            if text:
+                self.texts.append(text)
+            self.chunks = []
+
+    def start(self, tag, attrib):
+        self.__flush()
+        if self.depth or tag in self.skip:
+            self.depth += 1
+
+    def end(self, tag):
+        self.__flush()
+        if self.depth:
+            self.depth -= 1
+
+    def data(self, data):
+        if not self.depth:
+            self.chunks.append(data)
+
+    def comment(self, text):
+        self.__flush()
+
+    def close(self) -> str:
+        self.__flush()
+        return " ".join(self.texts)
+
+
+class TextExtractor:
+    """Extracts the visible text of html pages, caching the output by content hash.
+
+    Attributes:
+        boilerplate: Remove navigation, header, footer and other page chrome if True.
+        cache_dir: Dir path for the on-disk text cache. Disabled if None.
+        cache_size: Number of texts kept in the in-memory cache.
+    """
+
+    def __init__(self, boilerplate: bool = False, cache_dir: Optional[str] = None, cache_size: int = 1024):
+        self.boilerplate = boilerplate
+        self.cache_dir = folder(cache_dir) if cache_dir else None
+        self.cache_size = cache_size
+
+        self.__skip = SKIP_TAGS | BOILERPLATE_TAGS if boilerplate else SKIP_TAGS
+        self.__cache = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def digest(self, content: Union[bytes, str]) -> str:
+        """Cache key of a page.
+
+        Args:
+            content: Raw or decoded html body.
+
+        Returns:
+            Hex digest of the content and the boilerplate option.
+        """
+        if isinstance(content, str):
+            content = content.encode("UTF-8")
+        digest = hashlib.blake2b(content, digest_size=16)
+        digest.update(b"b" if self.boilerplate else b"-")
+        return digest.hexdigest()
+
+    def text(self, content: Union[bytes, str], encoding: Optional[str] = None) -> str:
+        """Visible text of the page, from the cache when already extracted.
+
+        The cache is keyed by the content, so the text keeps the encoding of
+        its first extraction, e.g. the HTTP charset of the crawled page when
+        the classifier reads it back from the extracted folder.
+
+        Args:
+            content: Raw or decoded html body.
+            encoding: Charset of the HTTP `Content-Type` header of raw bodies.
+
+        Returns:
+            Stripped text nodes joined by a single space.
+        """
+        key = self.digest(content)
+
+        with self.__lock:
+            if key in self.__cache:
+                self.__cache.move_to_end(key)
+                return self.__cache[key]
+
+        path = os.path.join(self.cache_dir, key[:2], f"{key}.txt") if self.cache_dir else None
+        if path and os.path.isfile(path):
+            with open(path, "r", encoding="UTF-8") as file:
+                text = file.read()
+        else:
+            text = self.extract(content, encoding)
+            if path:
+                folder(path, is_file=True)
+                # Write to a temporary file first so that readers never see a partial file
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="UTF-8") as file:
+                    file.write(text)
+                os.replace(tmp_path, path)
+
+        with self.__lock:
+            self.__cache[key] = text
+            if len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+        return text
+
+    def extract(self, content: Union[bytes, str], encoding: Optional[str] = None) -> str:
+        """Streams the page through the lxml html parser keeping only the text nodes.
+
+        Args:
+            content: Raw or decoded html body.
+            encoding: Charset of the HTTP `Content-Type` header of raw bodies, see `sniff_encoding`.
+
+        Returns:
+            Stripped text nodes joined by a single space.
+        """
+        if not content:
+            return ""
+
+        encoding = sniff_encoding(content, encoding) if isinstance(content, bytes) else None
+        try:
+            parser = etree.HTMLParser(target=_TextTarget(self.__skip), encoding=encoding, remove_pis=True)
+        except LookupError:
+            parser = etree.HTMLParser(target=_TextTarget(self.__skip), encoding="utf-8", remove_pis=True)
+        parser.feed(content)
+        return parser.close()
@@ -1,45 +1,203 @@
 import json
 import os
-import sys
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
 
 import matplotlib.pyplot as plt
-import networkx as nx
-import seaborn as sns
-from matplotlib.ticker import MultipleLocator
+import numpy as np
+from matplotlib.axes import Axes
 
 from modules.checker import folder
+from modules.community import label_propagation, write_communities
+from modules.export import FORMATS, overview, top_nodes, write_graphml, write_parquet
+from modules.graph import Graph, nx
 from modules.helper import verbose
+from modules.metrics import METRICS, GraphMetrics
+from modules.stats import GraphStats
+from modules.structure import structure_report
+
+# Largest degree shown by the degree bar graphs
+MAX_BAR_DEGREE = 50
+
+
+def log_bins(values: np.ndarray, bins: int = 50) -> np.ndarray:
+    """Logarithmically spaced bin edges covering the positive values.
+
+    Args:
+        values: Positive values.
+        bins: Number of bins.
+
+    Returns:
+        `bins + 1` edges, linear if the values span less than a decade.
+    """
+    low, high = values.min(), values.max()
+    if high <= low * 10:
+        return np.linspace(low, high if high > low else low + 1, bins + 1)
+    return np.geomspace(low, high, bins + 1)
+
+
+def degree_scatter(ax: Axes, values: np.ndarray, xlabel: str, color: str) -> None:
+    """Log-log scatter plot of the number of nodes of each non zero degree.
+
+    Args:
+        ax: Axes of the plot.
+        values: Degree of each node.
+        xlabel: Name of the degree.
+        color: Color of the markers.
+    """
+    counts = np.bincount(values, minlength=1)
+    degrees = np.flatnonzero(counts[1:]) + 1
+    ax.scatter(degrees, counts[degrees], color=color, s=12)
+    if len(degrees):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+    ax.set_ylabel("No. of Nodes")
+    ax.set_xlabel(xlabel)
+    ax.set_title(f"{xlabel} of the graph")
+
+
+def degree_bar(ax: Axes, values: np.ndarray, xlabel: str) -> None:
+    """Bar graph of the percentage of nodes of each degree up to `MAX_BAR_DEGREE`.
+
+    Args:
+        ax: Axes of the plot.
+        values: Degree of each node.
+        xlabel: Name of the degree.
+    """
+    counts = np.bincount(values, minlength=1)[: MAX_BAR_DEGREE + 1]
+    ax.bar(np.arange(len(counts)), counts / max(len(values), 1) * 100, color="cornflowerblue")
+    ax.set_xlim(-1, MAX_BAR_DEGREE + 1)
+    ax.set_ylabel("Percentage of Nodes")
+    ax.set_xlabel(xlabel)
+    ax.set_title(f"{xlabel} of the graph")
+
+
+def metric_histogram(ax: Axes, values: np.ndarray, xlabel: str, bins: int = 50) -> None:
+    """Histogram of the percentage of nodes per log bin of a heavy tailed metric.
+
+    Nodes with a zero value can't be placed on a log axis, their share is given in the legend.
+
+    Args:
+        ax: Axes of the plot.
+        values: Metric of each node.
+        xlabel: Name of the metric.
+        bins: Number of bins.
+    """
+    positive = values[values > 0]
+    if len(positive):
+        edges = log_bins(positive, bins)
+        counts, _ = np.histogram(positive, edges)
+        ax.bar(
+            edges[:-1],
+            counts / len(values) * 100,
+            width=np.diff(edges),
+            align="edge",
+            color="cornflowerblue",
+            label=f"{(len(values) - len(positive)) / len(values) * 100:.1f}% of the nodes at 0",
+        )
+        if edges[-1] > edges[0] * 10:
+            ax.set_xscale("log")
+        ax.legend()
+    ax.set_ylabel("Percentage of Nodes")
+    ax.set_xlabel(xlabel)
+    ax.set_title(f"{xlabel} of the graph")
+
+
+# Drawing function, metric and options of each plot
+PLOTS = {
+    "indegree_plot": (degree_scatter, "in_degree", {"xlabel": "Indegree", "color": "orangered"}),
+    "indegree_bar": (degree_bar, "in_degree", {"xlabel": "Indegree"}),
+    "outdegree_plot": (degree_scatter, "out_degree", {"xlabel": "Outdegree", "color": "limegreen"}),
+    "outdegree_bar": (degree_bar, "out_degree", {"xlabel": "Outdegree"}),
+    "eigenvector_centrality_bar": (metric_histogram, "eigenvector_centrality", {"xlabel": "Eigenvector Centrality"}),
+    "pagerank_bar": (metric_histogram, "pagerank", {"xlabel": "PageRank"}),
+}
+
+
+def render(name: str, values: np.ndarray, out_path: str) -> str:
+    """Draws a plot of `PLOTS` to `out_path/<name>.png`, closing its figure.
+
+    Args:
+        name: Name of the plot.
+        values: Metric of each node.
+        out_path: Dir path of the plot.
+
+    Returns:
+        Path of the plot.
+    """
+    function, _, options = PLOTS[name]
+    fig, ax = plt.subplots(figsize=(12, 6))
+    try:
+        ax.grid()
+        function(ax, values, **options)
+        path = os.path.join(out_path, f"{name}.png")
+        fig.savefig(path, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return path
+
+
+def plot_stats(stats_path: str, out_path: str, names: Optional[List[str]] = None) -> List[str]:
+    """Draws the degree plots from a `GraphStats` snapshot, e.g. while the crawl goes on.
+
+    Args:
+        stats_path: Dir path of the snapshot, the crawler output path.
+        out_path: The path to the output directory.
+        names: Names of the degree plots, every degree plot of `PLOTS` if None.
+
+    Returns:
+        Path of each plot.
+    """
+    _, arrays = GraphStats.load(stats_path)
+    names = [name for name in PLOTS if PLOTS[name][1] in arrays] if names is None else names
+    out_path = folder(os.path.join(out_path, "visualization"))
+    return [render(name, arrays[PLOTS[name][1]], out_path) for name in names]
 
 
 class Visualization:
     """Visualize the graphs and insights from the crawled data.
 
+    The metrics are computed on a CSR `Graph` of the links and cached by
+    `GraphMetrics`, networkx is only used to draw small graphs.
+
     Attributes:
-        json_file: The json file containing the crawled data.
+        json_file: The json, or binary, network structure of the crawled data.
         out_path: The path to the output directory.
         logger: A logger object to log the output.
+        metrics_dir: Dir path of the cached metrics, `metrics` (or `host_metrics`) next to `json_file` if None.
+        hosts: True to visualize the host graph, weighted by the number of page links between hosts, in
+            `out_path/host_visualization` else the page graph in `out_path/visualization`.
     """
 
-    def __init__(self, json_file, out_path, logger):
+    def __init__(self, json_file, out_path, logger, metrics_dir: Optional[str] = None, hosts: bool = False):
         self.json_file = json_file
         self.logger = logger
 
-        self.out_path = folder(os.path.join(out_path, "visualization"))
+        self.out_path = folder(os.path.join(out_path, "host_visualization" if hosts else "visualization"))
 
-        with open(self.json_file, "r", encoding="UTF-8") as f:
-            self.data = json.load(f)
+        self.metrics = GraphMetrics(self.json_file, self.logger, metrics_dir, hosts)
+        self.__G = None
+        self.__layout: Optional[np.ndarray] = None
 
-        self.G = nx.DiGraph()
-        self.G.add_nodes_from(self.data.keys())
-        for key, value in self.data.items():
-            self.G.add_edges_from([key, val] for val in value)
+    @property
+    def graph(self) -> Graph:
+        """CSR graph of the links, only parsed when a metric is not cached."""
+        return self.metrics.graph
+
+    @property
+    def G(self):
+        """networkx DiGraph of the links, only for small graphs."""
+        if self.__G is None:
+            self.__G = self.graph.to_networkx()
+        return self.__G
 
     @verbose
     def visualize(self):
         """Visualization of the graph."""
+        # Converted first, so that a missing networkx raises the ImportError of `Graph.to_networkx`
+        G = self.G
         nx.draw(
-            self.G,
+            G,
             with_labels=False,
             node_size=5,
             font_size=6,
@@ -50,112 +208,181 @@ class Visualization:
             width=0.5,
         )
 
+    def metric(self, name: str) -> np.ndarray:
+        """Metric of each node, computed once per network file and read from the `GraphMetrics` cache.
+
+        Args:
+            name: `in_degree`, `out_degree`, `pagerank` or `eigenvector_centrality`.
+
+        Returns:
+            Metric of each node.
+        """
+        return self.metrics.get(name)
+
+    def layout(self) -> np.ndarray:
+        """Spectral layout of the whole graph, computed once.
+
+        Returns:
+            (n, 2) position of each node in [-1, 1].
+        """
+        if self.__layout is None:
+            self.__layout, convergence = self.graph.spectral_layout()
+            self.logger.debug(
+                "Layout computed :: %d iteration(s), error %.2E", convergence["iterations"], convergence["error"]
+            )
+        return self.__layout
+
+    def export(self, fmt: str = "parquet", sample: Optional[int] = None) -> List[str]:
+        """Exports the graph with its layout and metrics for external tools, and draws its overview.
+
+        The layout and the overview cover the whole graph, `sample` only
+        limits the exported nodes to those of highest PageRank.
+
+        Args:
+            fmt: `graphml` for a `network.graphml` file, `parquet` for `nodes.parquet` and `edges.parquet` files.
+            sample: Number of nodes exported, every node if None.
+
+        Returns:
+            Path of the overview image and of the exported files.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {', '.join(FORMATS)}")
+        out_path = folder(os.path.join(self.out_path, "export"))
+        positions = self.layout()
+
+        self.logger.info("Generating :: Overview of the graph..")
+        paths = [overview(os.path.join(self.out_path, "overview.png"), self.graph, positions)]
+
+        nodes = top_nodes(self.metric("pagerank"), sample)
+        graph = self.graph if len(nodes) == self.graph.n_nodes else self.graph.subgraph(nodes)
+        attributes = {"x": positions[nodes, 0], "y": positions[nodes, 1]}
+        attributes.update({name: np.asarray(self.metric(name))[nodes] for name in METRICS})
+        if fmt == "graphml":
+            paths.append(write_graphml(os.path.join(out_path, "network.graphml"), graph, attributes))
+        else:
+            paths.extend(write_parquet(out_path, graph, attributes))
+        self.logger.info("Graph exported :: %d node(s), %d link(s) in %s", graph.n_nodes, graph.n_edges, out_path)
+        return paths
+
+    def structure(self) -> str:
+        """Writes the SCC, bow-tie, WCC and seed reachability report of the graph to `structure.json`.
+
+        Returns:
+            Path of the report.
+        """
+        self.logger.info("Generating :: Structure report of the graph..")
+        report = structure_report(self.graph)
+        path = os.path.join(self.out_path, "structure.json")
+        with open(path, "w", encoding="UTF-8") as file:
+            json.dump(report, file, indent=2)
+        self.logger.info(
+            "Structure report created :: %s, largest SCC of %d node(s), %d weakly connected component(s)",
+            path,
+            report["scc"]["largest"],
+            report["wcc"]["count"],
+        )
+        return path
+
+    def communities(self) -> str:
+        """Writes the link structure community of every url, and of its host, to `communities.csv`.
+
+        The page and the host communities are found by label propagation on
+        the page graph and on the host graph, the `URL` column joins them with
+        the text clusters of `clusterized.csv`.
+
+        Returns:
+            Path of the communities.
+        """
+        self.logger.info("Generating :: Communities of the graph..")
+        hosts = self.metrics.hosts
+        graph = Graph.from_file(self.json_file) if hosts else self.graph
+        host_graph = self.graph if hosts else Graph.from_file(self.json_file, hosts=True, logger=self.logger)
+        results = {}
+        for name, current in (("Page communities", graph), ("Host communities", host_graph)):
+            results[name], convergence = label_propagation(current)
+            if not convergence["converged"]:
+                self.logger.warning(
+                    "%s did not converge :: %.2E of the nodes still changing after %d iteration(s)",
+                    name,
+                    convergence["error"],
+                    convergence["iterations"],
+                )
+        labels, host_communities = results.values()
+        path = write_communities(
+            os.path.join(self.out_path, "communities.csv"), graph, labels, host_graph, host_communities
+        )
+        self.logger.info(
+            "Communities created :: %s, %d page and %d host communit(ies)",
+            path,
+            labels.max() + 1 if len(labels) else 0,
+            host_communities.max() + 1 if len(host_communities) else 0,
+        )
+        return path
+
     def indegree(self):
         """Indegree of the graph."""
-        return dict(self.G.in_degree())
+        return dict(zip(self.metrics.urls, self.metric("in_degree").tolist()))
 
     def outdegree(self):
         """Outdegree of the graph."""
-        return dict(self.G.out_degree())
+        return dict(zip(self.metrics.urls, self.metric("out_degree").tolist()))
+
+    def plot(self, name: str) -> str:
+        """Draws a plot of `PLOTS` in `out_path`.
+
+        Args:
+            name: Name of the plot.
+
+        Returns:
+            Path of the plot.
+        """
+        self.logger.info("Generating :: %s..", getattr(self, name).__doc__)
+        return render(name, self.metric(PLOTS[name][1]), self.out_path)
+
+    def plot_all(self, names: Optional[List[str]] = None, n_jobs: Optional[int] = None) -> List[str]:
+        """Draws plots in parallel processes.
+
+        The metrics are computed once in this process and the figures are
+        rendered by `n_jobs` processes.
+
+        Args:
+            names: Names of the plots, every plot of `PLOTS` if None.
+            n_jobs: Number of rendering processes, all the cpus if None.
+
+        Returns:
+            Path of each plot.
+        """
+        names = list(PLOTS) if names is None else names
+        values = [self.metric(PLOTS[name][1]) for name in names]
+        n_jobs = min(len(names), n_jobs or os.cpu_count() or 1)
+        for name in names:
+            self.logger.info("Generating :: %s..", getattr(self, name).__doc__)
+
+        if n_jobs <= 1:
+            return [render(name, value, self.out_path) for name, value in zip(names, values)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            return list(pool.map(render, names, values, [self.out_path] * len(names)))
 
-    @verbose
     def indegree_plot(self):
         """Scatter Plot of the indegree vs nodes of the graph."""
-        indegree = self.indegree()
-        indegree_counter = Counter(indegree.values())
-        indegree_counter.pop(0, None)
-        indegree_values = indegree_counter.values()
-        indegree_keys = indegree_counter.keys()
-        sns.scatterplot(x=indegree_keys, y=indegree_values, color="orangered")
-        plt.ylabel("No. of Nodes")
-        plt.xlabel("Indegree")
-        plt.title("Indegree of the graph")
+        return self.plot("indegree_plot")
 
-    @verbose
     def indegree_bar(self):
         """Bar Graph of the indegree vs percentage of nodes of the graph."""
-        indegree = self.indegree()
-        indegree_counter = Counter(indegree.values())
-        total = sum(indegree_counter.values())
-
-        indegree_keys, indegree_percent = [], []
-        for k, v in sorted(indegree_counter.items()):
-            indegree_keys.append(k)
-            indegree_percent.append((v / total) * 100)
-
-        ax = sns.barplot(x=indegree_keys, y=indegree_percent, color="cornflowerblue")
-        ax.set_xlim(-1, min(50, len(indegree_keys)))
-        ax.xaxis.set_major_locator(MultipleLocator(base=min(50, max(len(indegree_keys), 5)) // 5))
-        plt.ylabel("Percentage of Nodes")
-        plt.xlabel("Indegree")
-        plt.title("Indegree of the graph")
+        return self.plot("indegree_bar")
 
-    @verbose
     def outdegree_plot(self):
         """Scatter Plot of the outdegree vs nodes of the graph."""
-        outdegree = self.outdegree()
-        outdegree_counter = Counter(outdegree.values())
-        outdegree_counter.pop(0, None)
-        outdegree_values = outdegree_counter.values()
-        outdegree_keys = outdegree_counter.keys()
-        sns.scatterplot(x=outdegree_keys, y=outdegree_values, color="limegreen")
-        plt.ylabel("No. of Nodes")
-        plt.xlabel("Outdegree")
-        plt.title("Outdegree of the graph")
+        return self.plot("outdegree_plot")
 
-    @verbose
     def outdegree_bar(self):
         """Bar Graph of the outdegree vs percentage of nodes of the graph."""
-        outdegree = self.outdegree()
-        outdegree_counter = Counter(outdegree.values())
-        total = sum(outdegree_counter.values())
-
-        outdegree_keys, outdegree_percent = [], []
-        for k, v in sorted(outdegree_counter.items()):
-            outdegree_keys.append(k)
-            outdegree_percent.append((v / total) * 100)
-
-        ax = sns.barplot(x=outdegree_keys, y=outdegree_percent, color="cornflowerblue")
-        ax.set_xlim(-1, min(50, len(outdegree_keys)) + 1)
-        ax.xaxis.set_major_locator(MultipleLocator(base=min(50, max(len(outdegree_keys), 5)) // 5))
-        plt.ylabel("Percentage of Nodes")
-        plt.xlabel("Outdegree")
-        plt.title("Outdegree of the graph")
+        return self.plot("outdegree_bar")
 
-    @verbose
     def eigenvector_centrality_bar(self):
-        """Bar Graph of the eigenvector centrality vs percentage of nodes of the graph."""
-        eigenvector_centrality = nx.eigenvector_centrality(self.G, max_iter=sys.maxsize)
-        eigenvector_centrality_counter = Counter(eigenvector_centrality.values())
-        total = sum(eigenvector_centrality_counter.values())
-
-        evc_keys, evc_percent = [], []
-        for k, v in sorted(eigenvector_centrality_counter.items()):
-            evc_keys.append(k)
-            evc_percent.append((v / total) * 100)
-
-        ax = sns.barplot(x=evc_keys, y=evc_percent, color="cornflowerblue")
-        ax.set_xticklabels(map(lambda x: f"{x:.2E}", evc_keys))
-        ax.xaxis.set_major_locator(MultipleLocator(base=max(len(evc_keys), 5) // 5))
-        plt.ylabel("Percentage of Nodes")
-        plt.xlabel("Eigenvector Centrality")
-        plt.title("Eigenvector Centrality of the graph")
+        """Histogram of the eigenvector centrality vs percentage of nodes of the graph."""
+        return self.plot("eigenvector_centrality_bar")
 
-    @verbose
     def pagerank_bar(self):
-        """Bar Graph of the pagerank vs percentage of nodes of the graph."""
-        pagerank = nx.pagerank(self.G)
-        pagerank_counter = Counter(pagerank.values())
-        total = sum(pagerank_counter.values())
-
-        pagerank_keys, pagerank_percent = [], []
-        for k, v in sorted(pagerank_counter.items()):
-            pagerank_keys.append(k)
-            pagerank_percent.append((v / total) * 100)
-
-        ax = sns.barplot(x=pagerank_keys, y=pagerank_percent, color="cornflowerblue")
-        ax.set_xticklabels(map(lambda x: f"{x:.2E}", pagerank_keys))
-        ax.xaxis.set_major_locator(MultipleLocator(base=max(len(pagerank_keys), 5) // 5))
-        plt.ylabel("Percentage of Nodes")
-        plt.xlabel("PageRank")
-        plt.title("PageRank of the graph")
+        """Histogram of the pagerank vs percentage of nodes of the graph."""
+        return self.plot("pagerank_bar")